@@ -1 +1,76 @@
-from .alertmanager import *
+"""
+A client for the Prometheus Alert Manager v2 API.
+
+The public names are imported on first use, so ``import alertmanager`` is
+cheap and a script posting one alert only loads what it needs: requests
+and box for the client, aiohttp only for AsyncAlertManager, and maya only
+when set_endtime is given an unusual human readable time.
+"""
+import importlib
+
+
+# Public name -> submodule defining it
+_EXPORTS = {
+    'AlertManager': 'alertmanager',
+    'HTTPError': 'alertmanager',
+    'Alert': 'alert_objects',
+    'Silence': 'alert_objects',
+    'CompactAlert': 'alert_objects',
+    'CompactSilence': 'alert_objects',
+    'Box': 'alert_objects',
+    'BoxKeyError': 'alert_objects',
+    'BatchResult': 'bulk',
+    'iter_batches': 'bulk',
+    'AsyncAlertManager': 'async_alertmanager',
+    'MultiAlertManager': 'multi',
+    'AlertEmitter': 'emitter',
+    'LazyAlertList': 'lazy',
+    'Matcher': 'matchers',
+    'filter_alerts': 'matchers',
+    'AlertIndex': 'index',
+    'evaluate_silences': 'silencing',
+    'AlertWatcher': 'watch',
+    'HAAlertManager': 'ha',
+    'ResponseCache': 'cache',
+    'make_session': 'transport',
+    'shared_session': 'transport',
+    'RetryPolicy': 'retry',
+    'RetryBudget': 'retry',
+    'CircuitBreaker': 'retry',
+    'CircuitOpenError': 'retry',
+    'sort_by_time': 'timeline',
+    'started_between': 'timeline',
+    'firing_longer_than': 'timeline',
+    'AlertColumns': 'columnar',
+    'to_columns': 'columnar',
+    'Snapshot': 'snapshot',
+    'write_snapshot': 'snapshot',
+    'iter_snapshots': 'snapshot',
+    'to_rfc3339': 'timeutils',
+    'frozen_now': 'timeutils',
+    'Hook': 'instrumentation',
+    'MetricsCollector': 'instrumentation',
+    'OpenTelemetryHook': 'instrumentation',
+}
+
+_SUBMODULES = ('codec', 'columnar', 'snapshot', 'timeline', 'timeutils', 'compression', 'stream', 'testing')
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module('.' + name, __name__)
+    try:
+        module = _EXPORTS[name]
+    except KeyError:
+        raise AttributeError(
+            "module {!r} has no attribute {!r}".format(__name__, name))
+    value = getattr(importlib.import_module('.' + module, __name__), name)
+    # Cache it so later lookups don't come back here
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS) | set(_SUBMODULES))
@@ -1,9 +1,78 @@
-import maya
 from box import Box, BoxKeyError
-import json
+from . import codec
+from .timeutils import parse_rfc3339, to_rfc3339
 
 
-class AlertObject(Box):
+class TimestampMixin(object):
+    """
+    Lazily parsed timestamps for alerts and silences.
+
+    Each of startsAt, endsAt and updatedAt is parsed the first time it is
+    read and cached on the object, so sorting or aging the same alerts over
+    and over doesn't parse anything again. The cache notices when a field
+    is reassigned.
+
+    Subclasses provide _raw_timestamp(field) and _timestamp_cache().
+
+    """
+
+    __slots__ = ()
+
+    def _parse_timestamp(self, field):
+        """Return the cached (raw, datetime, epoch) entry for a field."""
+        value = self._raw_timestamp(field)
+        cache = self._timestamp_cache()
+        cached = cache.get(field)
+        # Reparse only if the field was reassigned since we last looked
+        if cached is None or cached[0] is not value:
+            if value:
+                moment = parse_rfc3339(value)
+                cached = (value, moment, moment.timestamp())
+            else:
+                cached = (value, None, None)
+            cache[field] = cached
+        return cached
+
+    def _timestamp(self, field):
+        """Return a timestamp field as an aware UTC datetime, or None."""
+        return self._parse_timestamp(field)[1]
+
+    def epoch(self, field='startsAt'):
+        """
+        Return a timestamp field as seconds since the epoch.
+
+        Parameters
+        ----------
+        field : str
+            (Default value = 'startsAt')
+            One of startsAt, endsAt or updatedAt.
+
+
+        Returns
+        -------
+        float
+            The timestamp, or None if the field isn't set.
+
+        """
+        return self._parse_timestamp(field)[2]
+
+    @property
+    def starts_at(self):
+        """Return startsAt as an aware UTC datetime, or None."""
+        return self._timestamp('startsAt')
+
+    @property
+    def ends_at(self):
+        """Return endsAt as an aware UTC datetime, or None."""
+        return self._timestamp('endsAt')
+
+    @property
+    def updated_at(self):
+        """Return updatedAt as an aware UTC datetime, or None."""
+        return self._timestamp('updatedAt')
+
+
+class AlertObject(TimestampMixin, Box):
     """
     Base class for alerts/silences.
 
@@ -27,17 +96,25 @@ class AlertObject(Box):
 
         super().__init__(*args, **kwargs)
 
+    def _raw_timestamp(self, field):
+        # dict.get, default_box would make up an empty Box for missing keys
+        return dict.get(self, field)
+
+    def _timestamp_cache(self):
+        # Kept out of the Box's items so it is never sent or compared
+        return self.__dict__.setdefault('_parsed', dict())
+
     @classmethod
     def from_dict(cls, data):
         """
         Convert a dictionary into an AlertObject.
 
-        This class method takes a dictionary as an argument, loads it as json
-        and then constructs an AlertObject with that data.
+        This class method takes a dictionary, or a json string/bytes which
+        is decoded first, and constructs an AlertObject with that data.
 
         Parameters
         ----------
-        data : dict
+        data : dict, str or bytes
             A dictionary representing the alert object we would like returned.
 
 
@@ -47,10 +124,8 @@ class AlertObject(Box):
             Return an AlertObject created from our data parameter.
 
         """
-        try:
-            data = json.loads(data)
-        except:
-            pass
+        if isinstance(data, (str, bytes, bytearray)):
+            data = codec.loads(data)
 
         return cls(data)
 
@@ -82,8 +157,8 @@ class AlertObject(Box):
 
         Parameters
         ----------
-        endtime : str
-            A string representation of time. EX: 'in 2 minutes'
+        endtime : str, datetime, timedelta, int or float
+            The end time, see timeutils.to_rfc3339. EX: 'in 2 minutes'
 
 
         Returns
@@ -96,7 +171,7 @@ class AlertObject(Box):
         # AlertManager expects rfc3339 timestamps
         # https://prometheus.io/docs/alerting/clients/
         # RFC3339 works best with UTC, so no override currently
-        self.endsAt = maya.when(endtime).rfc3339()
+        self.endsAt = to_rfc3339(endtime)
 
     def validate_and_dump(self):
         """
@@ -269,3 +344,298 @@ class Silence(AlertObject):
         else:
             valid = False
         return valid
+
+
+class CompactObject(TimestampMixin):
+    """
+    Base class for the compact alert/silence representations.
+
+    Compact objects are a lightweight alternative to the Box based Alert and
+    Silence classes for large result sets. Known fields live in __slots__
+    and nested data such as labels stays as plain dicts, so no per key
+    wrapping happens on construction or access. Timestamps are kept as the
+    strings Alert Manager sent and only parsed, once, when a datetime
+    accessor such as starts_at is used. Fields we don't know about are kept
+    aside so nothing is lost on a round trip.
+
+    Nested values are accessed with item access, e.g. alert.labels['job']
+    rather than alert.labels.job.
+
+    """
+
+    __slots__ = ('_extra', '_parsed')
+
+    _fields = ()
+
+    def __init__(self, data=None, **kwargs):
+        """
+        Init method.
+
+        Parameters
+        ----------
+        data : dict
+            (Default value = None)
+            The alert/silence as returned by Alert Manager.
+
+        kwargs: dict
+            Arbitrary keyword arguments, merged over data.
+
+        """
+        if kwargs:
+            data = dict(data or {}, **kwargs)
+        elif data is None:
+            data = {}
+        for field in self._fields:
+            setattr(self, field, data.get(field))
+        extra = data.keys() - self._field_set
+        self._extra = {key: data[key] for key in extra} if extra else None
+        self._parsed = None
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Convert a dictionary, or a json string, into a compact object.
+
+        Parameters
+        ----------
+        data : dict
+            A dictionary representing the object we would like returned.
+
+
+        Returns
+        -------
+        CompactObject
+            Return a compact object created from our data parameter.
+
+        """
+        if isinstance(data, (str, bytes, bytearray)):
+            data = codec.loads(data)
+        return cls(data)
+
+    @property
+    def attributes(self):
+        """Return the names of the fields that are set."""
+        return self.to_dict().keys()
+
+    def __getitem__(self, key):
+        if key in self._field_set:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        elif self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self._field_set:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = dict()
+            self._extra[key] = value
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default=None):
+        """Return a field like dict.get would."""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        """Return the names of the fields that are set."""
+        return self.to_dict().keys()
+
+    def __eq__(self, other):
+        if isinstance(other, CompactObject):
+            other = other.to_dict()
+        return self.to_dict() == other
+
+    def __repr__(self):
+        return '<{}: {}>'.format(type(self).__name__, self.to_dict())
+
+    def __getstate__(self):
+        return self.to_dict()
+
+    def __setstate__(self, state):
+        self.__init__(state)
+
+    def to_dict(self):
+        """
+        Return the object as a plain dict.
+
+        Returns
+        -------
+        dict
+            The fields that are set plus any unknown fields we received.
+
+        """
+        data = {field: getattr(self, field) for field in self._fields
+                if getattr(self, field) is not None}
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+    def _raw_timestamp(self, field):
+        return getattr(self, field)
+
+    def _timestamp_cache(self):
+        if self._parsed is None:
+            self._parsed = dict()
+        return self._parsed
+
+    def set_endtime(self, endtime):
+        """
+        Set an endtime for the object.
+
+        Parameters
+        ----------
+        endtime : str, datetime, timedelta, int or float
+            The end time, see timeutils.to_rfc3339. EX: 'in 2 minutes'
+
+        """
+        self.endsAt = to_rfc3339(endtime)
+
+    def validate_and_dump(self):
+        """
+        Validate the object meets minimum structural requirements.
+
+        Returns
+        -------
+        dict
+            Return the object as a plain dict.
+
+
+        Raises
+        ------
+        ValueError
+            Raise a ValueError if our object doesn't pass muster.
+
+        """
+        if self._validate():
+            return self.to_dict()
+        else:
+            raise ValueError('Object does not validate ==> {}'.format(self))
+
+    def _validate(self):
+        raise NotImplementedError
+
+
+class CompactAlert(CompactObject):
+    """
+    Compact, slotted counterpart of Alert.
+
+    Offers the same add_label/add_annotation/validate_and_dump interface as
+    Alert at a fraction of the memory and construction cost.
+
+    """
+
+    _fields = ('labels', 'annotations', 'startsAt', 'endsAt', 'updatedAt',
+               'generatorURL', 'status', 'receivers', 'fingerprint')
+    _field_set = frozenset(_fields)
+    __slots__ = _fields
+
+    def add_label(self, key, value):
+        """
+        Add a label to our alert.
+
+        Parameters
+        ----------
+        key: str
+            The new label's key.
+
+        value: str
+            The new label's value.
+
+        """
+        if self.labels is None:
+            self.labels = dict()
+        self.labels[key] = value
+
+    def add_annotation(self, key, value):
+        """
+        Add an annotation to our alert.
+
+        Parameters
+        ----------
+        key: str
+            The new annotation's key.
+
+        value: str
+            The new annotation's value.
+
+        """
+        if self.annotations is None:
+            self.annotations = dict()
+        self.annotations[key] = value
+
+    def _validate(self):
+        """Validate that the alert has a non-empty 'labels' dict."""
+        return bool(self.labels)
+
+
+class CompactSilence(CompactObject):
+    """
+    Compact, slotted counterpart of Silence.
+
+    Offers the same add_matcher/validate_and_dump interface as Silence at a
+    fraction of the memory and construction cost.
+
+    """
+
+    _fields = ('id', 'matchers', 'startsAt', 'endsAt', 'updatedAt',
+               'createdBy', 'comment', 'status')
+    _field_set = frozenset(_fields)
+    __slots__ = _fields
+
+    def add_matcher(self, name, value, isRegex=False):
+        """
+        Add a matcher to the silence.
+
+        Parameters
+        ----------
+        name: str
+            This is the key name we want to match on e.g. 'alertname'.
+
+        value: str
+            This is the value of the key we expect.
+
+        isRegex: Bool
+            (Default value=False)
+            This determines whether or not we are matching on regex or exact.
+
+        """
+        if self.matchers is None:
+            self.matchers = list()
+        self.matchers.append({'name': name, 'value': value,
+                              'isRegex': isRegex})
+
+    def _validate(self):
+        """Validate that the silence has non-empty matchers and an endsAt."""
+        if not self.matchers or not isinstance(self.matchers, list):
+            return False
+        if self.endsAt is None:
+            return False
+        return all(self.matchers)
+
+
+def alert_key(alert):
+    """
+    Return the deduplication key of an alert.
+
+    Alert Manager identifies alerts by fingerprint. Alerts that don't carry
+    one (for example ones we built ourselves) fall back to their label set.
+
+    """
+    fingerprint = alert.get('fingerprint')
+    if fingerprint:
+        return fingerprint
+    return frozenset((name, value) for name, value
+                     in (alert.get('labels') or {}).items()
+                     if isinstance(value, str))
@@ -1,11 +1,18 @@
 from requests.compat import urljoin
 from requests import HTTPError
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import requests
 import logging
-import json
-import maya
-from box import Box, BoxKeyError
-from .alert_objects import Alert, Silence
+import time
+from . import codec
+from .alert_objects import Alert, Silence, CompactAlert, CompactSilence
+from .bulk import BatchResult, iter_batches
+from .compression import compress_body
+from .instrumentation import current_call, instrumented
+from .lazy import LazyAlertList
+from .stream import iter_json_array
+from .retry import CircuitBreaker, send_with_retry
+from .transport import make_session, shared_session, DEFAULT_POOLSIZE
 
 
 class AlertManager(object):
@@ -21,7 +28,11 @@ class AlertManager(object):
 
     """
 
-    def __init__(self, host, port=9093, req_obj=None):
+    def __init__(self, host, port=9093, req_obj=None, cache=None,
+                 timeout=None, pool_connections=DEFAULT_POOLSIZE,
+                 pool_maxsize=DEFAULT_POOLSIZE, keepalive=0, http2=False,
+                 shared=False, retry=None, breaker=None,
+                 compress_threshold=None, hooks=None):
         """
         Init method.
 
@@ -36,11 +47,72 @@ class AlertManager(object):
         req_obj : request object
             (Default value = None)
             The req object would typically be a requests.Session() object.
+            When given, the pool, keepalive, http2 and shared options
+            below are ignored.
+        cache : ResponseCache
+            (Default value = None)
+            Cache GET responses according to the cache's per-route TTLs.
+            Nothing is cached by default.
+        timeout : float or tuple
+            (Default value = None)
+            Timeout of every request, either one number of seconds or a
+            (connect, read) tuple. Requests wait forever by default.
+        pool_connections : int
+            (Default value = 10)
+            Number of hosts whose connection pools the default session
+            keeps.
+        pool_maxsize : int
+            (Default value = 10)
+            Connections the default session keeps open to Alert Manager.
+            Raise it when more threads than that share this instance.
+        keepalive : int
+            (Default value = 0)
+            Seconds of idleness before the default session's connections
+            send TCP keep-alive probes. 0 leaves keep-alive off.
+        http2 : bool
+            (Default value = False)
+            Negotiate HTTP/2 with HTTPS hosts when urllib3 and h2 support
+            it.
+        shared : bool
+            (Default value = False)
+            Use a process wide session shared by every instance created
+            with the same pool options, so they reuse connections.
+        retry : RetryPolicy
+            (Default value = None)
+            Retry failed requests according to this policy. Nothing is
+            retried by default.
+        breaker : CircuitBreaker or bool
+            (Default value = None)
+            Fail fast with CircuitOpenError while Alert Manager is down.
+            True uses the breaker shared by every instance talking to the
+            same host.
+        compress_threshold : int
+            (Default value = None)
+            Gzip request bodies of at least this many bytes. Compression is
+            off by default, only turn it on if Alert Manager, or a proxy in
+            front of it, accepts gzip encoded requests.
+        hooks : list
+            (Default value = None)
+            Hook objects, such as MetricsCollector, told about every API
+            call before and after it is made.
 
         """
         self.hostname = host
         self.port = port
         self._req_obj = req_obj
+        self.cache = cache
+        self.timeout = timeout
+        self._session_options = dict(pool_connections=pool_connections,
+                                     pool_maxsize=pool_maxsize,
+                                     keepalive=keepalive, http2=http2)
+        self._shared = shared
+        self.retry = retry
+        if breaker is True:
+            breaker = CircuitBreaker.for_host(
+                "{}:{}".format(self.hostname, self.port))
+        self.breaker = breaker or None
+        self.compress_threshold = compress_threshold
+        self.hooks = list(hooks or ())
 
     @property
     def request_session(self):
@@ -59,7 +131,10 @@ class AlertManager(object):
 
         """
         if not self._req_obj:
-            self._req_obj = requests.Session()
+            if self._shared:
+                self._req_obj = shared_session(**self._session_options)
+            else:
+                self._req_obj = make_session(**self._session_options)
 
         return self._req_obj
 
@@ -93,7 +168,8 @@ class AlertManager(object):
         if req.status_code == requests.codes.ok:
             return True        
         else:
-            raise HTTPError('{} ==> {}'.format(req.status_code, req.text))
+            raise HTTPError('{} ==> {}'.format(req.status_code, req.text),
+                            response=req)
 
     def _make_request(self, method="GET", route="/", **kwargs):
         """
@@ -123,12 +199,73 @@ class AlertManager(object):
 
         """
         _host = "{}:{}".format(self.hostname, self.port)
-        route = urljoin(_host, route)
-
-        r = self.request_session.request(method, route, **kwargs)
+        url = urljoin(_host, route)
+        if self.timeout is not None:
+            kwargs.setdefault('timeout', self.timeout)
+        if self.compress_threshold is not None and 'data' in kwargs:
+            kwargs['data'], kwargs['headers'] = compress_body(
+                kwargs['data'], kwargs.get('headers'),
+                self.compress_threshold)
+
+        call = current_call()
+        if call is None:
+            return self._dispatch(method, route, url, **kwargs)
+        call.method = method
+        call.route = route
+        data = kwargs.get('data')
+        if isinstance(data, (bytes, bytearray)):
+            call.request_bytes += len(data)
+        started = time.perf_counter()
+        r = self._dispatch(method, route, url, **kwargs)
+        total = time.perf_counter() - started
+        elapsed = getattr(r, 'elapsed', None)
+        waited = min(elapsed.total_seconds(), total) if elapsed else total
+        call.add_phase('http', waited)
+        call.add_phase('transfer', total - waited)
+        call.status = r.status_code
+        if not kwargs.get('stream'):
+            call.response_bytes += len(r.content)
         return r
 
-    def get_alerts(self, **kwargs):
+    def _dispatch(self, method, route, url, **kwargs):
+        """Answer a request from the cache or send it."""
+        if self.cache is not None and method == "GET" and \
+                not kwargs.get('stream'):
+            return self.cache.fetch(
+                route, url, kwargs,
+                lambda headers: self._send(method, route, url, headers,
+                                           **kwargs))
+        return self._send(method, route, url, None, **kwargs)
+
+    def _send(self, method, route, url, extra_headers, **kwargs):
+        """Send a request through the retry policy and circuit breaker."""
+        if extra_headers:
+            kwargs['headers'] = dict(kwargs.get('headers') or {},
+                                     **extra_headers)
+        if self.retry is None and self.breaker is None:
+            return self.request_session.request(method, url, **kwargs)
+        return send_with_retry(
+            lambda: self.request_session.request(method, url, **kwargs),
+            method, route, self.retry, self.breaker,
+            "{}:{}".format(self.hostname, self.port))
+
+    def _decode(self, r):
+        """Decode a JSON response body, timing it for the hooks."""
+        call = current_call()
+        if call is None:
+            return codec.loads(r.content)
+        started = time.perf_counter()
+        data = codec.loads(r.content)
+        call.add_phase('decode', time.perf_counter() - started)
+        return data
+
+    def _invalidate(self, route):
+        """Drop cached responses of routes starting with route."""
+        if self.cache is not None:
+            self.cache.invalidate(route)
+
+    @instrumented
+    def get_alerts(self, compact=False, lazy=False, **kwargs):
         """
         Get a list of all alerts currently in Alert Manager.
 
@@ -137,6 +274,14 @@ class AlertManager(object):
 
         Parameters
         ----------
+        compact : bool
+            (Default value = False)
+            Return CompactAlert objects instead of Alert objects. Much
+            cheaper to build and hold for large result sets.
+        lazy : bool
+            (Default value = False)
+            Return a LazyAlertList that keeps the raw response and only
+            decodes and wraps alerts as they are accessed.
         **kwargs : dict
             Arbitrary keyword arguments. These kwargs can be used to specify
             filters to limit the return of our list of alerts to alerts that
@@ -155,7 +300,101 @@ class AlertManager(object):
             kwargs['filter'] = self._handle_filters(kwargs['filter'])
         r = self._make_request("GET", route, params=kwargs)
         if self._check_response(r):
-            return [Alert(alert) for alert in r.json()]
+            alert_class = CompactAlert if compact else Alert
+            if lazy:
+                return LazyAlertList(r.content, alert_class=alert_class)
+            return [alert_class(alert) for alert in self._decode(r)]
+
+    @instrumented
+    def iter_alerts(self, compact=False, chunk_size=65536, **kwargs):
+        """
+        Stream the alerts currently in Alert Manager one at a time.
+
+        Unlike get_alerts, the response is never buffered as a whole. The
+        body is parsed incrementally as it comes off the socket and each
+        alert is yielded as soon as it has been received, so peak memory
+        stays flat and the first alert is available before the download
+        finishes.
+
+        Parameters
+        ----------
+        compact : bool
+            (Default value = False)
+            Yield CompactAlert objects instead of Alert objects.
+        chunk_size : int
+            (Default value = 65536)
+            Number of bytes read from the socket at a time.
+        **kwargs : dict
+            Arbitrary keyword arguments. These kwargs can be used to specify
+            filters to limit the return of our list of alerts to alerts that
+            match our filter.
+
+
+        Yields
+        ------
+        Alert
+            Each alert from our Alert Manager instance.
+
+        """
+        route = "/api/v2/alerts"
+        self._validate_get_alert_kwargs(**kwargs)
+        if kwargs.get('filter'):
+            kwargs['filter'] = self._handle_filters(kwargs['filter'])
+        alert_class = CompactAlert if compact else Alert
+        for alert in self._stream(route, chunk_size, params=kwargs):
+            yield alert_class(alert)
+
+    @instrumented
+    def iter_silences(self, compact=False, chunk_size=65536, **kwargs):
+        """
+        Stream the silences currently in Alert Manager one at a time.
+
+        This is the streaming counterpart of get_silences, see iter_alerts.
+
+        Parameters
+        ----------
+        compact : bool
+            (Default value = False)
+            Yield CompactSilence objects instead of Alert objects.
+        chunk_size : int
+            (Default value = 65536)
+            Number of bytes read from the socket at a time.
+        **kwargs : dict
+            Arbitrary keyword arguments. These kwargs can be used to specify
+            filters to limit the return of our list of silences to silences
+            that match our filter.
+
+
+        Yields
+        ------
+        Alert
+            Each silence from our Alert Manager instance.
+
+        """
+        route = "/api/v2/silences"
+        self._validate_get_silence_kwargs(**kwargs)
+        if kwargs.get('filter'):
+            kwargs['filter'] = self._handle_filters(kwargs['filter'])
+        silence_class = CompactSilence if compact else Alert
+        for silence in self._stream(route, chunk_size, params=kwargs):
+            yield silence_class(silence)
+
+    def _stream(self, route, chunk_size, **kwargs):
+        """
+        Make a streaming GET request and yield the decoded array items.
+
+        This is a protected method used by iter_alerts and iter_silences.
+        The connection is released as soon as the generator is exhausted or
+        closed.
+
+        """
+        r = self._make_request("GET", route, stream=True, **kwargs)
+        try:
+            if self._check_response(r):
+                for item in iter_json_array(r.iter_content(chunk_size)):
+                    yield item
+        finally:
+            r.close()
 
     def _validate_get_alert_kwargs(self, **kwargs):
         """
@@ -246,6 +485,7 @@ class AlertManager(object):
             filter_list.append(string)
         return filter_list
 
+    @instrumented
     def post_alerts(self, *alert):
         """
         Post alerts to Alert Manager.
@@ -256,9 +496,9 @@ class AlertManager(object):
         Parameters
         ----------
         *alert : list of alerts or single alert
-            This is either a list of Alert objects, dictionaries or a single
-            Alert object or dictionary to be posted as an alert to
-            Alert Manager.
+            This is either a list of Alert/CompactAlert objects, dictionaries
+            or a single Alert/CompactAlert object or dictionary to be posted
+            as an alert to Alert Manager.
 
 
         Returns
@@ -267,18 +507,116 @@ class AlertManager(object):
             Return the response from Alert Manager as an Alert object.
 
         """
-        payload = list()
-        for obj in alert:
-            if isinstance(obj, Alert):
-                payload.append(obj.validate_and_dump())
-            else:
-                converted = Alert.from_dict(obj)
-                payload.append(converted.validate_and_dump())
+        payload = [self._dump_alert(obj) for obj in alert]
         route = "/api/v2/alerts"
-        r = self._make_request("POST", route, json=payload)
+        r = self._make_request("POST", route, data=codec.dumps(payload),
+                               headers=codec.JSON_HEADERS)
+        self._invalidate(route)
         if self._check_response(r):
             return Alert.from_dict({'status': [r.status_code]})
 
+    @staticmethod
+    def _dump_alert(obj):
+        """
+        Validate an Alert or dict and return it ready to be posted.
+
+        Parameters
+        ----------
+        obj : Alert, CompactAlert or dict
+            The alert to validate.
+
+
+        Returns
+        -------
+        dict
+            The validated alert as a plain dict.
+
+        """
+        if not isinstance(obj, (Alert, CompactAlert)):
+            obj = Alert.from_dict(obj)
+        return obj.validate_and_dump()
+
+    def post_alerts_bulk(self, alerts, batch_size=1000, max_bytes=None,
+                         max_workers=4):
+        """
+        Post a large stream of alerts in batches.
+
+        Alerts are pulled lazily from any iterable, so a generator is never
+        materialized, and grouped into batches by count and/or encoded size.
+        Up to max_workers batches are in flight at once over our pooled
+        session. A failed batch doesn't stop the stream, its failure is
+        reported in the returned results instead.
+
+        Parameters
+        ----------
+        alerts : iterable
+            Alert objects or dictionaries to post.
+        batch_size : int
+            (Default value = 1000)
+            Maximum number of alerts per request.
+        max_bytes : int
+            (Default value = None)
+            Maximum size in bytes of a request body, useful to stay under
+            proxy body limits.
+        max_workers : int
+            (Default value = 4)
+            Number of batches sent concurrently.
+
+
+        Returns
+        -------
+        list
+            A BatchResult for every batch, in stream order.
+
+
+        Raises
+        ------
+        ValueError
+            Raise a ValueError if an alert in the stream doesn't validate.
+            Batches already sent are not rolled back.
+
+        """
+        dumped = (self._dump_alert(obj) for obj in alerts)
+        batches = iter_batches(dumped, batch_size=batch_size,
+                               max_bytes=max_bytes)
+        results = list()
+        pending = set()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for index, (size, body) in enumerate(batches):
+                # Keep a bounded number of batches in memory
+                while len(pending) >= max_workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    results.extend(f.result() for f in done)
+                pending.add(executor.submit(self._post_batch, index, size,
+                                            body))
+            results.extend(f.result() for f in pending)
+        return sorted(results, key=lambda result: result.index)
+
+    @instrumented
+    def _post_batch(self, index, size, body):
+        """
+        Post one pre-encoded batch of alerts.
+
+        This is a protected method that should only be used by
+        post_alerts_bulk. Errors are caught and returned as part of the
+        BatchResult so one failing batch doesn't abort its siblings.
+
+        """
+        route = "/api/v2/alerts"
+        try:
+            r = self._make_request("POST", route, data=body,
+                                   headers=codec.JSON_HEADERS)
+        except requests.RequestException as err:
+            return BatchResult(index, size, None, err)
+        finally:
+            self._invalidate(route)
+        try:
+            self._check_response(r)
+        except HTTPError as err:
+            return BatchResult(index, size, r.status_code, err)
+        return BatchResult(index, size, r.status_code, None)
+
+    @instrumented
     def get_status(self):
         """
         Return the status of our Alert Manager instance.
@@ -295,8 +633,9 @@ class AlertManager(object):
         route = "/api/v2/status"
         r = self._make_request("GET", route)
         if self._check_response(r):
-            return Alert.from_dict(r.json())
+            return Alert.from_dict(self._decode(r))
 
+    @instrumented
     def get_receivers(self):
         """
         Return a list of available receivers from our Alert Manager instance.
@@ -317,8 +656,9 @@ class AlertManager(object):
         route = "/api/v2/receivers"
         r = self._make_request("GET", route)
         if self._check_response(r):
-            return Alert.from_dict(r.json())
+            return Alert.from_dict(self._decode(r))
 
+    @instrumented
     def get_alert_groups(self):
         """
         Return alerts grouped by label keys.
@@ -334,8 +674,9 @@ class AlertManager(object):
         route = "/api/v2/alerts/groups"
         r = self._make_request("GET", route)
         if self._check_response(r):
-            return [Alert(group) for group in r.json()]
+            return [Alert(group) for group in self._decode(r)]
 
+    @instrumented
     def get_silence(self, id=None):
         """
         Return a list of alert silences.
@@ -363,9 +704,10 @@ class AlertManager(object):
             route = urljoin(route, id)
         r = self._make_request("GET", route)
         if self._check_response(r):
-            return [Alert(silence) for silence in r.json()]
+            return [Alert(silence) for silence in self._decode(r)]
 
-    def get_silences(self, **kwargs):
+    @instrumented
+    def get_silences(self, compact=False, **kwargs):
         """
         Get a list of all silences currently in Alert Manager.
 
@@ -374,6 +716,10 @@ class AlertManager(object):
 
         Parameters
         ----------
+        compact : bool
+            (Default value = False)
+            Return CompactSilence objects instead of Alert objects. Much
+            cheaper to build and hold for large result sets.
         **kwargs : dict
             Arbitrary keyword arguments. These kwargs can be used to specify
             filters to limit the return of our list of alerts to silences that
@@ -392,8 +738,11 @@ class AlertManager(object):
             kwargs['filter'] = self._handle_filters(kwargs['filter'])
         r = self._make_request("GET", route, params=kwargs)
         if self._check_response(r):
-            return [Alert(alert) for alert in r.json()]
+            if compact:
+                return [CompactSilence(silence) for silence in self._decode(r)]
+            return [Alert(alert) for alert in self._decode(r)]
 
+    @instrumented
     def post_silence(self, silence):
         """
         Create a silence.
@@ -423,16 +772,19 @@ class AlertManager(object):
             Return the response from Alert Manager as an Alert object.
 
         """
-        if isinstance(silence, Silence):
+        if isinstance(silence, (Silence, CompactSilence)):
             silence = silence.validate_and_dump()
         else:
             silence = Silence.from_dict(silence)
             silence = silence.validate_and_dump()
         route = "/api/v2/silences"
-        r = self._make_request("POST", route, json=silence)
+        r = self._make_request("POST", route, data=codec.dumps(silence),
+                               headers=codec.JSON_HEADERS)
+        self._invalidate("/api/v2/silence")
         if self._check_response(r):
-            return Alert.from_dict(r.json())
+            return Alert.from_dict(self._decode(r))
 
+    @instrumented
     def delete_silence(self, silence_id):
         """
         Delete a silence.
@@ -455,5 +807,6 @@ class AlertManager(object):
         route = "/api/v2/silence/"
         route = urljoin(route, silence_id)
         r = self._make_request("DELETE", route)
+        self._invalidate("/api/v2/silence")
         if self._check_response(r):
             return Alert.from_dict({'status': [r.status_code]})
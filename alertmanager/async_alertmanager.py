@@ -0,0 +1,399 @@
+from requests.compat import urljoin
+from requests import HTTPError
+from collections import namedtuple
+from . import codec
+from .alert_objects import Alert, Silence, CompactAlert, CompactSilence
+from .alertmanager import AlertManager
+from .compression import compress_body
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+
+# The body has to be read before the connection goes back to the pool, so we
+# hand callers a detached copy of the parts of the response they need.
+AsyncResponse = namedtuple('AsyncResponse', ['status', 'headers', 'body'])
+
+
+class AsyncAlertManager(object):
+    """
+    Implements an asyncio interface to the Alert Manager API.
+
+    This class mirrors the AlertManager class method for method, but every API
+    call is a coroutine backed by a pooled aiohttp.ClientSession. Many calls
+    can be awaited concurrently on one event loop, sharing keep-alive
+    connections instead of blocking on each other.
+
+    aiohttp is an optional dependency, install it with:
+    pip install pylertalertmanager[async]
+
+    """
+
+    # The kwarg validation and filter handling doesn't touch the network, so
+    # we share the synchronous implementation rather than duplicating it.
+    _validate_get_alert_kwargs = AlertManager._validate_get_alert_kwargs
+    _validate_get_silence_kwargs = AlertManager._validate_get_silence_kwargs
+    _handle_filters = AlertManager._handle_filters
+    _dump_alert = staticmethod(AlertManager._dump_alert)
+
+    def __init__(self, host, port=9093, session=None, pool_size=100,
+                 keepalive_timeout=30, compress_threshold=None):
+        """
+        Init method.
+
+        Parameters
+        ----------
+        host : str
+            This is the Alert Manager instance we wish to connect to.
+        port : int
+            (Default value = 9093)
+            This is the port we wish to use to connect to our
+            Alert Manager instance.
+        session : aiohttp.ClientSession
+            (Default value = None)
+            An existing session to make our requests with. If one isn't
+            provided, a pooled session is created on first use.
+        pool_size : int
+            (Default value = 100)
+            The maximum number of simultaneous connections kept by the
+            default session's connection pool.
+        keepalive_timeout : int
+            (Default value = 30)
+            Seconds an idle connection is kept open for reuse.
+        compress_threshold : int
+            (Default value = None)
+            Gzip request bodies of at least this many bytes, see
+            AlertManager. Compression is off by default.
+
+        """
+        if aiohttp is None:
+            raise ImportError('AsyncAlertManager requires aiohttp, install '
+                              'it with: pip install pylertalertmanager[async]')
+        self.hostname = host
+        self.port = port
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self._session = session
+        self.compress_threshold = compress_threshold
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    @property
+    def request_session(self):
+        """
+        Return the aiohttp.ClientSession used to affect HTTP requests.
+
+        The session is created lazily, so it is bound to the event loop that
+        is running when the first request is made.
+
+        Returns
+        -------
+        _session : aiohttp.ClientSession
+            The pooled session shared by every request of this instance.
+
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                keepalive_timeout=self.keepalive_timeout)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def close(self):
+        """Close the underlying session and its pooled connections."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    def _check_response(self, req):
+        """
+        Raise an error if our responses are not what we expect.
+
+        Parameters
+        ----------
+        req : AsyncResponse
+            This is the response object we want to verify.
+
+
+        Returns
+        -------
+        boolean
+            Return True if response check is successful.
+
+
+        Raises
+        ------
+        HTTPError
+            Raise an http error if our response objects status attribute
+            is not a 200.
+
+        """
+        if req.status == 200:
+            return True
+        else:
+            raise HTTPError('{} ==> {}'.format(
+                req.status, req.body.decode('utf-8', 'replace')))
+
+    async def _make_request(self, method="GET", route="/", **kwargs):
+        """
+        Make our HTTP request and return a fully read response.
+
+        The body is read before the connection is handed back to the pool so
+        callers can decode it at their leisure.
+
+        Parameters
+        ----------
+        method : str
+            (Default value = "GET")
+            This is our HTTP verb.
+        route : str
+            (Default value = "/")
+            This is the url we are making our request to.
+        **kwargs : dict
+            Arbitrary keyword arguments passed on to
+            aiohttp.ClientSession.request.
+
+
+        Returns
+        -------
+        r : AsyncResponse
+            Return the status, headers and body from our API call.
+
+        """
+        _host = "{}:{}".format(self.hostname, self.port)
+        route = urljoin(_host, route)
+        if self.compress_threshold is not None and 'data' in kwargs:
+            kwargs['data'], kwargs['headers'] = compress_body(
+                kwargs['data'], kwargs.get('headers'),
+                self.compress_threshold)
+
+        async with self.request_session.request(method, route, **kwargs) as r:
+            body = await r.read()
+        return AsyncResponse(r.status, r.headers, body)
+
+    async def get_alerts(self, compact=False, **kwargs):
+        """
+        Get a list of all alerts currently in Alert Manager.
+
+        Parameters
+        ----------
+        compact : bool
+            (Default value = False)
+            Return CompactAlert objects instead of Alert objects.
+        **kwargs : dict
+            Arbitrary keyword arguments. These kwargs can be used to specify
+            filters to limit the return of our list of alerts to alerts that
+            match our filter.
+
+
+        Returns
+        -------
+        list
+            Return a list of Alert objects from our Alert Manager instance.
+
+        """
+        route = "/api/v2/alerts"
+        self._validate_get_alert_kwargs(**kwargs)
+        params = self._build_params(kwargs)
+        r = await self._make_request("GET", route, params=params)
+        if self._check_response(r):
+            alert_class = CompactAlert if compact else Alert
+            return [alert_class(alert) for alert in codec.loads(r.body)]
+
+    def _build_params(self, kwargs):
+        """
+        Convert get_alerts/get_silences kwargs into aiohttp query params.
+
+        aiohttp, unlike requests, won't expand list values or serialize
+        booleans, so repeated keys are given as a list of tuples.
+
+        """
+        if kwargs.get('filter'):
+            kwargs['filter'] = self._handle_filters(kwargs['filter'])
+        params = list()
+        for key, value in kwargs.items():
+            values = value if isinstance(value, list) else [value]
+            for item in values:
+                if isinstance(item, bool):
+                    item = str(item).lower()
+                params.append((key, str(item)))
+        return params
+
+    async def post_alerts(self, *alert):
+        """
+        Post alerts to Alert Manager.
+
+        Parameters
+        ----------
+        *alert : list of alerts or single alert
+            This is either a list of Alert objects, dictionaries or a single
+            Alert object or dictionary to be posted as an alert to
+            Alert Manager.
+
+
+        Returns
+        -------
+        Alert
+            Return the response from Alert Manager as an Alert object.
+
+        """
+        payload = [self._dump_alert(obj) for obj in alert]
+        route = "/api/v2/alerts"
+        r = await self._make_request("POST", route, data=codec.dumps(payload),
+                                     headers=codec.JSON_HEADERS)
+        if self._check_response(r):
+            return Alert.from_dict({'status': [r.status]})
+
+    async def get_status(self):
+        """
+        Return the status of our Alert Manager instance.
+
+        Returns
+        -------
+        Alert
+            Return the response from Alert Manager as an Alert object.
+
+        """
+        route = "/api/v2/status"
+        r = await self._make_request("GET", route)
+        if self._check_response(r):
+            return Alert.from_dict(codec.loads(r.body))
+
+    async def get_receivers(self):
+        """
+        Return a list of available receivers from our Alert Manager instance.
+
+        Returns
+        -------
+        Alert
+            Return the response from Alert Manager as an Alert object.
+
+        """
+        route = "/api/v2/receivers"
+        r = await self._make_request("GET", route)
+        if self._check_response(r):
+            return Alert.from_dict(codec.loads(r.body))
+
+    async def get_alert_groups(self):
+        """
+        Return alerts grouped by label keys.
+
+        Return
+        ------
+        list
+            Return the response from Alert Manager as a list of Alert objects.
+
+        """
+        route = "/api/v2/alerts/groups"
+        r = await self._make_request("GET", route)
+        if self._check_response(r):
+            return [Alert(group) for group in codec.loads(r.body)]
+
+    async def get_silence(self, id=None):
+        """
+        Return a list of alert silences.
+
+        Parameters
+        ----------
+        id : str
+             (Default value = None)
+             This is the ID of the silence we want returned.
+
+        Returns
+        -------
+        list
+            Return the response from Alert Manager as a list of Alert objects.
+
+        """
+        route = "/api/v2/silences"
+        if id:
+            route = "/api/v2/silence/"
+            route = urljoin(route, id)
+        r = await self._make_request("GET", route)
+        if self._check_response(r):
+            return [Alert(silence) for silence in codec.loads(r.body)]
+
+    async def get_silences(self, compact=False, **kwargs):
+        """
+        Get a list of all silences currently in Alert Manager.
+
+        Parameters
+        ----------
+        compact : bool
+            (Default value = False)
+            Return CompactSilence objects instead of Alert objects.
+        **kwargs : dict
+            Arbitrary keyword arguments. These kwargs can be used to specify
+            filters to limit the return of our list of alerts to silences that
+            match our filter.
+
+
+        Returns
+        -------
+        list
+            Return a list of silences from our Alert Manager instance.
+
+        """
+        route = "/api/v2/silences"
+        self._validate_get_silence_kwargs(**kwargs)
+        params = self._build_params(kwargs)
+        r = await self._make_request("GET", route, params=params)
+        if self._check_response(r):
+            if compact:
+                return [CompactSilence(silence)
+                        for silence in codec.loads(r.body)]
+            return [Alert(alert) for alert in codec.loads(r.body)]
+
+    async def post_silence(self, silence):
+        """
+        Create a silence.
+
+        Parameters
+        ----------
+        silence : dict or Silence
+            Our silence containing matchers and an endsAt time.
+
+
+        Returns
+        -------
+        Alert
+            Return the response from Alert Manager as an Alert object.
+
+        """
+        if isinstance(silence, (Silence, CompactSilence)):
+            silence = silence.validate_and_dump()
+        else:
+            silence = Silence.from_dict(silence)
+            silence = silence.validate_and_dump()
+        route = "/api/v2/silences"
+        r = await self._make_request("POST", route, data=codec.dumps(silence),
+                                     headers=codec.JSON_HEADERS)
+        if self._check_response(r):
+            return Alert.from_dict(codec.loads(r.body))
+
+    async def delete_silence(self, silence_id):
+        """
+        Delete a silence.
+
+        Parameters
+        ----------
+        silence_id : str
+            This is the ID of the silence returned by Alert Manager.
+
+
+        Returns
+        -------
+        Alert
+            Return the response from Alert Manager as an Alert object.
+
+        """
+        route = "/api/v2/silence/"
+        route = urljoin(route, silence_id)
+        r = await self._make_request("DELETE", route)
+        if self._check_response(r):
+            return Alert.from_dict({'status': [r.status]})
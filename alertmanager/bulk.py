@@ -0,0 +1,83 @@
+from collections import namedtuple
+from . import codec
+
+
+class BatchResult(namedtuple('BatchResult', ['index', 'size', 'status_code',
+                                             'error'])):
+    """
+    Outcome of posting one batch of alerts.
+
+    Attributes
+    ----------
+    index : int
+        Position of the batch in the stream, starting at 0.
+    size : int
+        Number of alerts in the batch.
+    status_code : int
+        HTTP status returned by Alert Manager, None if no response was
+        received.
+    error : Exception
+        The exception raised while posting the batch, None on success.
+
+    """
+
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        """Return True if the batch was accepted by Alert Manager."""
+        return self.error is None
+
+
+def iter_batches(items, batch_size=1000, max_bytes=None, encode=codec.dumps):
+    """
+    Group an iterable into ready to send JSON array bodies.
+
+    Items are pulled from the iterable one at a time and encoded exactly
+    once, so at most one batch is ever held in memory no matter how long the
+    iterable is.
+
+    Parameters
+    ----------
+    items : iterable
+        The objects to encode, typically dumped alert dicts.
+    batch_size : int
+        (Default value = 1000)
+        Maximum number of items per batch.
+    max_bytes : int
+        (Default value = None)
+        Maximum size in bytes of a batch body. A single item larger than
+        this is still sent, alone in its own batch.
+    encode : callable
+        (Default value = codec.dumps)
+        Turns one item into its JSON bytes.
+
+
+    Yields
+    ------
+    tuple
+        The number of items in the batch and the batch body as bytes.
+
+    """
+    if batch_size < 1:
+        raise ValueError('batch_size must be at least 1')
+    batch = list()
+    # Account for the enclosing brackets up front
+    size = 2
+    for item in items:
+        encoded = encode(item)
+        # Every item after the first costs an extra comma
+        extra = len(encoded) + (1 if batch else 0)
+        if batch and max_bytes and size + extra > max_bytes:
+            yield len(batch), b'[' + b','.join(batch) + b']'
+            batch = list()
+            size = 2
+            extra = len(encoded)
+        batch.append(encoded)
+        size += extra
+        if len(batch) >= batch_size:
+            yield len(batch), b'[' + b','.join(batch) + b']'
+            batch = list()
+            size = 2
+    if batch:
+        yield len(batch), b'[' + b','.join(batch) + b']'
@@ -0,0 +1,187 @@
+from collections import OrderedDict
+import threading
+import time
+from requests import Request
+
+
+class _Entry(object):
+    """A cached response and when it stops being fresh."""
+
+    __slots__ = ('route', 'response', 'expires')
+
+    def __init__(self, route, response, expires):
+        self.route = route
+        self.response = response
+        self.expires = expires
+
+
+class _Flight(object):
+    """A request in progress that identical requests can wait on."""
+
+    __slots__ = ('done', 'response', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class ResponseCache(object):
+    """
+    Opt-in TTL cache for GET responses.
+
+    Pass an instance to AlertManager(cache=...) and GET requests to routes
+    with a TTL are answered from memory while fresh. Concurrent identical
+    requests collapse into one HTTP call. Once an entry is stale, it is
+    revalidated with If-None-Match/If-Modified-Since when the server sent an
+    ETag or Last-Modified header, and a 304 keeps the cached body without
+    downloading or decoding it again. The least recently used entries are
+    evicted beyond maxsize.
+
+    Only 200 responses are cached. AlertManager invalidates the affected
+    routes itself after posting or deleting alerts and silences.
+
+    """
+
+    DEFAULT_TTLS = {
+        '/api/v2/status': 60,
+        '/api/v2/receivers': 300,
+    }
+
+    def __init__(self, ttls=None, default_ttl=0, maxsize=256):
+        """
+        Init method.
+
+        Parameters
+        ----------
+        ttls : dict
+            (Default value = None)
+            Route prefixes mapped to the seconds their responses stay
+            fresh. The longest matching prefix wins. Defaults to
+            DEFAULT_TTLS, which only covers the rarely changing
+            configuration routes.
+        default_ttl : float
+            (Default value = 0)
+            TTL of routes not matched by ttls. 0 disables caching for them.
+        maxsize : int
+            (Default value = 256)
+            Maximum number of cached responses.
+
+        """
+        ttls = self.DEFAULT_TTLS if ttls is None else ttls
+        self._ttls = sorted(ttls.items(), key=lambda item: -len(item[0]))
+        self.default_ttl = default_ttl
+        self.maxsize = maxsize
+        self.stats = {'hits': 0, 'misses': 0, 'revalidated': 0,
+                      'collapsed': 0}
+        self._entries = OrderedDict()
+        self._inflight = dict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def ttl(self, route):
+        """Return the TTL of a route, 0 meaning it isn't cached."""
+        for prefix, ttl in self._ttls:
+            if route.startswith(prefix):
+                return ttl
+        return self.default_ttl
+
+    def fetch(self, route, url, kwargs, send):
+        """
+        Answer a GET request from the cache, or send it.
+
+        Parameters
+        ----------
+        route : str
+            The API route, used to look up the TTL and for invalidation.
+        url : str
+            The full URL of the request.
+        kwargs : dict
+            The keyword arguments of the request.
+        send : callable
+            Sends the request. Called with a dict of extra headers, returns
+            a requests.Response.
+
+
+        Returns
+        -------
+        requests.Response
+            The cached or fresh response.
+
+        """
+        ttl = self.ttl(route)
+        if ttl <= 0:
+            return send({})
+        key = Request('GET', url, params=kwargs.get('params')).prepare().url
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry.response
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self.stats['misses'] += 1
+            else:
+                self.stats['collapsed'] += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.response
+        try:
+            flight.response = self._refresh(key, route, ttl, entry, send)
+            return flight.response
+        except Exception as err:
+            flight.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.done.set()
+
+    def _refresh(self, key, route, ttl, entry, send):
+        """Send, or revalidate, a request and store the response."""
+        headers = dict()
+        if entry is not None:
+            etag = entry.response.headers.get('ETag')
+            modified = entry.response.headers.get('Last-Modified')
+            if etag:
+                headers['If-None-Match'] = etag
+            if modified:
+                headers['If-Modified-Since'] = modified
+        response = send(headers)
+        if response.status_code == 304 and entry is not None:
+            with self._lock:
+                self.stats['revalidated'] += 1
+            response = entry.response
+        elif response.status_code != 200:
+            return response
+        with self._lock:
+            self._entries[key] = _Entry(route, response,
+                                        time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return response
+
+    def invalidate(self, prefix=''):
+        """
+        Drop cached responses.
+
+        Parameters
+        ----------
+        prefix : str
+            (Default value = '')
+            Only drop the responses of routes starting with this prefix.
+            Drops everything by default.
+
+        """
+        with self._lock:
+            for key in [k for k, e in self._entries.items()
+                        if e.route.startswith(prefix)]:
+                del self._entries[key]
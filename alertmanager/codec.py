@@ -0,0 +1,135 @@
+"""
+Pluggable JSON encoding and decoding.
+
+The fastest JSON library installed is picked at import time, in order of
+preference orjson, msgspec, ujson and finally the standard library json
+module. Every backend decodes bytes directly and encodes straight to bytes,
+so response bodies and request payloads never take a detour through str.
+
+The fast backends are optional, install one with:
+pip install pylertalertmanager[fast]
+"""
+import json
+
+JSON_HEADERS = {'Content-Type': 'application/json'}
+
+
+def _stdlib_backend():
+    def dumps(obj):
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+    return json.loads, dumps
+
+
+def _orjson_backend():
+    import orjson
+    return orjson.loads, orjson.dumps
+
+
+def _msgspec_backend():
+    import msgspec
+    return msgspec.json.decode, msgspec.json.encode
+
+
+def _ujson_backend():
+    import ujson
+
+    def dumps(obj):
+        return ujson.dumps(obj, ensure_ascii=False).encode('utf-8')
+    return ujson.loads, dumps
+
+
+_BACKENDS = {
+    'orjson': _orjson_backend,
+    'msgspec': _msgspec_backend,
+    'ujson': _ujson_backend,
+    'json': _stdlib_backend,
+}
+PREFERENCE = ('orjson', 'msgspec', 'ujson', 'json')
+
+_std_loads, _std_dumps = _stdlib_backend()
+_loads = _std_loads
+_dumps = _std_dumps
+backend = 'json'
+
+
+def set_backend(name):
+    """
+    Switch the JSON backend used by the whole package.
+
+    Parameters
+    ----------
+    name : str
+        One of 'orjson', 'msgspec', 'ujson' or 'json'.
+
+
+    Raises
+    ------
+    ImportError
+        Raise an ImportError if the backend's library isn't installed.
+
+    """
+    global _loads, _dumps, backend
+    if name not in _BACKENDS:
+        raise ValueError('Unknown JSON backend {}, expected one of {}'.format(
+            name, PREFERENCE))
+    _loads, _dumps = _BACKENDS[name]()
+    backend = name
+
+
+def _pick_backend():
+    """Select the most preferred backend that is installed."""
+    for name in PREFERENCE:
+        try:
+            set_backend(name)
+        except ImportError:
+            continue
+        return
+
+
+def loads(data):
+    """
+    Decode JSON from bytes or str.
+
+    Parameters
+    ----------
+    data : bytes or str
+        The JSON document.
+
+
+    Returns
+    -------
+    object
+        The decoded document.
+
+    """
+    return _loads(data)
+
+
+def dumps(obj):
+    """
+    Encode an object to compact JSON bytes.
+
+    Objects the fast backend refuses, such as integers over 64 bits, are
+    encoded by the standard library instead.
+
+    Parameters
+    ----------
+    obj : object
+        The document to encode.
+
+
+    Returns
+    -------
+    bytes
+        The UTF-8 encoded JSON document.
+
+    """
+    try:
+        return _dumps(obj)
+    except (TypeError, OverflowError):
+        if _dumps is _std_dumps:
+            raise
+        return _std_dumps(obj)
+
+
+_pick_backend()
@@ -0,0 +1,393 @@
+from array import array
+from .timeline import _records
+from .timeutils import parse_epoch_ns
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - optional dependency
+    numpy = None
+
+
+# Status enum, the position is the code stored in AlertColumns.state
+STATES = ('unknown', 'unprocessed', 'active', 'suppressed')
+
+# Missing timestamps, this is NaT once viewed as datetime64[ns]
+MISSING = -2 ** 63
+
+TIMESTAMPS = (('starts_at', 'startsAt'), ('ends_at', 'endsAt'),
+              ('updated_at', 'updatedAt'))
+
+_STATE_CODES = dict((state, code) for code, state in enumerate(STATES))
+
+
+def _wrap(values, dtype, use_numpy):
+    """Hand an array.array over as a NumPy array without copying it."""
+    if use_numpy:
+        return numpy.frombuffer(values, dtype=dtype)
+    return values
+
+
+class LabelColumn(object):
+    """
+    A dictionary encoded label.
+
+    codes holds one integer per alert indexing into categories, -1 where
+    the alert doesn't have the label. This is the layout of a pandas
+    Categorical and of an Arrow DictionaryArray.
+
+    """
+
+    def __init__(self, codes, categories):
+        """
+        Init method.
+
+        Parameters
+        ----------
+        codes : numpy.ndarray or array.array
+            The int32 category code of each alert.
+        categories : list
+            The distinct label values, in order of first appearance.
+
+        """
+        self.codes = codes
+        self.categories = categories
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __repr__(self):
+        return '<LabelColumn: {} alerts, {} values>'.format(
+            len(self.codes), len(self.categories))
+
+    def values(self):
+        """Return the decoded label values, None where unset."""
+        categories = self.categories
+        return [categories[code] if code >= 0 else None
+                for code in self.codes]
+
+    def counts(self):
+        """
+        Count the alerts per label value.
+
+        Returns
+        -------
+        dict
+            The number of alerts carrying each value, unset ones aren't
+            counted.
+
+        """
+        if numpy is not None and isinstance(self.codes, numpy.ndarray):
+            codes = self.codes[self.codes >= 0]
+            totals = numpy.bincount(codes, minlength=len(self.categories))
+            return dict(zip(self.categories, totals.tolist()))
+        totals = [0] * len(self.categories)
+        for code in self.codes:
+            if code >= 0:
+                totals[code] += 1
+        return dict(zip(self.categories, totals))
+
+
+class AlertColumns(object):
+    """
+    A snapshot of alerts laid out column by column.
+
+    Each column holds one entry per alert, in the order of the snapshot:
+
+    - labels: a LabelColumn per label name.
+    - starts_at, ends_at, updated_at: int64 nanoseconds since the epoch,
+      MISSING where unset.
+    - state: uint8 codes into STATES.
+    - silenced, inhibited: uint8, 1 if the alert is silenced or inhibited.
+    - fingerprint: a list of strings.
+    - group: int32 index into groups, only when built by from_groups.
+
+    Columns are NumPy arrays when NumPy is installed and array.array
+    otherwise, so group-bys and time arithmetic over a whole snapshot are
+    vectorized.
+
+    """
+
+    def __init__(self, size, labels, timestamps, state, silenced, inhibited,
+                 fingerprint, group=None, groups=None):
+        """
+        Init method, use to_columns or from_groups to build one.
+
+        Parameters
+        ----------
+        size : int
+            The number of alerts.
+        labels : dict
+            A LabelColumn per label name.
+        timestamps : dict
+            The starts_at, ends_at and updated_at columns.
+        state : numpy.ndarray or array.array
+            The status code of each alert.
+        silenced : numpy.ndarray or array.array
+            1 for the alerts silenced by at least one silence.
+        inhibited : numpy.ndarray or array.array
+            1 for the alerts inhibited by at least one alert.
+        fingerprint : list
+            The fingerprint of each alert.
+        group : numpy.ndarray or array.array
+            (Default value = None)
+            The index of each alert's group in groups.
+        groups : list
+            (Default value = None)
+            The label set and receiver of each group.
+
+        """
+        self.size = size
+        self.labels = labels
+        self.starts_at = timestamps['starts_at']
+        self.ends_at = timestamps['ends_at']
+        self.updated_at = timestamps['updated_at']
+        self.state = state
+        self.silenced = silenced
+        self.inhibited = inhibited
+        self.fingerprint = fingerprint
+        self.group = group
+        self.groups = groups
+
+    def __len__(self):
+        return self.size
+
+    def __repr__(self):
+        return '<AlertColumns: {} alerts, {} labels>'.format(
+            self.size, len(self.labels))
+
+    def columns(self):
+        """
+        Return every column by name.
+
+        Label columns are named after their label, the others after the
+        attribute holding them. Label names clashing with those are
+        prefixed with 'label_'.
+
+        Returns
+        -------
+        dict
+            The columns, LabelColumn objects for the labels.
+
+        """
+        columns = dict()
+        for name, _ in TIMESTAMPS:
+            columns[name] = getattr(self, name)
+        columns['state'] = self.state
+        columns['silenced'] = self.silenced
+        columns['inhibited'] = self.inhibited
+        columns['fingerprint'] = self.fingerprint
+        if self.group is not None:
+            columns['group'] = self.group
+        reserved = set(columns)
+        for name, column in self.labels.items():
+            key = 'label_' + name if name in reserved else name
+            columns[key] = column
+        return columns
+
+    def to_pandas(self):
+        """
+        Return the snapshot as a pandas DataFrame.
+
+        Labels become categoricals, timestamps tz-aware UTC datetimes and
+        the status a categorical of STATES.
+
+        Returns
+        -------
+        pandas.DataFrame
+            One row per alert.
+
+        """
+        try:
+            import pandas
+        except ImportError:
+            raise ImportError('AlertColumns.to_pandas requires pandas, '
+                              'install it with: pip install pandas')
+        frame = dict()
+        for name, column in self.columns().items():
+            if isinstance(column, LabelColumn):
+                column = pandas.Categorical.from_codes(
+                    numpy.asarray(column.codes), column.categories)
+            elif name in ('starts_at', 'ends_at', 'updated_at'):
+                column = pandas.to_datetime(
+                    numpy.asarray(column, dtype='int64').view('M8[ns]'),
+                    utc=True)
+            elif name == 'state':
+                column = pandas.Categorical.from_codes(
+                    numpy.asarray(column), STATES)
+            elif name in ('silenced', 'inhibited'):
+                column = numpy.asarray(column, dtype=bool)
+            frame[name] = column
+        return pandas.DataFrame(frame)
+
+    def to_arrow(self):
+        """
+        Return the snapshot as a pyarrow Table.
+
+        Labels become dictionary arrays, timestamps UTC timestamp arrays
+        and missing values nulls.
+
+        Returns
+        -------
+        pyarrow.Table
+            One row per alert.
+
+        """
+        try:
+            import pyarrow
+        except ImportError:
+            raise ImportError('AlertColumns.to_arrow requires pyarrow, '
+                              'install it with: pip install pyarrow')
+        arrays = dict()
+        for name, column in self.columns().items():
+            if isinstance(column, LabelColumn):
+                codes = numpy.asarray(column.codes)
+                column = pyarrow.DictionaryArray.from_arrays(
+                    pyarrow.array(codes, mask=codes < 0),
+                    pyarrow.array(column.categories, type=pyarrow.string()))
+            elif name in ('starts_at', 'ends_at', 'updated_at'):
+                values = numpy.asarray(column, dtype='int64')
+                column = pyarrow.array(
+                    values, type=pyarrow.timestamp('ns', tz='UTC'),
+                    mask=values == MISSING)
+            elif name == 'state':
+                column = pyarrow.DictionaryArray.from_arrays(
+                    pyarrow.array(numpy.asarray(column, dtype='int8')),
+                    pyarrow.array(STATES))
+            elif name in ('silenced', 'inhibited'):
+                column = pyarrow.array(numpy.asarray(column, dtype=bool))
+            else:
+                column = pyarrow.array(column)
+            arrays[name] = column
+        return pyarrow.table(arrays)
+
+
+def _build(records, group, groups, label_names, use_numpy):
+    if use_numpy is None:
+        use_numpy = numpy is not None
+    elif use_numpy and numpy is None:
+        raise ImportError('use_numpy=True requires numpy, install it with: '
+                          'pip install pylertalertmanager[analytics]')
+    size = len(records)
+    wanted = set(label_names) if label_names is not None else None
+    # name -> (value -> code, codes), codes start out all missing
+    encoders = dict()
+    if wanted is not None:
+        for name in label_names:
+            encoders[name] = (dict(), array('i', [-1]) * size)
+    timestamps = dict((name, array('q', [MISSING]) * size)
+                      for name, _ in TIMESTAMPS)
+    parsed = dict()
+    state = array('B', [0]) * size
+    silenced = array('B', [0]) * size
+    inhibited = array('B', [0]) * size
+    fingerprint = list()
+
+    for i, record in enumerate(records):
+        labels = record.get('labels') or {}
+        for name, value in labels.items():
+            if not isinstance(value, str):
+                # e.g. the empty Box reading a missing label leaves behind
+                continue
+            encoder = encoders.get(name)
+            if encoder is None:
+                if wanted is not None:
+                    continue
+                encoder = encoders[name] = (dict(), array('i', [-1]) * size)
+            categories, codes = encoder
+            code = categories.get(value)
+            if code is None:
+                code = categories[value] = len(categories)
+            codes[i] = code
+        for name, field in TIMESTAMPS:
+            raw = record.get(field)
+            if raw:
+                value = parsed.get(raw)
+                if value is None:
+                    value = parsed[raw] = parse_epoch_ns(raw)
+                timestamps[name][i] = value
+        status = record.get('status')
+        if status:
+            state[i] = _STATE_CODES.get(status.get('state'), 0)
+            silenced[i] = 1 if status.get('silencedBy') else 0
+            inhibited[i] = 1 if status.get('inhibitedBy') else 0
+        fingerprint.append(record.get('fingerprint'))
+
+    labels = dict()
+    for name, (categories, codes) in encoders.items():
+        labels[name] = LabelColumn(_wrap(codes, 'int32', use_numpy),
+                                   list(categories))
+    for name in timestamps:
+        timestamps[name] = _wrap(timestamps[name], 'int64', use_numpy)
+    if group is not None:
+        group = _wrap(group, 'int32', use_numpy)
+    return AlertColumns(size, labels, timestamps,
+                        _wrap(state, 'uint8', use_numpy),
+                        _wrap(silenced, 'uint8', use_numpy),
+                        _wrap(inhibited, 'uint8', use_numpy),
+                        fingerprint, group, groups)
+
+
+def to_columns(alerts, labels=None, use_numpy=None):
+    """
+    Lay a snapshot of alerts out column by column.
+
+    Parameters
+    ----------
+    alerts : iterable
+        Alerts as returned by get_alerts, as objects, compact objects,
+        plain dicts or a LazyAlertList, whose items aren't wrapped.
+    labels : iterable
+        (Default value = None)
+        The label names to encode, every label seen if None.
+    use_numpy : bool
+        (Default value = None)
+        Return NumPy arrays rather than array.array, by default whenever
+        NumPy is installed.
+
+
+    Returns
+    -------
+    AlertColumns
+        The columns of the snapshot.
+
+    """
+    return _build(_records(alerts), None, None, labels, use_numpy)
+
+
+def from_groups(groups, labels=None, use_numpy=None):
+    """
+    Lay the alerts of get_alert_groups out column by column.
+
+    Alerts belonging to several groups appear once per group.
+
+    Parameters
+    ----------
+    groups : iterable
+        Alert groups as returned by get_alert_groups.
+    labels : iterable
+        (Default value = None)
+        The label names to encode, every label seen if None.
+    use_numpy : bool
+        (Default value = None)
+        Return NumPy arrays rather than array.array, by default whenever
+        NumPy is installed.
+
+
+    Returns
+    -------
+    AlertColumns
+        The columns of every group's alerts, with a group column indexing
+        into its groups list of {'labels': ..., 'receiver': ...} dicts.
+
+    """
+    records = list()
+    index = array('i')
+    summary = list()
+    for number, group in enumerate(groups):
+        alerts = group.get('alerts') or []
+        records.extend(alerts)
+        index.extend([number] * len(alerts))
+        receiver = group.get('receiver') or {}
+        summary.append({'labels': dict(group.get('labels') or {}),
+                        'receiver': receiver.get('name')})
+    return _build(records, index, summary, labels, use_numpy)
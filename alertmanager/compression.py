@@ -0,0 +1,41 @@
+import gzip
+
+
+DEFAULT_THRESHOLD = 8192
+LEVEL = 5
+
+
+def compress_body(data, headers, threshold=DEFAULT_THRESHOLD, level=LEVEL):
+    """
+    Gzip a request body if it is big enough to be worth it.
+
+    Alert Manager payloads repeat the same label names and values over and
+    over, so they typically shrink by an order of magnitude. Small bodies
+    are sent as they are, compressing them costs more than it saves.
+
+    Parameters
+    ----------
+    data : bytes
+        The encoded request body.
+    headers : dict
+        The request headers, not modified.
+    threshold : int
+        (Default value = 8192)
+        Size in bytes from which the body is compressed.
+    level : int
+        (Default value = 5)
+        The gzip compression level, from 1 (fastest) to 9 (smallest).
+
+
+    Returns
+    -------
+    tuple
+        The body and headers to send, with a Content-Encoding header added
+        when the body was compressed.
+
+    """
+    if not isinstance(data, (bytes, bytearray)) or len(data) < threshold:
+        return data, headers
+    headers = dict(headers or {})
+    headers['Content-Encoding'] = 'gzip'
+    return gzip.compress(data, compresslevel=level, mtime=0), headers
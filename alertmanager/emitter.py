@@ -0,0 +1,254 @@
+from collections import deque, OrderedDict
+import logging
+import threading
+import time
+from .bulk import iter_batches
+
+
+log = logging.getLogger(__name__)
+
+BLOCK = 'block'
+DROP_OLDEST = 'drop_oldest'
+DROP_NEWEST = 'drop_newest'
+POLICIES = (BLOCK, DROP_OLDEST, DROP_NEWEST)
+
+
+class QueueFull(Exception):
+    """Raised when a blocking emit times out waiting for queue space."""
+
+
+def coalesce(alerts):
+    """
+    Merge alerts sharing an identical label set.
+
+    Alert Manager deduplicates alerts by label set anyway, so only the most
+    recent version of each one is worth sending. Later alerts win key by key,
+    which keeps the latest endsAt and annotations while preserving fields
+    only an earlier version carried.
+
+    Parameters
+    ----------
+    alerts : iterable
+        Dumped alert dicts, oldest first.
+
+
+    Returns
+    -------
+    list
+        One alert dict per distinct label set, in first seen order.
+
+    """
+    merged = OrderedDict()
+    for alert in alerts:
+        key = frozenset(alert['labels'].items())
+        if key in merged:
+            merged[key].update(alert)
+        else:
+            merged[key] = dict(alert)
+    return list(merged.values())
+
+
+class AlertEmitter(object):
+    """
+    Post alerts from a background thread.
+
+    emit() validates an alert and puts it on a bounded in-memory queue, then
+    returns straight away. A worker thread flushes the queue whenever it
+    holds batch_size alerts or flush_interval seconds have passed, merging
+    repeated alerts with identical labels into one before posting them.
+
+    When the queue is full the policy decides what happens:
+    'block' waits for space, 'drop_oldest' evicts the oldest queued alert and
+    'drop_newest' discards the alert being emitted.
+
+    """
+
+    def __init__(self, manager, max_queue=10000, batch_size=500,
+                 flush_interval=1.0, policy=BLOCK, block_timeout=None):
+        """
+        Init method.
+
+        Parameters
+        ----------
+        manager : AlertManager
+            The instance alerts are posted to.
+        max_queue : int
+            (Default value = 10000)
+            Maximum number of alerts waiting to be flushed.
+        batch_size : int
+            (Default value = 500)
+            Number of queued alerts that triggers a flush, also the maximum
+            number of alerts per request.
+        flush_interval : float
+            (Default value = 1.0)
+            Maximum number of seconds an alert waits in the queue.
+        policy : str
+            (Default value = 'block')
+            What to do when the queue is full, one of 'block', 'drop_oldest'
+            or 'drop_newest'.
+        block_timeout : float
+            (Default value = None)
+            With the 'block' policy, how long emit waits for space before
+            raising QueueFull. None waits forever.
+
+        """
+        if policy not in POLICIES:
+            raise ValueError('policy must be one of {}'.format(POLICIES))
+        self.manager = manager
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.stats = {'emitted': 0, 'dropped': 0, 'coalesced': 0,
+                      'posted': 0, 'failed': 0}
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._flushing = False
+        self._flush_requested = False
+        self._worker = threading.Thread(target=self._run,
+                                        name='alertmanager-emitter',
+                                        daemon=True)
+        self._worker.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._queue)
+
+    def emit(self, alert):
+        """
+        Queue an alert to be posted.
+
+        Parameters
+        ----------
+        alert : Alert or dict
+            The alert to post.
+
+
+        Returns
+        -------
+        boolean
+            Return True if the alert was queued, False if the 'drop_newest'
+            policy discarded it.
+
+
+        Raises
+        ------
+        ValueError
+            Raise a ValueError if the alert doesn't validate.
+        QueueFull
+            Raise QueueFull if the 'block' policy timed out.
+
+        """
+        dumped = self.manager._dump_alert(alert)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError('emit() called on a closed AlertEmitter')
+            if len(self._queue) >= self.max_queue:
+                if self.policy == DROP_NEWEST:
+                    self.stats['dropped'] += 1
+                    return False
+                elif self.policy == DROP_OLDEST:
+                    self._queue.popleft()
+                    self.stats['dropped'] += 1
+                elif not self._cond.wait_for(
+                        lambda: len(self._queue) < self.max_queue
+                        or self._closed, timeout=self.block_timeout):
+                    raise QueueFull('alert queue is full')
+                elif self._closed:
+                    raise RuntimeError('AlertEmitter closed while blocked')
+            self._queue.append(dumped)
+            self.stats['emitted'] += 1
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify_all()
+        return True
+
+    def flush(self, timeout=None):
+        """
+        Post everything queued so far and wait for it to be sent.
+
+        Parameters
+        ----------
+        timeout : float
+            (Default value = None)
+            Maximum number of seconds to wait.
+
+
+        Returns
+        -------
+        boolean
+            Return True if the queue was drained within the timeout.
+
+        """
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(
+                lambda: not self._queue and not self._flushing,
+                timeout=timeout)
+
+    def close(self, timeout=None):
+        """
+        Stop accepting alerts, flush the queue and stop the worker.
+
+        Parameters
+        ----------
+        timeout : float
+            (Default value = None)
+            Maximum number of seconds to wait for the final flush.
+
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join(timeout)
+
+    def _run(self):
+        """Worker loop, flushes on size, time, request or shutdown."""
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._closed or self._flush_requested
+                    or len(self._queue) >= self.batch_size,
+                    timeout=max(deadline - time.monotonic(), 0))
+                window = list(self._queue)
+                self._queue.clear()
+                self._flush_requested = False
+                self._flushing = bool(window)
+                closed = self._closed
+                # Wake up emitters blocked on a full queue
+                self._cond.notify_all()
+            if window:
+                try:
+                    self._send(window)
+                except Exception:
+                    # Never let a bad flush kill the worker
+                    self.stats['failed'] += len(window)
+                    log.exception('Failed to flush %s alerts', len(window))
+                with self._cond:
+                    self._flushing = False
+                    self._cond.notify_all()
+            if closed:
+                return
+            deadline = time.monotonic() + self.flush_interval
+
+    def _send(self, window):
+        """Coalesce one flush window and post it in batches."""
+        alerts = coalesce(window)
+        self.stats['coalesced'] += len(window) - len(alerts)
+        for index, (size, body) in enumerate(
+                iter_batches(alerts, batch_size=self.batch_size)):
+            result = self.manager._post_batch(index, size, body)
+            if result.ok:
+                self.stats['posted'] += size
+            else:
+                self.stats['failed'] += size
+                log.error('Failed to post %s alerts: %s', size, result.error)
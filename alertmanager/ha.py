@@ -0,0 +1,371 @@
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from .alertmanager import AlertManager
+
+
+log = logging.getLogger(__name__)
+
+ONE = 'one'
+ALL = 'all'
+
+
+def replica_fault(error):
+    """
+    Return True if an error says more about the replica than the request.
+
+    Connection errors, timeouts and 5xx responses are worth failing over
+    on. A 4xx response would be the same on every replica.
+
+    """
+    if isinstance(error, requests.HTTPError):
+        response = error.response
+        return response is None or response.status_code >= 500
+    return isinstance(error, requests.RequestException)
+
+
+class Replica(object):
+    """The health and observed latency of one replica."""
+
+    __slots__ = ('manager', 'host', 'latency', 'failures', 'down_until')
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.host = '{}:{}'.format(manager.hostname, manager.port)
+        self.latency = None
+        self.failures = 0
+        self.down_until = 0
+
+    def __repr__(self):
+        return '<Replica: {} latency={} failures={}>'.format(
+            self.host, self.latency, self.failures)
+
+
+class HAAlertManager(object):
+    """
+    Talk to a clustered Alert Manager through any of its replicas.
+
+    Reads go to the healthy replica with the lowest exponentially weighted
+    moving average latency, so one slow node stops setting the tail latency
+    of every call. When a replica fails with a connection error, timeout or
+    5xx response it is taken out of rotation for a cooldown and the call
+    fails over to the next replica.
+
+    Alerts are posted to a single replica with failover (post_policy='one')
+    or, like Prometheus does, to every replica (post_policy='all'). Silences
+    are always created on a single replica since the cluster gossips them,
+    and only fail over when the replica couldn't be reached.
+
+    """
+
+    def __init__(self, replicas, post_policy=ONE, alpha=0.3, cooldown=30.0,
+                 explore=0.05, max_workers=None):
+        """
+        Init method.
+
+        Parameters
+        ----------
+        replicas : list
+            AlertManager instances, or host strings which are turned into
+            AlertManager instances on the default port.
+        post_policy : str
+            (Default value = 'one')
+            'one' posts alerts to the best replica, failing over on errors.
+            'all' posts them to every replica and succeeds if any accepts
+            them.
+        alpha : float
+            (Default value = 0.3)
+            Weight of the latest latency sample in the moving average.
+        cooldown : float
+            (Default value = 30.0)
+            Seconds a failed replica is skipped for.
+        explore : float
+            (Default value = 0.05)
+            Share of reads sent to a random healthy replica so the latency
+            of the others stays up to date.
+        max_workers : int
+            (Default value = None)
+            Size of the thread pool posting to every replica, defaults to
+            one thread per replica.
+
+
+        Raises
+        ------
+        ValueError
+            Raise a ValueError without replicas or for an unknown
+            post_policy.
+
+        """
+        if post_policy not in (ONE, ALL):
+            raise ValueError('Unknown post policy {}'.format(post_policy))
+        self.replicas = [Replica(m if isinstance(m, AlertManager)
+                                 else AlertManager(m)) for m in replicas]
+        if not self.replicas:
+            raise ValueError('HAAlertManager needs at least one replica')
+        self.post_policy = post_policy
+        self.alpha = alpha
+        self.cooldown = cooldown
+        self.explore = explore
+        self._max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def executor(self):
+        """Return the thread pool, creating it on first use."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_workers or len(self.replicas),
+                thread_name_prefix='alertmanager-ha')
+        return self._executor
+
+    def close(self):
+        """Shut down the thread pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def ranked(self):
+        """
+        Return the replicas in the order requests should try them.
+
+        Healthy replicas come first, fastest first, and replicas never
+        measured before them so they get measured. Replicas cooling down
+        after a failure come last, soonest back first, so a call is still
+        attempted when every replica recently failed.
+
+        """
+        now = time.monotonic()
+        with self._lock:
+            healthy = [r for r in self.replicas if r.down_until <= now]
+            down = [r for r in self.replicas if r.down_until > now]
+        healthy.sort(key=lambda r: -1 if r.latency is None else r.latency)
+        down.sort(key=lambda r: r.down_until)
+        if len(healthy) > 1 and random.random() < self.explore:
+            healthy.insert(0, healthy.pop(random.randrange(1, len(healthy))))
+        return healthy + down
+
+    def _record(self, replica, started, error=None):
+        """Update a replica's latency average and health."""
+        elapsed = time.monotonic() - started
+        with self._lock:
+            if error is None:
+                replica.failures = 0
+                replica.down_until = 0
+                if replica.latency is None:
+                    replica.latency = elapsed
+                else:
+                    replica.latency += self.alpha * (elapsed - replica.latency)
+            else:
+                replica.failures += 1
+                replica.down_until = time.monotonic() + self.cooldown
+                log.warning('Replica %s failed, skipping it for %ss: %s',
+                            replica.host, self.cooldown, error)
+
+    def _call(self, replica, method, *args, **kwargs):
+        """Call a method on a replica, recording the outcome."""
+        started = time.monotonic()
+        try:
+            result = getattr(replica.manager, method)(*args, **kwargs)
+        except Exception as err:
+            if replica_fault(err):
+                self._record(replica, started, err)
+            raise
+        self._record(replica, started)
+        return result
+
+    def _failover(self, method, *args, **kwargs):
+        """
+        Call a method on the best replica, failing over on replica faults.
+
+        The fail_over keyword argument, defaulting to replica_fault, decides
+        which errors move on to the next replica.
+
+        """
+        fail_over = kwargs.pop('fail_over', replica_fault)
+        error = None
+        for replica in self.ranked():
+            try:
+                return self._call(replica, method, *args, **kwargs)
+            except Exception as err:
+                if not fail_over(err):
+                    raise
+                error = err
+        raise error
+
+    def _everywhere(self, method, *args, **kwargs):
+        """Call a method on every replica, return each outcome."""
+        futures = [self.executor.submit(self._call, replica, method, *args,
+                                        **kwargs)
+                   for replica in self.replicas]
+        outcomes = list()
+        for future in futures:
+            try:
+                outcomes.append((future.result(), None))
+            except Exception as err:
+                outcomes.append((None, err))
+        return outcomes
+
+    def get_alerts(self, **kwargs):
+        """Get alerts from the best replica, see AlertManager.get_alerts."""
+        return self._failover('get_alerts', **kwargs)
+
+    def get_silences(self, **kwargs):
+        """Get silences from the best replica, see AlertManager.get_silences."""
+        return self._failover('get_silences', **kwargs)
+
+    def get_silence(self, id=None):
+        """Get a silence from the best replica, see AlertManager.get_silence."""
+        return self._failover('get_silence', id)
+
+    def get_status(self):
+        """Get the status of the best replica."""
+        return self._failover('get_status')
+
+    def get_receivers(self):
+        """Get the receivers from the best replica."""
+        return self._failover('get_receivers')
+
+    def get_alert_groups(self):
+        """Get the alert groups from the best replica."""
+        return self._failover('get_alert_groups')
+
+    def post_alerts(self, *alert):
+        """
+        Post alerts according to the post policy.
+
+        Returns
+        -------
+        Alert
+            The response of the first replica that accepted the alerts.
+
+
+        Raises
+        ------
+        requests.RequestException
+            The last error if no replica accepted the alerts.
+
+        """
+        if self.post_policy == ONE:
+            return self._failover('post_alerts', *alert)
+        error = None
+        accepted = None
+        for result, err in self._everywhere('post_alerts', *alert):
+            if err is None:
+                accepted = accepted or result
+            else:
+                error = err
+        if accepted is None:
+            raise error
+        return accepted
+
+    post_alerts_bulk = AlertManager.post_alerts_bulk
+    _dump_alert = staticmethod(AlertManager._dump_alert)
+
+    def _post_batch(self, index, size, body):
+        """
+        Post one pre-encoded batch of alerts according to the post policy.
+
+        This lets post_alerts_bulk and AlertEmitter drive an
+        HAAlertManager. Under the 'all' policy a batch succeeds when any
+        replica accepts it.
+
+        """
+        if self.post_policy == ONE:
+            replicas = self.ranked()
+        else:
+            futures = [self.executor.submit(self._post_replica, replica,
+                                            index, size, body)
+                       for replica in self.replicas]
+            results = [future.result() for future in futures]
+            return next((r for r in results if r.ok), results[-1])
+        for replica in replicas:
+            result = self._post_replica(replica, index, size, body)
+            if result.ok or not replica_fault(result.error):
+                break
+        return result
+
+    def _post_replica(self, replica, index, size, body):
+        """Post a batch to one replica, recording the outcome."""
+        started = time.monotonic()
+        result = replica.manager._post_batch(index, size, body)
+        if result.ok:
+            self._record(replica, started)
+        elif replica_fault(result.error):
+            self._record(replica, started, result.error)
+        return result
+
+    def post_silence(self, silence):
+        """
+        Create a silence on one replica.
+
+        Only fails over to the next replica when the silence surely wasn't
+        created, that is when the replica couldn't be reached.
+
+        """
+        return self._failover(
+            'post_silence', silence,
+            fail_over=lambda err: isinstance(err, requests.ConnectionError))
+
+    def delete_silence(self, silence_id):
+        """Delete a silence through the best replica."""
+        return self._failover('delete_silence', silence_id)
+
+    def discover(self, api_port=None, **kwargs):
+        """
+        Add the cluster peers reported by get_status as replicas.
+
+        Peers are reported with their cluster (gossip) address, so their
+        API is assumed to listen on the same scheme and port as the
+        replica that answered.
+
+        Parameters
+        ----------
+        api_port : int
+            (Default value = None)
+            The API port of the peers, defaults to the answering replica's.
+        **kwargs : dict
+            Arguments used to create the new AlertManager instances, e.g.
+            timeout or req_obj.
+
+
+        Returns
+        -------
+        list
+            The hosts of the replicas added.
+
+        """
+        replica = self.ranked()[0]
+        status = self._call(replica, 'get_status')
+        seed = replica.manager
+        scheme = urlsplit(seed.hostname).scheme or 'http'
+        port = api_port or seed.port
+        known = set(r.host for r in self.replicas)
+        added = list()
+        cluster = status.get('cluster') or {}
+        for peer in cluster.get('peers') or []:
+            address = peer.get('address')
+            if not address or peer.get('name') == cluster.get('name'):
+                continue
+            host = address.rsplit(':', 1)[0].strip('[]')
+            if ':' in host:
+                host = '[{}]'.format(host)
+            manager = AlertManager('{}://{}'.format(scheme, host), port,
+                                   **kwargs)
+            new = Replica(manager)
+            if new.host not in known:
+                known.add(new.host)
+                added.append(new.host)
+                with self._lock:
+                    self.replicas.append(new)
+        return added
@@ -0,0 +1,209 @@
+from .alert_objects import alert_key
+from .matchers import compile_matchers
+
+
+class AlertIndex(object):
+    """
+    Inverted label index over a set of alerts.
+
+    Every label name/value pair maps to the set of alerts carrying it, so a
+    query only touches the alerts that can match instead of scanning the
+    whole snapshot. Matchers are resolved per distinct label value rather
+    than per alert, and a conjunction of matchers is answered by
+    intersecting posting sets, smallest first.
+
+    Alerts are keyed like MultiAlertManager deduplicates them, by
+    fingerprint or, failing that, by label set. Adding an alert with a key
+    already in the index replaces the old version.
+
+    """
+
+    def __init__(self, alerts=()):
+        """
+        Init method.
+
+        Parameters
+        ----------
+        alerts : iterable
+            (Default value = ())
+            Alert, CompactAlert or plain alert dicts to index.
+
+        """
+        self._alerts = dict()
+        self._labels = dict()
+        self._postings = dict()
+        for alert in alerts:
+            self.add(alert)
+
+    def __len__(self):
+        return len(self._alerts)
+
+    def __iter__(self):
+        return iter(self._alerts.values())
+
+    def __contains__(self, alert):
+        return self._key(alert) in self._alerts
+
+    @staticmethod
+    def _key(alert):
+        """Accept either an alert or an alert key."""
+        if isinstance(alert, (str, frozenset)):
+            return alert
+        return alert_key(alert)
+
+    def get(self, key, default=None):
+        """Return the alert stored under a fingerprint/key."""
+        return self._alerts.get(key, default)
+
+    def add(self, alert):
+        """
+        Index an alert, replacing any previous version of it.
+
+        Parameters
+        ----------
+        alert : Alert, CompactAlert or dict
+            The alert to index.
+
+        """
+        key = alert_key(alert)
+        if key in self._alerts:
+            self.remove(key)
+        # Values that aren't strings, such as the empty Box left behind by
+        # reading a missing label off a Box alert, count as unset
+        labels = dict((name, value) for name, value
+                      in (alert.get('labels') or {}).items()
+                      if isinstance(value, str))
+        self._alerts[key] = alert
+        self._labels[key] = labels
+        for name, value in labels.items():
+            self._postings.setdefault(name, {}).setdefault(value, set()).add(
+                key)
+
+    def remove(self, alert):
+        """
+        Drop an alert from the index.
+
+        Parameters
+        ----------
+        alert : Alert, CompactAlert, dict or key
+            The alert, or its key, to drop.
+
+
+        Raises
+        ------
+        KeyError
+            Raise a KeyError if the alert isn't indexed.
+
+        """
+        key = self._key(alert)
+        del self._alerts[key]
+        for name, value in self._labels.pop(key).items():
+            values = self._postings[name]
+            keys = values[value]
+            keys.discard(key)
+            if not keys:
+                del values[value]
+                if not values:
+                    del self._postings[name]
+
+    def label_values(self, name):
+        """Return the distinct values a label takes across the index."""
+        return set(self._postings.get(name, ()))
+
+    def _union(self, values, predicate):
+        """Union the posting sets of the values accepted by predicate."""
+        keys = set()
+        for value, posting in values.items():
+            if predicate(value):
+                keys |= posting
+        return keys
+
+    def _resolve(self, matcher):
+        """
+        Return the posting set a matcher selects and how to apply it.
+
+        Returns
+        -------
+        tuple
+            True and the keys the matcher accepts, or False and the keys
+            it rejects.
+
+        """
+        values = self._postings.get(matcher.name, {})
+        accepts = matcher.matches_value
+        if accepts(''):
+            # Matches alerts without the label too, so it is cheaper to work
+            # out which alerts it rejects.
+            return False, self._union(values, lambda v: not accepts(v))
+        elif matcher.op == '=':
+            return True, values.get(matcher.value, set())
+        return True, self._union(values, accepts)
+
+    def query_keys(self, spec, cache=None):
+        """
+        Return the keys of the alerts satisfying every matcher.
+
+        Parameters
+        ----------
+        spec : str, dict or iterable
+            Matchers in any form accepted by compile_matchers.
+        cache : dict
+            (Default value = None)
+            Memo of resolved matchers. Pass the same dict to many queries
+            sharing matchers to resolve each matcher only once. It must be
+            discarded when the index changes.
+
+
+        Returns
+        -------
+        set
+            The matching alert keys.
+
+        """
+        included = list()
+        excluded = list()
+        for matcher in compile_matchers(spec):
+            if cache is None:
+                positive, posting = self._resolve(matcher)
+            else:
+                try:
+                    positive, posting = cache[matcher]
+                except KeyError:
+                    positive, posting = self._resolve(matcher)
+                    cache[matcher] = positive, posting
+            (included if positive else excluded).append(posting)
+        if included:
+            included.sort(key=len)
+            keys = set(included[0])
+            for posting in included[1:]:
+                if not keys:
+                    break
+                keys &= posting
+        else:
+            keys = set(self._alerts)
+        for posting in excluded:
+            keys -= posting
+        return keys
+
+    def query(self, spec):
+        """
+        Return the alerts satisfying every matcher.
+
+        Parameters
+        ----------
+        spec : str, dict or iterable
+            Matchers in any form accepted by compile_matchers, e.g.
+            'severity="critical",team!~"db|storage"'.
+
+
+        Returns
+        -------
+        list
+            The matching alerts, in no particular order.
+
+        """
+        return [self._alerts[key] for key in self.query_keys(spec)]
+
+    def count(self, spec):
+        """Return the number of alerts satisfying every matcher."""
+        return len(self.query_keys(spec))
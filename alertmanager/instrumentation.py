@@ -0,0 +1,500 @@
+import functools
+import inspect
+import logging
+import re
+import threading
+import time
+from .bulk import BatchResult
+from .lazy import LazyAlertList
+
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+
+_local = threading.local()
+_SILENCE_ID = re.compile(r'^/api/v2/silence/.+$')
+
+
+class Call(object):
+    """
+    What happened during one AlertManager API call.
+
+    Hooks receive the same Call before and after the call. Before, only
+    name and host are set. After, the request details are filled in.
+
+    Attributes
+    ----------
+    name : str
+        The AlertManager method, e.g. 'get_alerts'.
+    host : str
+        The Alert Manager instance, host:port.
+    method : str
+        The HTTP verb of the request.
+    route : str
+        The API route requested.
+    status : int
+        The HTTP status code, None if no response was received.
+    duration : float
+        Seconds the whole call took. For the iter_* methods this runs until
+        the generator is exhausted or closed, including the time the caller
+        spent between items.
+    phases : dict
+        Seconds spent in each phase: 'http' until the response headers
+        arrived, 'transfer' reading the body, 'decode' parsing JSON and
+        'build' turning it into objects.
+    request_bytes : int
+        Size of the request body.
+    response_bytes : int
+        Size of the response body.
+    items : int
+        Number of items returned, for calls returning a list, or yielded.
+    error : Exception
+        The exception the call raised, if any.
+    attributes : dict
+        Free for hooks to keep state across before and after.
+
+    """
+
+    __slots__ = ('name', 'host', 'method', 'route', 'status', 'started',
+                 'duration', 'phases', 'request_bytes', 'response_bytes',
+                 'items', 'error', 'attributes')
+
+    def __init__(self, name, host):
+        self.name = name
+        self.host = host
+        self.method = None
+        self.route = None
+        self.status = None
+        self.started = time.perf_counter()
+        self.duration = None
+        self.phases = dict()
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.items = None
+        self.error = None
+        self.attributes = dict()
+
+    def add_phase(self, phase, seconds):
+        """Add time to a phase."""
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def __repr__(self):
+        return '<Call: {} {} {} {:.3f}s>'.format(
+            self.name, self.route, self.status, self.duration or 0)
+
+
+def current_call():
+    """Return the Call in progress on this thread, if any."""
+    return getattr(_local, 'call', None)
+
+
+def normalize_route(route):
+    """Replace the ids in a route so it can be used as a metric label."""
+    if _SILENCE_ID.match(route):
+        return '/api/v2/silence/{id}'
+    return route
+
+
+def _count_items(result, call):
+    # No duck typing, getattr on a default_box result would add the key
+    if isinstance(result, BatchResult):
+        return result.size
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    if isinstance(result, LazyAlertList):
+        # Counting decodes the body, time it as such
+        started = time.perf_counter()
+        size = len(result)
+        call.add_phase('decode', time.perf_counter() - started)
+        return size
+    return None
+
+
+def _run_hooks(hooks, stage, call):
+    for hook in hooks:
+        try:
+            getattr(hook, stage)(call)
+        except Exception:
+            log.exception('%s hook failed for %s', stage, call.name)
+
+
+def _finish(hooks, call, busy=None):
+    """Time a finished call and hand it to the after hooks."""
+    call.duration = time.perf_counter() - call.started
+    if busy is None:
+        busy = call.duration
+    known = sum(call.phases.values())
+    if call.status is not None and busy > known:
+        call.add_phase('build', busy - known)
+    _run_hooks(hooks, 'after', call)
+
+
+def instrumented(func):
+    """
+    Report the calls of an AlertManager method to the instance's hooks.
+
+    Costs one attribute check when the instance has no hooks. Generator
+    methods are reported once the generator is exhausted or closed.
+
+    """
+    name = func.__name__.lstrip('_')
+    if inspect.isgeneratorfunction(func):
+        return _instrument_generator(func, name)
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        hooks = self.hooks
+        if not hooks:
+            return func(self, *args, **kwargs)
+        call = Call(name, '{}:{}'.format(self.hostname, self.port))
+        parent = current_call()
+        _local.call = call
+        _run_hooks(hooks, 'before', call)
+        try:
+            result = func(self, *args, **kwargs)
+            call.items = _count_items(result, call)
+            if isinstance(result, BatchResult) and result.error is not None:
+                call.error = result.error
+            return result
+        except Exception as err:
+            call.error = err
+            raise
+        finally:
+            _local.call = parent
+            _finish(hooks, call)
+    return wrapper
+
+
+def _instrument_generator(func, name):
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        hooks = self.hooks
+        if not hooks:
+            return func(self, *args, **kwargs)
+        return _traced(func(self, *args, **kwargs), hooks,
+                       Call(name, '{}:{}'.format(self.hostname, self.port)))
+    return wrapper
+
+
+def _traced(items, hooks, call):
+    """
+    Yield from a generator, making call current while it runs.
+
+    Only the time spent inside the generator counts towards the phases,
+    not the time the caller takes between items.
+
+    """
+    _run_hooks(hooks, 'before', call)
+    busy = 0.0
+    count = 0
+    try:
+        while True:
+            parent = current_call()
+            _local.call = call
+            started = time.perf_counter()
+            try:
+                item = next(items)
+            except StopIteration:
+                break
+            finally:
+                busy += time.perf_counter() - started
+                _local.call = parent
+            count += 1
+            yield item
+    except Exception as err:
+        call.error = err
+        raise
+    finally:
+        parent = current_call()
+        _local.call = call
+        try:
+            items.close()
+        finally:
+            _local.call = parent
+        call.items = count
+        _finish(hooks, call, busy)
+
+
+class Hook(object):
+    """
+    Base class of request hooks.
+
+    Pass hooks to AlertManager(hooks=[...]). Both methods are called on the
+    thread making the call, so they should be quick. An exception raised by
+    a hook is logged and otherwise ignored.
+
+    """
+
+    def before(self, call):
+        """Called with a Call before the request is made."""
+
+    def after(self, call):
+        """Called with the completed Call, whether it failed or not."""
+
+
+class _Histogram(object):
+
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace(
+        '\n', '\\n')
+
+
+def _labels(**labels):
+    return ','.join('{}="{}"'.format(name, _escape(value))
+                    for name, value in labels.items())
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsCollector(Hook):
+    """
+    Hook keeping latency histograms and counters of every call.
+
+    Metrics are labelled by call and route. They can be read with
+    snapshot(), rendered in the Prometheus text format with render(), or
+    served for scraping with start_http_server().
+
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, prefix='alertmanager_client'):
+        """
+        Init method.
+
+        Parameters
+        ----------
+        buckets : tuple
+            (Default value = DEFAULT_BUCKETS)
+            Upper bounds in seconds of the latency histogram buckets.
+        prefix : str
+            (Default value = 'alertmanager_client')
+            Prefix of the metric names.
+
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._latency = dict()
+        self._requests = dict()
+        self._errors = dict()
+        self._request_bytes = dict()
+        self._response_bytes = dict()
+        self._items = dict()
+        self._phases = dict()
+
+    @staticmethod
+    def _add(counter, key, value):
+        counter[key] = counter.get(key, 0) + value
+
+    def after(self, call):
+        route = normalize_route(call.route or '')
+        key = (call.name, route)
+        with self._lock:
+            histogram = self._latency.get(key)
+            if histogram is None:
+                histogram = self._latency[key] = _Histogram(self.buckets)
+            for position, bound in enumerate(self.buckets):
+                if call.duration <= bound:
+                    histogram.counts[position] += 1
+            histogram.sum += call.duration
+            histogram.count += 1
+            status = str(call.status) if call.status is not None else 'none'
+            self._add(self._requests, key + (status,), 1)
+            if call.error is not None:
+                self._add(self._errors, key + (type(call.error).__name__,), 1)
+            self._add(self._request_bytes, key, call.request_bytes)
+            self._add(self._response_bytes, key, call.response_bytes)
+            if call.items is not None:
+                self._add(self._items, key, call.items)
+            for phase, seconds in call.phases.items():
+                self._add(self._phases, key + (phase,), seconds)
+
+    def snapshot(self):
+        """
+        Return the metrics as plain data.
+
+        Returns
+        -------
+        dict
+            For every (call, route): 'count', 'sum' (seconds), 'buckets'
+            (cumulative counts per upper bound), 'statuses', 'errors',
+            'request_bytes', 'response_bytes', 'items' and 'phases'.
+
+        """
+        with self._lock:
+            result = dict()
+            for key, histogram in self._latency.items():
+                result[key] = {
+                    'count': histogram.count,
+                    'sum': histogram.sum,
+                    'buckets': dict(zip(self.buckets, histogram.counts)),
+                    'statuses': dict((k[2], v) for k, v in
+                                     self._requests.items() if k[:2] == key),
+                    'errors': dict((k[2], v) for k, v in
+                                   self._errors.items() if k[:2] == key),
+                    'request_bytes': self._request_bytes.get(key, 0),
+                    'response_bytes': self._response_bytes.get(key, 0),
+                    'items': self._items.get(key, 0),
+                    'phases': dict((k[2], v) for k, v in
+                                   self._phases.items() if k[:2] == key),
+                }
+            return result
+
+    def render(self):
+        """Return the metrics in the Prometheus text exposition format."""
+        name = self.prefix + '_request_duration_seconds'
+        lines = ['# HELP {} Duration of Alert Manager API calls.'.format(name),
+                 '# TYPE {} histogram'.format(name)]
+        with self._lock:
+            for (call, route), histogram in sorted(self._latency.items()):
+                for bound, count in zip(self.buckets + (float('inf'),),
+                                        histogram.counts + [histogram.count]):
+                    lines.append('{}_bucket{{{}}} {}'.format(
+                        name, _labels(call=call, route=route,
+                                      le=_number(bound)), count))
+                labels = _labels(call=call, route=route)
+                lines.append('{}_sum{{{}}} {}'.format(name, labels,
+                                                      _number(histogram.sum)))
+                lines.append('{}_count{{{}}} {}'.format(name, labels,
+                                                        histogram.count))
+            counters = (
+                ('requests_total', 'API calls by response status.',
+                 self._requests, ('call', 'route', 'status')),
+                ('errors_total', 'Failed API calls by exception type.',
+                 self._errors, ('call', 'route', 'error')),
+                ('request_bytes_total', 'Bytes of request bodies sent.',
+                 self._request_bytes, ('call', 'route')),
+                ('response_bytes_total', 'Bytes of response bodies received.',
+                 self._response_bytes, ('call', 'route')),
+                ('items_total', 'Items returned by API calls.',
+                 self._items, ('call', 'route')),
+                ('phase_seconds_total', 'Seconds spent per phase of a call.',
+                 self._phases, ('call', 'route', 'phase')),
+            )
+            for suffix, help_text, values, label_names in counters:
+                metric = '{}_{}'.format(self.prefix, suffix)
+                lines.append('# HELP {} {}'.format(metric, help_text))
+                lines.append('# TYPE {} counter'.format(metric))
+                for key, value in sorted(values.items()):
+                    lines.append('{}{{{}}} {}'.format(
+                        metric, _labels(**dict(zip(label_names, key))),
+                        _number(value)))
+        return '\n'.join(lines) + '\n'
+
+    def start_http_server(self, port=0, addr='127.0.0.1'):
+        """
+        Serve render() on /metrics from a background thread.
+
+        Parameters
+        ----------
+        port : int
+            (Default value = 0)
+            The port to listen on, 0 picks a free one.
+        addr : str
+            (Default value = '127.0.0.1')
+            The address to listen on.
+
+
+        Returns
+        -------
+        ThreadingHTTPServer
+            The running server, call shutdown() on it to stop it.
+
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        collector = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = collector.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type',
+                                 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((addr, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True,
+                         name='alertmanager-metrics').start()
+        return server
+
+
+class OpenTelemetryHook(Hook):
+    """
+    Hook emitting an OpenTelemetry client span for every call.
+
+    Spans are made current while the call runs, so spans created by
+    instrumented HTTP libraries nest under them. Requires opentelemetry-api
+    (pip install pylertalertmanager[otel]).
+
+    """
+
+    def __init__(self, tracer=None):
+        """
+        Init method.
+
+        Parameters
+        ----------
+        tracer : opentelemetry.trace.Tracer
+            (Default value = None)
+            The tracer to create spans with, defaults to the global
+            tracer provider's 'alertmanager' tracer.
+
+        """
+        try:
+            from opentelemetry import context, trace
+        except ImportError:
+            raise ImportError('OpenTelemetryHook requires opentelemetry-api, '
+                              'install it with: '
+                              'pip install pylertalertmanager[otel]')
+        self._context = context
+        self._trace = trace
+        self.tracer = tracer or trace.get_tracer('alertmanager')
+
+    def before(self, call):
+        span = self.tracer.start_span(
+            'alertmanager.{}'.format(call.name),
+            kind=self._trace.SpanKind.CLIENT,
+            attributes={'server.address': call.host})
+        token = self._context.attach(self._trace.set_span_in_context(span))
+        call.attributes['otel'] = (span, token)
+
+    def after(self, call):
+        span, token = call.attributes.pop('otel')
+        self._context.detach(token)
+        if call.method is not None:
+            span.set_attribute('http.request.method', call.method)
+            span.set_attribute('url.path', call.route)
+        if call.status is not None:
+            span.set_attribute('http.response.status_code', call.status)
+        if call.items is not None:
+            span.set_attribute('alertmanager.items', call.items)
+        for phase, seconds in call.phases.items():
+            span.set_attribute('alertmanager.phase.{}'.format(phase), seconds)
+        if call.error is not None:
+            span.record_exception(call.error)
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR,
+                                               str(call.error)))
+        span.end()
@@ -0,0 +1,173 @@
+from collections.abc import Sequence
+from . import codec
+from .alert_objects import Alert
+
+
+# Characters Go's encoder escapes, a needle containing them can't be
+# searched for verbatim in the raw body.
+_GO_ESCAPED = frozenset('<>&\\"\u2028\u2029')
+
+
+class LazyAlertList(Sequence):
+    """
+    A read-only list of alerts that does as little work as possible.
+
+    The raw response body is kept as-is. It is only decoded the first time
+    the list is inspected, and each alert is only wrapped in its alert class
+    when it is indexed or iterated over. len(), slicing and label projection
+    work on the decoded dicts without building any alert objects, and
+    has_label() can often answer straight from the raw bytes without decoding
+    anything.
+
+    """
+
+    def __init__(self, raw=None, alert_class=Alert, items=None):
+        """
+        Init method.
+
+        Parameters
+        ----------
+        raw : bytes
+            (Default value = None)
+            A JSON array of alerts as returned by Alert Manager.
+        alert_class : type
+            (Default value = Alert)
+            The class each alert is wrapped in on access.
+        items : list
+            (Default value = None)
+            Already decoded alert dicts, used instead of raw.
+
+        """
+        if raw is None and items is None:
+            raise ValueError('LazyAlertList needs raw bytes or items')
+        self.raw = raw
+        self.alert_class = alert_class
+        self._items = items
+        self._wrapped = dict()
+
+    @property
+    def items(self):
+        """Return the decoded alert dicts, decoding the raw body once."""
+        if self._items is None:
+            self._items = codec.loads(self.raw)
+        return self._items
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return LazyAlertList(alert_class=self.alert_class,
+                                 items=self.items[index])
+        if index < 0:
+            index += len(self.items)
+        try:
+            return self._wrapped[index]
+        except KeyError:
+            wrapped = self.alert_class(self.items[index])
+            self._wrapped[index] = wrapped
+            return wrapped
+
+    def __repr__(self):
+        if self._items is None:
+            return '<LazyAlertList: {} bytes, not decoded>'.format(
+                len(self.raw))
+        return '<LazyAlertList: {} alerts>'.format(len(self._items))
+
+    def __eq__(self, other):
+        if isinstance(other, LazyAlertList):
+            return self.items == other.items
+        return list(self) == other
+
+    def label_values(self, name, default=None):
+        """
+        Project one label out of every alert.
+
+        Parameters
+        ----------
+        name : str
+            The label to read.
+        default : object
+            (Default value = None)
+            Returned for alerts that don't carry the label.
+
+
+        Returns
+        -------
+        list
+            The label's value for each alert, in order.
+
+        """
+        return [(item.get('labels') or {}).get(name, default)
+                for item in self.items]
+
+    def filter_labels(self, **labels):
+        """
+        Return the alerts whose labels equal all the given values.
+
+        Parameters
+        ----------
+        **labels : dict
+            Label names and the value each must have.
+
+
+        Returns
+        -------
+        LazyAlertList
+            The matching alerts, still unwrapped.
+
+        """
+        wanted = labels.items()
+        matches = [item for item in self.items
+                   if wanted <= (item.get('labels') or {}).items()]
+        return LazyAlertList(alert_class=self.alert_class, items=matches)
+
+    def has_label(self, name, value):
+        """
+        Return True if any alert carries the label name=value.
+
+        When the body hasn't been decoded yet and the encoded label pair
+        doesn't appear anywhere in it, we answer False without decoding.
+        This makes the usual "is anything critical firing?" poll cheap.
+
+        Parameters
+        ----------
+        name : str
+            The label name.
+        value : str
+            The label value.
+
+
+        Returns
+        -------
+        boolean
+            Return True if at least one alert has the label.
+
+        """
+        if self._items is None and not self._may_contain(name, value):
+            return False
+        return any((item.get('labels') or {}).get(name) == value
+                   for item in self.items)
+
+    def _may_contain(self, name, value):
+        """
+        Search the raw body for an encoded "name":"value" pair.
+
+        Returns True whenever the pair might be present, including when the
+        strings can't be searched for reliably.
+
+        """
+        if not isinstance(name, str) or not isinstance(value, str):
+            return True
+        if _GO_ESCAPED.intersection(name + value):
+            return True
+        if not (name + value).isprintable():
+            return True
+        pair = '"{}":'.format(name).encode('utf-8')
+        quoted = '"{}"'.format(value).encode('utf-8')
+        raw = self.raw
+        if pair + quoted in raw or pair + b' ' + quoted in raw:
+            return True
+        # Strings can't hold a raw newline, so one means the body was pretty
+        # printed and the pair may be spread over several lines.
+        return b'\n' in raw
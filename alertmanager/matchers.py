@@ -0,0 +1,322 @@
+from functools import lru_cache
+import re
+
+
+EQUAL = '='
+NOT_EQUAL = '!='
+REGEX = '=~'
+NOT_REGEX = '!~'
+OPERATORS = (EQUAL, NOT_EQUAL, REGEX, NOT_REGEX)
+
+_QUOTED = r'"(?:[^"\\]|\\.)*"'
+_MATCHER = re.compile(
+    r'\s*(?P<name>[a-zA-Z_:][a-zA-Z0-9_:]*|{quoted})\s*'
+    r'(?P<op>=~|!~|!=|=)\s*'
+    r'(?P<value>{quoted}|[^,}}"\s]*)\s*'.format(quoted=_QUOTED))
+
+
+@lru_cache(maxsize=1024)
+def compile_regex(pattern):
+    """
+    Compile an Alert Manager regex, caching the result.
+
+    Alert Manager anchors matcher regexes at both ends, so the returned
+    callable only succeeds when the whole value matches.
+
+    Parameters
+    ----------
+    pattern : str
+        The regular expression.
+
+
+    Returns
+    -------
+    callable
+        The fullmatch method of the compiled pattern.
+
+    """
+    return re.compile(pattern).fullmatch
+
+
+# Alert Manager only unescapes these, any other backslash is kept as is so
+# regexes such as "node\d+" come through untouched
+_ESCAPES = {'\\\\': '\\', '\\"': '"', '\\n': '\n'}
+_ESCAPE = re.compile(r'\\[\\"n]')
+_QUOTES = {'\\': '\\\\', '"': '\\"', '\n': '\\n'}
+_QUOTE = re.compile(r'[\\"\n]')
+
+
+def _unquote(text):
+    """Strip the quotes and escapes off a quoted matcher token."""
+    if text.startswith('"'):
+        return _ESCAPE.sub(lambda m: _ESCAPES[m.group()], text[1:-1])
+    return text
+
+
+def _quote(text):
+    """Quote a matcher value the way _unquote reads it back."""
+    return '"{}"'.format(_QUOTE.sub(lambda m: _QUOTES[m.group()], text))
+
+
+class Matcher(object):
+    """
+    A compiled label matcher.
+
+    Implements Alert Manager's matcher semantics: '=' and '!=' compare a
+    label's value, '=~' and '!~' fully match it against a regex. A label an
+    alert doesn't carry, or whose value isn't a string, is treated as the
+    empty string, so 'team=""' matches alerts without a team label.
+
+    """
+
+    __slots__ = ('name', 'op', 'value', 'matches_value')
+
+    def __init__(self, name, op, value):
+        """
+        Init method.
+
+        Parameters
+        ----------
+        name : str
+            The label name.
+        op : str
+            One of '=', '!=', '=~' or '!~'.
+        value : str
+            The value, or regex, to match the label against. Other types
+            are converted with str.
+
+
+        Raises
+        ------
+        ValueError
+            Raise a ValueError for an unknown operator or invalid regex.
+
+        """
+        if op not in OPERATORS:
+            raise ValueError('Unknown matcher operator {}'.format(op))
+        # Label values are strings, compare against the value as one
+        value = str(value)
+        self.name = name
+        self.op = op
+        self.value = value
+        if op == EQUAL:
+            self.matches_value = lambda v: v == value
+        elif op == NOT_EQUAL:
+            self.matches_value = lambda v: v != value
+        else:
+            try:
+                fullmatch = compile_regex(value)
+            except re.error as err:
+                raise ValueError('Invalid matcher regex {!r}: {}'.format(
+                    value, err))
+            if op == REGEX:
+                self.matches_value = lambda v: fullmatch(v) is not None
+            else:
+                self.matches_value = lambda v: fullmatch(v) is None
+
+    @classmethod
+    def parse(cls, text):
+        """
+        Parse a single matcher such as 'severity=~"critical|page"'.
+
+        Parameters
+        ----------
+        text : str
+            The matcher in Alert Manager syntax. The value may be quoted.
+
+
+        Returns
+        -------
+        Matcher
+            The compiled matcher.
+
+        """
+        match = _MATCHER.fullmatch(text)
+        if match is None:
+            raise ValueError('Invalid matcher ==> {}'.format(text))
+        return cls(_unquote(match.group('name')), match.group('op'),
+                   _unquote(match.group('value')))
+
+    @classmethod
+    def from_silence_matcher(cls, matcher):
+        """
+        Build a Matcher from a silence's matcher dict.
+
+        Parameters
+        ----------
+        matcher : dict
+            A dict with 'name', 'value', 'isRegex' and optionally 'isEqual'
+            keys, as used by Silence.add_matcher and the v2 API.
+
+
+        Returns
+        -------
+        Matcher
+            The compiled matcher.
+
+        """
+        # dict.get, a default_box Silence would make up an empty Box for
+        # missing keys rather than return the default
+        is_regex = dict.get(matcher, 'isRegex', False)
+        is_equal = dict.get(matcher, 'isEqual', True)
+        if is_regex:
+            op = REGEX if is_equal else NOT_REGEX
+        else:
+            op = EQUAL if is_equal else NOT_EQUAL
+        return cls(matcher['name'], op, matcher['value'])
+
+    def matches(self, labels):
+        """
+        Return True if a label set satisfies this matcher.
+
+        Parameters
+        ----------
+        labels : dict
+            An alert's labels.
+
+        """
+        return self.matches_value(label_value(labels, self.name))
+
+    def __eq__(self, other):
+        if not isinstance(other, Matcher):
+            return NotImplemented
+        return (self.name, self.op, self.value) == \
+            (other.name, other.op, other.value)
+
+    def __hash__(self):
+        return hash((self.name, self.op, self.value))
+
+    def __str__(self):
+        return '{}{}{}'.format(self.name, self.op, _quote(self.value))
+
+    def __repr__(self):
+        return '<Matcher: {}>'.format(self)
+
+
+def parse_matchers(text):
+    """
+    Parse a comma separated list of matchers.
+
+    Parameters
+    ----------
+    text : str
+        Matchers such as '{alertname="Disk", severity!~"info|debug"}'. The
+        surrounding braces are optional.
+
+
+    Returns
+    -------
+    list
+        The compiled Matcher objects.
+
+    """
+    text = text.strip()
+    if text.startswith('{') and text.endswith('}'):
+        text = text[1:-1]
+    matchers = list()
+    pos = 0
+    while pos < len(text):
+        match = _MATCHER.match(text, pos)
+        if match is None or match.end() == pos:
+            raise ValueError('Invalid matcher at ==> {}'.format(text[pos:]))
+        matchers.append(Matcher(_unquote(match.group('name')),
+                                match.group('op'),
+                                _unquote(match.group('value'))))
+        pos = match.end()
+        if pos < len(text):
+            if text[pos] != ',':
+                raise ValueError('Expected , at ==> {}'.format(text[pos:]))
+            pos += 1
+    return matchers
+
+
+def compile_matchers(spec):
+    """
+    Turn any supported matcher specification into a list of Matchers.
+
+    Parameters
+    ----------
+    spec : str, dict or iterable
+        A matcher string as accepted by parse_matchers, a dict of label
+        names to values matched for equality (the same form get_alerts
+        filters take), or an iterable of Matcher objects, matcher strings
+        and silence matcher dicts.
+
+
+    Returns
+    -------
+    list
+        The compiled Matcher objects, cheapest first.
+
+    """
+    if isinstance(spec, str):
+        matchers = parse_matchers(spec)
+    elif isinstance(spec, dict):
+        matchers = [Matcher(name, EQUAL, value)
+                    for name, value in spec.items()]
+    else:
+        matchers = list()
+        for item in spec:
+            if isinstance(item, Matcher):
+                matchers.append(item)
+            elif isinstance(item, str):
+                matchers.append(Matcher.parse(item))
+            else:
+                matchers.append(Matcher.from_silence_matcher(item))
+    # Plain comparisons are much cheaper than regexes, run them first so
+    # they can short-circuit.
+    return sorted(matchers, key=lambda m: m.op in (REGEX, NOT_REGEX))
+
+
+def label_value(labels, name):
+    """
+    Return the value of a label, '' if it is unset or not a string.
+
+    Reading a missing label off a Box alert, e.g. alert.labels.severity,
+    leaves an empty Box behind, which must not count as a value.
+
+    """
+    value = dict.get(labels, name)
+    return value if isinstance(value, str) else ''
+
+
+def _labels(alert):
+    """Return the label dict of an alert, Box, compact or plain dict."""
+    labels = alert.get('labels')
+    return labels if labels is not None else {}
+
+
+def matches_all(matchers, labels):
+    """Return True if a label set satisfies every matcher."""
+    for matcher in matchers:
+        if not matcher.matches_value(label_value(labels, matcher.name)):
+            return False
+    return True
+
+
+def filter_alerts(alerts, spec):
+    """
+    Filter alerts locally with Alert Manager matcher semantics.
+
+    This lets a single get_alerts snapshot be sliced into any number of
+    views without another round trip.
+
+    Parameters
+    ----------
+    alerts : iterable
+        Alert, CompactAlert or plain alert dicts.
+    spec : str, dict or iterable
+        The matchers every returned alert must satisfy, in any form
+        accepted by compile_matchers.
+
+
+    Yields
+    ------
+    object
+        Each alert whose labels satisfy every matcher.
+
+    """
+    matchers = compile_matchers(spec)
+    for alert in alerts:
+        if matches_all(matchers, _labels(alert)):
+            yield alert
@@ -0,0 +1,238 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+import logging
+import threading
+from .alert_objects import alert_key
+from .alertmanager import AlertManager
+
+
+log = logging.getLogger(__name__)
+
+
+class FanOutResult(list):
+    """
+    A merged list of results gathered from several Alert Manager instances.
+
+    Behaves exactly like a list, with an extra errors attribute mapping each
+    host that failed or timed out to the exception it raised. An empty errors
+    dict means every host answered.
+
+    """
+
+    def __init__(self, items=(), errors=None):
+        super().__init__(items)
+        self.errors = errors or dict()
+
+    @property
+    def partial(self):
+        """Return True if at least one host did not contribute results."""
+        return bool(self.errors)
+
+
+class MultiAlertManager(object):
+    """
+    Query several Alert Manager instances in parallel.
+
+    Each read is sent to every instance at the same time on a thread pool and
+    the results are merged and deduplicated, so the latency of a call is that
+    of the slowest instance rather than the sum of all of them. Instances
+    that fail or exceed the timeout are reported on the result's errors
+    attribute instead of aborting the whole call.
+
+    A request still running past the timeout can't be cancelled and keeps
+    its worker busy. Until it finishes its instance is reported as timed
+    out straight away rather than sent another request, so a hung instance
+    ties up at most one worker and doesn't hold up the others.
+
+    """
+
+    def __init__(self, managers, timeout=None, max_workers=None):
+        """
+        Init method.
+
+        Parameters
+        ----------
+        managers : list
+            AlertManager instances, or host strings which are turned into
+            AlertManager instances on the default port.
+        timeout : float
+            (Default value = None)
+            Seconds to wait for the instances to answer. Instances that
+            haven't answered by then are reported as timed out. It is also
+            the request timeout of the instances created from host strings,
+            AlertManager instances passed in should set their own timeout.
+        max_workers : int
+            (Default value = None)
+            Size of the thread pool, defaults to one thread per instance.
+
+        """
+        self.managers = [m if isinstance(m, AlertManager)
+                         else AlertManager(m, timeout=timeout)
+                         for m in managers]
+        if not self.managers:
+            raise ValueError('MultiAlertManager needs at least one instance')
+        self.timeout = timeout
+        self._max_workers = max_workers or len(self.managers)
+        self._executor = None
+        # Position of a manager -> its request still running after a timeout
+        self._stragglers = dict()
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def executor(self):
+        """Return the thread pool, creating it on first use."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_workers,
+                thread_name_prefix='alertmanager-fanout')
+        return self._executor
+
+    def close(self):
+        """Shut down the thread pool without waiting on straggling hosts."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    @staticmethod
+    def _host(manager):
+        """Return the host:port string used to report errors."""
+        return '{}:{}'.format(manager.hostname, manager.port)
+
+    def _fan_out(self, method, *args, **kwargs):
+        """
+        Call a method on every instance in parallel.
+
+        Parameters
+        ----------
+        method : str
+            Name of the AlertManager method to call.
+        *args : list
+            Positional arguments for the method.
+        **kwargs : dict
+            Keyword arguments for the method.
+
+
+        Returns
+        -------
+        tuple
+            A list of each successful instance's result, in the order the
+            instances were given, and a dict of host to exception for the
+            instances that failed.
+
+        """
+        futures = list()
+        for position, manager in enumerate(self.managers):
+            with self._lock:
+                straggler = self._stragglers.get(position)
+                if straggler is not None and straggler.done():
+                    del self._stragglers[position]
+                    straggler = None
+            futures.append(None if straggler is not None else
+                           self.executor.submit(getattr(manager, method),
+                                                *args, **kwargs))
+        wait([f for f in futures if f is not None], timeout=self.timeout)
+        results = list()
+        errors = dict()
+        for position, (manager, future) in enumerate(zip(self.managers,
+                                                         futures)):
+            host = self._host(manager)
+            if future is None:
+                errors[host] = TimeoutError(
+                    '{} is still busy with a request that timed out'.format(
+                        host))
+            elif not future.done():
+                if not future.cancel():
+                    with self._lock:
+                        self._stragglers[position] = future
+                errors[host] = TimeoutError(
+                    '{} did not answer within {}s'.format(host, self.timeout))
+            elif future.exception() is not None:
+                errors[host] = future.exception()
+            else:
+                results.append(future.result())
+                continue
+            log.warning('%s failed for %s: %s', method, host, errors[host])
+        return results, errors
+
+    @staticmethod
+    def _merge(results, key):
+        """Flatten the per instance results, keeping the first of each key."""
+        merged = dict()
+        for result in results:
+            for item in result:
+                merged.setdefault(key(item), item)
+        return list(merged.values())
+
+    def get_alerts(self, **kwargs):
+        """
+        Get the alerts of every instance, deduplicated by fingerprint.
+
+        Parameters
+        ----------
+        **kwargs : dict
+            Filters passed on to AlertManager.get_alerts.
+
+
+        Returns
+        -------
+        FanOutResult
+            The merged list of Alert objects.
+
+        """
+        results, errors = self._fan_out('get_alerts', **kwargs)
+        return FanOutResult(self._merge(results, alert_key), errors)
+
+    def get_silences(self, **kwargs):
+        """
+        Get the silences of every instance, deduplicated by id.
+
+        Parameters
+        ----------
+        **kwargs : dict
+            Filters passed on to AlertManager.get_silences.
+
+
+        Returns
+        -------
+        FanOutResult
+            The merged list of silences.
+
+        """
+        results, errors = self._fan_out('get_silences', **kwargs)
+        return FanOutResult(self._merge(results, lambda s: s['id']), errors)
+
+    def get_alert_groups(self):
+        """
+        Get the alert groups of every instance.
+
+        Groups with the same receiver and group labels are merged into one,
+        and the alerts inside them are deduplicated by fingerprint.
+
+        Returns
+        -------
+        FanOutResult
+            The merged list of alert groups.
+
+        """
+        results, errors = self._fan_out('get_alert_groups')
+        groups = dict()
+        for result in results:
+            for group in result:
+                key = ((group.get('receiver') or {}).get('name'),
+                       frozenset((group.get('labels') or {}).items()))
+                if key not in groups:
+                    groups[key] = group
+                    continue
+                alerts = groups[key].get('alerts') or []
+                seen = set(alert_key(a) for a in alerts)
+                for alert in group.get('alerts') or []:
+                    if alert_key(alert) not in seen:
+                        seen.add(alert_key(alert))
+                        alerts.append(alert)
+                groups[key]['alerts'] = alerts
+        return FanOutResult(groups.values(), errors)
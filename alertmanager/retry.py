@@ -0,0 +1,388 @@
+from collections import deque
+import logging
+import random
+import threading
+import time
+import requests
+
+
+log = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+_breakers = dict()
+_breakers_lock = threading.Lock()
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised instead of sending a request to a host that is down."""
+
+
+class RetryBudget(object):
+    """
+    Cap retries to a fraction of recent requests.
+
+    Without a budget every caller retries its failed requests when a
+    cluster struggles, multiplying the load on it exactly when it can least
+    take it. The budget allows min_retries retries per window plus ratio
+    retries per request sent during the window.
+
+    """
+
+    def __init__(self, ratio=0.2, min_retries=10, window=10.0):
+        """
+        Init method.
+
+        Parameters
+        ----------
+        ratio : float
+            (Default value = 0.2)
+            Retries allowed per request sent.
+        min_retries : int
+            (Default value = 10)
+            Retries allowed per window regardless of traffic, so that low
+            traffic clients can still retry.
+        window : float
+            (Default value = 10.0)
+            Seconds over which requests and retries are counted.
+
+        """
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._requests = deque()
+        self._retries = deque()
+        self._lock = threading.Lock()
+
+    def _prune(self, now):
+        horizon = now - self.window
+        for events in (self._requests, self._retries):
+            while events and events[0] < horizon:
+                events.popleft()
+
+    def record_request(self):
+        """Count a first attempt."""
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            self._requests.append(now)
+
+    def try_spend(self):
+        """
+        Count a retry if the budget allows it.
+
+        Returns
+        -------
+        bool
+            True if the retry may go ahead.
+
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            allowed = self.min_retries + self.ratio * len(self._requests)
+            if len(self._retries) >= allowed:
+                return False
+            self._retries.append(now)
+            return True
+
+
+class RetryPolicy(object):
+    """
+    When and how long to wait before retrying a request.
+
+    Connection errors and timeouts are retried, and so are responses with a
+    status in retry_statuses. Waits grow exponentially from backoff up to
+    max_backoff with full jitter, and a Retry-After header sent by the
+    server is honoured up to max_backoff.
+
+    Requests that may have reached Alert Manager are only retried when
+    they are idempotent: methods in retry_methods, and posting alerts,
+    which Alert Manager deduplicates by label set. Creating a silence is
+    only retried after a connect timeout, other connection errors may have
+    happened after it was sent.
+
+    """
+
+    def __init__(self, max_attempts=3, backoff=0.1, max_backoff=5.0,
+                 jitter=True, retry_statuses=(429, 502, 503, 504),
+                 retry_methods=('GET', 'HEAD', 'DELETE'),
+                 idempotent_routes=('/api/v2/alerts',), budget=None):
+        """
+        Init method.
+
+        Parameters
+        ----------
+        max_attempts : int
+            (Default value = 3)
+            Attempts per request, including the first.
+        backoff : float
+            (Default value = 0.1)
+            Seconds waited before the first retry, doubled for every
+            following retry.
+        max_backoff : float
+            (Default value = 5.0)
+            Longest wait between two attempts.
+        jitter : bool
+            (Default value = True)
+            Wait a random time between 0 and the backoff, so clients failing
+            together don't retry together.
+        retry_statuses : tuple
+            (Default value = (429, 502, 503, 504))
+            Response status codes worth retrying.
+        retry_methods : tuple
+            (Default value = ('GET', 'HEAD', 'DELETE'))
+            Methods safe to send twice.
+        idempotent_routes : tuple
+            (Default value = ('/api/v2/alerts',))
+            Routes safe to send twice whatever the method.
+        budget : RetryBudget
+            (Default value = None)
+            Limits retries across every request using this policy. A
+            RetryBudget with its default settings is used if not given,
+            pass False to disable it.
+
+        """
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_methods = frozenset(retry_methods)
+        self.idempotent_routes = tuple(idempotent_routes)
+        self.budget = RetryBudget() if budget is None else budget
+
+    def idempotent(self, method, route):
+        """Return True if a request may safely be sent more than once."""
+        return method in self.retry_methods or \
+            route in self.idempotent_routes
+
+    def delay(self, attempt, response=None):
+        """
+        Return the seconds to wait before the next attempt.
+
+        Parameters
+        ----------
+        attempt : int
+            The number of attempts made so far.
+        response : requests.Response
+            (Default value = None)
+            The failed response, checked for a Retry-After header.
+
+        """
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after is not None:
+                try:
+                    return min(max(float(retry_after), 0), self.max_backoff)
+                except ValueError:
+                    pass
+        delay = min(self.backoff * 2 ** (attempt - 1), self.max_backoff)
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def _may_retry(self, attempt):
+        if attempt >= self.max_attempts:
+            return False
+        if self.budget and not self.budget.try_spend():
+            log.warning('Retry budget exhausted, not retrying')
+            return False
+        return True
+
+    def retry_error(self, method, route, error, attempt):
+        """Return True if a request that raised error should be retried."""
+        if isinstance(error, CircuitOpenError):
+            return False
+        if isinstance(error, requests.ConnectTimeout):
+            # The request never left, it is safe to send whatever it is.
+            pass
+        elif not isinstance(error, (requests.ConnectionError,
+                                    requests.Timeout)):
+            return False
+        elif not self.idempotent(method, route):
+            return False
+        return self._may_retry(attempt)
+
+    def retry_response(self, method, route, response, attempt):
+        """Return True if a request answered with response be retried."""
+        if response.status_code not in self.retry_statuses:
+            return False
+        if not self.idempotent(method, route):
+            return False
+        return self._may_retry(attempt)
+
+
+class CircuitBreaker(object):
+    """
+    Fail fast while a host is down.
+
+    After failure_threshold consecutive failures (connection errors,
+    timeouts and 5xx responses) the circuit opens, and requests raise
+    CircuitOpenError at once instead of waiting for a timeout. After
+    reset_timeout seconds a single trial request is let through, closing
+    the circuit if it succeeds and opening it again otherwise.
+
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        """
+        Init method.
+
+        Parameters
+        ----------
+        failure_threshold : int
+            (Default value = 5)
+            Consecutive failures opening the circuit.
+        reset_timeout : float
+            (Default value = 30.0)
+            Seconds the circuit stays open before a trial request.
+
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_host(cls, host, **kwargs):
+        """
+        Return the process wide breaker of a host.
+
+        Every AlertManager talking to the same host then shares what it
+        learns about that host being down.
+
+        Parameters
+        ----------
+        host : str
+            The host, e.g. 'http://alertmanager:9093'.
+        **kwargs : dict
+            Arguments used to create the breaker if it doesn't exist yet.
+
+        """
+        with _breakers_lock:
+            breaker = _breakers.get(host)
+            if breaker is None:
+                breaker = _breakers[host] = cls(**kwargs)
+        return breaker
+
+    def before(self, host=''):
+        """
+        Check a request may be sent.
+
+        Raises
+        ------
+        CircuitOpenError
+            Raise a CircuitOpenError if the circuit is open.
+
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            if self.state == OPEN and \
+                    time.monotonic() - self._opened >= self.reset_timeout:
+                self.state = HALF_OPEN
+                return
+        raise CircuitOpenError('Circuit open for {}, failing fast'.format(
+            host or 'host'))
+
+    def record(self, success):
+        """
+        Record the outcome of a request.
+
+        Parameters
+        ----------
+        success : bool
+            False for connection errors, timeouts and 5xx responses.
+
+        """
+        with self._lock:
+            if success:
+                self.state = CLOSED
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.state == HALF_OPEN or \
+                    self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    log.warning('Opening circuit after %d failures',
+                                self.failures)
+                self.state = OPEN
+                self._opened = time.monotonic()
+
+
+def send_with_retry(send, method, route, policy=None, breaker=None,
+                    host=''):
+    """
+    Send a request, retrying it and tracking its host's health.
+
+    Parameters
+    ----------
+    send : callable
+        Sends the request once and returns a requests.Response.
+    method : str
+        The HTTP verb.
+    route : str
+        The API route.
+    policy : RetryPolicy
+        (Default value = None)
+        When to retry. The request is sent once if None.
+    breaker : CircuitBreaker
+        (Default value = None)
+        The breaker of the request's host.
+    host : str
+        (Default value = '')
+        The host, used in error messages.
+
+
+    Returns
+    -------
+    requests.Response
+        The last response received.
+
+
+    Raises
+    ------
+    requests.RequestException
+        The last error if every attempt raised one, or CircuitOpenError
+        when the breaker is open.
+
+    """
+    if policy is not None and policy.budget:
+        policy.budget.record_request()
+    attempt = 0
+    while True:
+        attempt += 1
+        if breaker is not None:
+            breaker.before(host)
+        try:
+            response = send()
+        except requests.RequestException as err:
+            if breaker is not None:
+                breaker.record(False)
+            if policy is None or \
+                    not policy.retry_error(method, route, err, attempt):
+                raise
+            delay = policy.delay(attempt)
+            log.debug('Retrying %s %s in %.2fs after %s', method, route,
+                      delay, err)
+        except BaseException:
+            # Anything else still ends the attempt, a half-open breaker
+            # would otherwise never get to leave its trial.
+            if breaker is not None:
+                breaker.record(False)
+            raise
+        else:
+            if breaker is not None:
+                breaker.record(response.status_code < 500)
+            if policy is None or \
+                    not policy.retry_response(method, route, response,
+                                              attempt):
+                return response
+            delay = policy.delay(attempt, response)
+            log.debug('Retrying %s %s in %.2fs after status %d', method,
+                      route, delay, response.status_code)
+            response.close()
+        time.sleep(delay)
@@ -0,0 +1,123 @@
+from .index import AlertIndex
+from .matchers import Matcher
+
+
+def silence_key(silence, position):
+    """
+    Return the key a silence is reported under.
+
+    Silences returned by Alert Manager are identified by their id. Silences
+    we are still drafting don't have one yet, so they fall back to their
+    position in the input.
+
+    """
+    silence_id = silence.get('id')
+    return silence_id if silence_id else position
+
+
+def compile_silence(silence):
+    """
+    Compile the matchers of a Silence, CompactSilence or silence dict.
+
+    Parameters
+    ----------
+    silence : Silence, CompactSilence or dict
+        A silence with a 'matchers' list as built by Silence.add_matcher.
+
+
+    Returns
+    -------
+    tuple
+        The compiled Matcher objects.
+
+    """
+    return tuple(Matcher.from_silence_matcher(matcher)
+                 for matcher in silence.get('matchers') or ())
+
+
+def evaluate_silences(silences, alerts):
+    """
+    Work out which alerts each silence would mute.
+
+    Every silence's matchers are compiled once and answered from a label
+    index over the alerts, and matchers shared between silences are only
+    resolved once, so thousands of silences can be checked against tens of
+    thousands of alerts without a silence x alert nested loop. Nothing is
+    sent to Alert Manager, which makes this suitable for previewing a
+    silence before post_silence.
+
+    The silences' time windows and states are not considered, filter the
+    silences beforehand if only active ones should count.
+
+    Parameters
+    ----------
+    silences : iterable
+        Silence, CompactSilence or silence dicts.
+    alerts : iterable or AlertIndex
+        The alerts to check, or an index already built over them.
+
+
+    Returns
+    -------
+    dict
+        Each silence's id (or position when it has none) mapped to the list
+        of alerts it matches. Silences without matchers match nothing.
+
+    """
+    index = alerts if isinstance(alerts, AlertIndex) else AlertIndex(alerts)
+    result = dict()
+    for key, muted in _muted_keys(silences, index):
+        result[key] = [index.get(alert) for alert in muted]
+    return result
+
+
+def _muted_keys(silences, index):
+    """
+    Yield each silence's key with the set of alert keys it matches.
+
+    Matchers are resolved once across all silences, and silences with the
+    exact same matchers, common when silences are re-created, share one
+    query.
+
+    """
+    cache = dict()
+    queries = dict()
+    for position, silence in enumerate(silences):
+        matchers = compile_silence(silence)
+        if not matchers:
+            muted = set()
+        else:
+            signature = frozenset(matchers)
+            muted = queries.get(signature)
+            if muted is None:
+                muted = index.query_keys(matchers, cache)
+                queries[signature] = muted
+        yield silence_key(silence, position), muted
+
+
+def silenced_by(silences, alerts):
+    """
+    Invert evaluate_silences, mapping each alert to its silences.
+
+    Parameters
+    ----------
+    silences : iterable
+        Silence, CompactSilence or silence dicts.
+    alerts : iterable or AlertIndex
+        The alerts to check, or an index already built over them.
+
+
+    Returns
+    -------
+    dict
+        Each muted alert's key (its fingerprint, or label set) mapped to the
+        list of silence ids/positions muting it. Alerts no silence matches
+        are left out.
+
+    """
+    index = alerts if isinstance(alerts, AlertIndex) else AlertIndex(alerts)
+    result = dict()
+    for key, muted in _muted_keys(silences, index):
+        for alert in muted:
+            result.setdefault(alert, []).append(key)
+    return result
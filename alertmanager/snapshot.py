@@ -0,0 +1,606 @@
+"""
+A compact, memory-mapped file format for archived alerts and silences.
+
+A snapshot is laid out as::
+
+    header      magic, version, kind, capture time, counts and the offset
+                of every section below
+    strings     every distinct string once: a table of uint32 end offsets
+                followed by the UTF-8 bytes
+    times       every distinct timestamp once, in nanoseconds since the
+                epoch, delta encoded against the earliest one in the
+                fewest bytes that fit them all
+    shapes      the JSON skeletons of the records: keys, nesting, constants
+                and the type of every value slot
+    index       a uint32 offset per record into the records section
+    records     per record a uint16 shape id followed by its slots packed
+                with struct: string and timestamp ids, integers, floats
+
+Records sharing their structure, e.g. alerts with the same label names,
+share a shape, so a record is little more than a few ids. Reading one
+record is a single struct.unpack_from plus building the dict from its
+shape, so individual alerts are read without parsing the whole file, and
+only the header is needed to pick snapshots by time. Strings and
+timestamps are fixed width or indexed, so each is decoded on its own.
+
+All integers are little-endian.
+"""
+import glob
+import mmap
+import os
+import struct
+import time
+from . import codec
+from .timeline import _records
+from .timeutils import format_epoch_ns, parse_epoch_ns
+
+
+MAGIC = b'AMSNAP'
+VERSION = 1
+KINDS = ('alerts', 'silences', 'groups')
+EXTENSION = '.amsnap'
+
+# magic, version, kind, capture time, record/string/time/shape counts and
+# the offsets of the strings, times, shapes, index, records sections and
+# of the end of the file
+HEADER = struct.Struct('<6sHB3xqIIIIQQQQQQ')
+
+# Fields stored as timestamps when they round-trip exactly
+TIME_FIELDS = frozenset(('startsAt', 'endsAt', 'updatedAt'))
+
+_SLOT_FORMATS = {'s': 'I', 't': 'I', 'i': 'q', 'f': 'd'}
+_SHAPE_ID = struct.Struct('<H')
+_INDEX_ENTRY = struct.Struct('<I')
+# The earliest timestamp and the width in bytes of the offsets from it
+_TIME_TABLE = struct.Struct('<qB')
+_INT64 = (-2 ** 63, 2 ** 63 - 1)
+
+
+class _Encoder(object):
+    """Intern strings and timestamps and split records into shapes."""
+
+    def __init__(self):
+        self.strings = dict()
+        self.times = dict()
+        self.time_values = list()
+        self.shapes = dict()
+        # Skeletons of dicts holding only strings, by their keys
+        self.flat = dict()
+
+    def flatten(self, value, tokens, slots, key=None):
+        """
+        Append the structure of value to tokens and its values to slots.
+
+        The tokens of a record are its shape key, they are only turned
+        into a nested skeleton once per distinct shape.
+
+        """
+        if type(value) is str or isinstance(value, str):
+            if key in TIME_FIELDS:
+                index = self._time(value)
+                if index is not None:
+                    tokens.append('t')
+                    slots.append(index)
+                    return
+            strings = self.strings
+            tokens.append('s')
+            slots.append(strings.setdefault(value, len(strings)))
+        elif isinstance(value, dict):
+            names = tuple(value)
+            token = self.flat.get(names)
+            if token is not None:
+                # Labels and annotations, the bulk of every alert
+                items = list(value.values())
+                if all(type(item) is str for item in items):
+                    strings = self.strings
+                    tokens.append(token)
+                    slots.extend([strings.setdefault(item, len(strings))
+                                  for item in items])
+                    return
+            position = len(tokens)
+            tokens.append(('d', names))
+            for name, item in value.items():
+                self.flatten(item, tokens, slots, name)
+            if TIME_FIELDS.isdisjoint(names) and \
+                    len(tokens) == position + 1 + len(names) and \
+                    all(token == 's' for token in tokens[position + 1:]):
+                self.flat[names] = ('D', names)
+        elif isinstance(value, (list, tuple)):
+            tokens.append(('l', len(value)))
+            for item in value:
+                self.flatten(item, tokens, slots)
+        elif isinstance(value, bool) or value is None:
+            tokens.append(('c', value))
+        elif isinstance(value, int) and _INT64[0] <= value <= _INT64[1]:
+            tokens.append('i')
+            slots.append(value)
+        elif isinstance(value, float):
+            tokens.append('f')
+            slots.append(value)
+        elif isinstance(value, int):
+            tokens.append(('c', value))
+        elif hasattr(value, 'to_dict'):
+            self.flatten(value.to_dict(), tokens, slots, key)
+        else:
+            raise ValueError('Can not store {!r} in a snapshot'.format(
+                value))
+
+    def _time(self, value):
+        """Intern a timestamp if it can be rebuilt exactly from its
+        nanoseconds, return its id or None."""
+        index = self.times.get(value)
+        if index is not None:
+            return index
+        try:
+            ns = parse_epoch_ns(value)
+        except ValueError:
+            return None
+        if format_epoch_ns(ns) != value:
+            return None
+        index = self.times[value] = len(self.time_values)
+        self.time_values.append(ns)
+        return index
+
+    def shape(self, tokens):
+        """Return the id and struct of the shape of a record's tokens."""
+        tokens = tuple(tokens)
+        entry = self.shapes.get(tokens)
+        if entry is None:
+            if len(self.shapes) > 0xffff:
+                raise ValueError('Too many distinct record shapes')
+            skeleton = _nest(tokens, 0)[0]
+            fmt = struct.Struct('<' + ''.join(_slot_types(skeleton)))
+            entry = self.shapes[tokens] = (len(self.shapes), fmt, skeleton)
+        return entry
+
+
+def _nest(tokens, position):
+    """Rebuild the nested skeleton starting at tokens[position], return it
+    and the position after it."""
+    token = tokens[position]
+    position += 1
+    if isinstance(token, str):
+        return (token,), position
+    kind, argument = token
+    if kind == 'c':
+        return token, position
+    if kind == 'D':
+        return ('d', tuple((name, ('s',)) for name in argument)), position
+    children = list()
+    if kind == 'd':
+        for name in argument:
+            child, position = _nest(tokens, position)
+            children.append((name, child))
+    else:
+        for _ in range(argument):
+            child, position = _nest(tokens, position)
+            children.append(child)
+    return (kind, tuple(children)), position
+
+
+def _slot_types(skeleton):
+    kind = skeleton[0]
+    if kind in _SLOT_FORMATS:
+        yield _SLOT_FORMATS[kind]
+    elif kind == 'd':
+        for _, child in skeleton[1]:
+            yield from _slot_types(child)
+    elif kind == 'l':
+        for child in skeleton[1]:
+            yield from _slot_types(child)
+
+
+def _to_json(skeleton):
+    kind = skeleton[0]
+    if kind == 'd':
+        return ['d', [[name, _to_json(child)] for name, child in skeleton[1]]]
+    if kind == 'l':
+        return ['l', [_to_json(child) for child in skeleton[1]]]
+    return list(skeleton)
+
+
+def snapshot_path(directory, kind='alerts', taken_at=None):
+    """
+    Return the conventional file name of a snapshot in a directory.
+
+    Names sort by capture time, e.g. alerts-20201016T120000.000Z.amsnap.
+
+    Parameters
+    ----------
+    directory : str
+        The archive directory.
+    kind : str
+        (Default value = 'alerts')
+        One of KINDS.
+    taken_at : int
+        (Default value = None)
+        The capture time in nanoseconds since the epoch, now if None.
+
+    """
+    if taken_at is None:
+        taken_at = time.time_ns()
+    seconds, nanos = divmod(taken_at, 1000000000)
+    stamp = time.strftime('%Y%m%dT%H%M%S', time.gmtime(seconds))
+    return os.path.join(directory, '{}-{}.{:03d}Z{}'.format(
+        kind, stamp, nanos // 1000000, EXTENSION))
+
+
+def write_snapshot(path, items, kind='alerts', taken_at=None):
+    """
+    Write alerts, silences or alert groups to a snapshot file.
+
+    The file is written next to its final path and renamed into place, so
+    readers never see a partial snapshot.
+
+    Parameters
+    ----------
+    path : str
+        The file to write, or a directory to write a file named by
+        snapshot_path into.
+    items : iterable
+        The records to store, as returned by get_alerts, get_silences or
+        get_alert_groups: objects, compact objects, plain dicts or a
+        LazyAlertList.
+    kind : str
+        (Default value = 'alerts')
+        What the records are, one of KINDS.
+    taken_at : int
+        (Default value = None)
+        The capture time in nanoseconds since the epoch, now if None.
+
+
+    Returns
+    -------
+    str
+        The path of the snapshot written.
+
+
+    Raises
+    ------
+    ValueError
+        Raise a ValueError for an unknown kind or a value that can't be
+        stored.
+
+    """
+    if kind not in KINDS:
+        raise ValueError('Unknown snapshot kind ==> {}'.format(kind))
+    if taken_at is None:
+        taken_at = time.time_ns()
+    if os.path.isdir(path):
+        path = snapshot_path(path, kind, taken_at)
+
+    encoder = _Encoder()
+    flattened = list()
+    for item in _records(items):
+        tokens = list()
+        slots = list()
+        encoder.flatten(item, tokens, slots)
+        flattened.append((encoder.shape(tokens), slots))
+
+    records = bytearray()
+    index = list()
+    for (shape_id, fmt, _), slots in flattened:
+        index.append(len(records))
+        records += _SHAPE_ID.pack(shape_id)
+        records += fmt.pack(*slots)
+    if len(records) > 0xffffffff:
+        raise ValueError('Snapshot records exceed 4 GiB')
+
+    strings = [text.encode('utf-8') for text in encoder.strings]
+    string_ends = list()
+    end = 0
+    for data in strings:
+        end += len(data)
+        string_ends.append(end)
+    string_section = struct.pack('<{}I'.format(len(strings)), *string_ends) \
+        + b''.join(strings)
+
+    times = encoder.time_values
+    base = min(times) if times else 0
+    width = max((max(times) - base).bit_length() + 7 >> 3, 1) if times else 1
+    time_section = _TIME_TABLE.pack(base, width) + b''.join(
+        (ns - base).to_bytes(width, 'little') for ns in times)
+
+    shapes = sorted(encoder.shapes.values())
+    shape_section = codec.dumps([_to_json(skeleton)
+                                 for _, _, skeleton in shapes])
+    if isinstance(shape_section, str):
+        shape_section = shape_section.encode('utf-8')
+    index_section = struct.pack('<{}I'.format(len(index)), *index)
+
+    offsets = list()
+    position = HEADER.size
+    for section in (string_section, time_section, shape_section,
+                    index_section, records):
+        offsets.append(position)
+        position += len(section)
+    offsets.append(position)
+    header = HEADER.pack(MAGIC, VERSION, KINDS.index(kind), taken_at,
+                         len(index), len(strings), len(times), len(shapes),
+                         *offsets)
+
+    partial = path + '.partial'
+    with open(partial, 'wb') as handle:
+        for section in (header, string_section, time_section, shape_section,
+                        index_section, records):
+            handle.write(section)
+    os.replace(partial, path)
+    return path
+
+
+def _parse_header(data, path):
+    if len(data) < HEADER.size or data[:len(MAGIC)] != MAGIC:
+        raise ValueError('Not a snapshot ==> {}'.format(path))
+    fields = HEADER.unpack_from(data)
+    if fields[1] != VERSION:
+        raise ValueError('Unsupported snapshot version {} ==> {}'.format(
+            fields[1], path))
+    return fields
+
+
+def read_header(path):
+    """
+    Read only the header of a snapshot.
+
+    Parameters
+    ----------
+    path : str
+        The snapshot file.
+
+
+    Returns
+    -------
+    dict
+        The kind, the capture time (nanoseconds since the epoch) and the
+        number of records.
+
+
+    Raises
+    ------
+    ValueError
+        Raise a ValueError if the file isn't a snapshot.
+
+    """
+    with open(path, 'rb') as handle:
+        fields = _parse_header(handle.read(HEADER.size), path)
+    return {'kind': KINDS[fields[2]], 'taken_at': fields[3],
+            'count': fields[4]}
+
+
+def _compile(skeleton, position):
+    """Compile a skeleton into a function building its value from the
+    unpacked slots, the strings and the timestamps."""
+    kind = skeleton[0]
+    if kind == 's':
+        return (lambda v, s, t: s[v[position]]), position + 1
+    if kind == 't':
+        return (lambda v, s, t: t[v[position]]), position + 1
+    if kind in ('i', 'f'):
+        return (lambda v, s, t: v[position]), position + 1
+    if kind == 'c':
+        constant = skeleton[1]
+        return (lambda v, s, t: constant), position
+    children = skeleton[1]
+    if kind == 'd' and all(child[0] == 's' for _, child in children):
+        # Labels and annotations, the common case, in one go
+        names = tuple(name for name, _ in children)
+        slots = tuple(range(position, position + len(names)))
+        return (
+            lambda v, s, t: dict(zip(names, [s[v[i]] for i in slots])),
+            position + len(names))
+    builders = list()
+    if kind == 'd':
+        for name, child in children:
+            builder, position = _compile(child, position)
+            builders.append((name, builder))
+        return (lambda v, s, t: {name: build(v, s, t)
+                                 for name, build in builders}), position
+    for child in children:
+        builder, position = _compile(child, position)
+        builders.append(builder)
+    return (lambda v, s, t: [build(v, s, t) for build in builders]), position
+
+
+class _Table(object):
+    """The entries of a string or timestamp table, decoded on first use."""
+
+    def __init__(self, decode, count):
+        self._decode = decode
+        self._values = [None] * count
+
+    def __len__(self):
+        return len(self._values)
+
+    def __getitem__(self, index):
+        value = self._values[index]
+        if value is None:
+            value = self._values[index] = self._decode(index)
+        return value
+
+    def decode_all(self):
+        """Return every entry as a list."""
+        values = self._values
+        for index, value in enumerate(values):
+            if value is None:
+                values[index] = self._decode(index)
+        return values
+
+
+class Snapshot(object):
+    """
+    A memory-mapped snapshot file.
+
+    Records are decoded on access, as plain dicts or wrapped in
+    alert_class, so reading a few alerts out of a large snapshot only
+    touches the pages holding them and the strings they use. strings and
+    timestamps (nanoseconds since the epoch) index the interned tables.
+
+    """
+
+    def __init__(self, path, alert_class=None):
+        """
+        Init method.
+
+        Parameters
+        ----------
+        path : str
+            The snapshot file.
+        alert_class : type
+            (Default value = None)
+            The class records are wrapped in, plain dicts if None.
+
+
+        Raises
+        ------
+        ValueError
+            Raise a ValueError if the file isn't a snapshot.
+
+        """
+        self.path = path
+        self.alert_class = alert_class
+        with open(path, 'rb') as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            fields = _parse_header(self._map, path)
+        except ValueError:
+            self._map.close()
+            raise
+        (_, _, kind, self.taken_at, self._count, self._string_count,
+         self._time_count, self._shape_count, self._strings_at,
+         self._times_at, self._shapes_at, self._index_at, self._records_at,
+         self._end) = fields
+        self.kind = KINDS[kind]
+        self._time_base, self._time_width = _TIME_TABLE.unpack_from(
+            self._map, self._times_at)
+        self.strings = _Table(self._string, self._string_count)
+        self.timestamps = _Table(self._timestamp, self._time_count)
+        self._time_strings = _Table(
+            lambda index: format_epoch_ns(self.timestamps[index]),
+            self._time_count)
+        self._shapes = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Unmap the file."""
+        self._map.close()
+
+    def __len__(self):
+        return self._count
+
+    def __repr__(self):
+        return '<Snapshot: {} {} at {}>'.format(
+            self._count, self.kind, format_epoch_ns(self.taken_at))
+
+    def _string(self, index):
+        ends = self._strings_at
+        start = _INDEX_ENTRY.unpack_from(self._map, ends + 4 * index - 4)[0] \
+            if index else 0
+        end, = _INDEX_ENTRY.unpack_from(self._map, ends + 4 * index)
+        data = self._strings_at + 4 * self._string_count
+        return str(self._map[data + start:data + end], 'utf-8')
+
+    def _timestamp(self, index):
+        position = self._times_at + _TIME_TABLE.size + self._time_width * index
+        return self._time_base + int.from_bytes(
+            self._map[position:position + self._time_width], 'little')
+
+    def _decoded(self):
+        if self._shapes is None:
+            skeletons = codec.loads(self._map[self._shapes_at:self._index_at])
+            shapes = list()
+            for skeleton in skeletons:
+                fmt = struct.Struct('<' + ''.join(_slot_types(skeleton)))
+                shapes.append((fmt, _compile(skeleton, 0)[0]))
+            self._shapes = shapes
+        return self._shapes
+
+    def _read(self, offset, shapes, strings, times):
+        position = self._records_at + offset
+        shape_id, = _SHAPE_ID.unpack_from(self._map, position)
+        fmt, build = shapes[shape_id]
+        record = build(fmt.unpack_from(self._map, position + 2), strings,
+                       times)
+        if self.alert_class is not None:
+            return self.alert_class(record)
+        return record
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError('snapshot index out of range')
+        offset, = _INDEX_ENTRY.unpack_from(self._map,
+                                           self._index_at + 4 * index)
+        return self._read(offset, self._decoded(), self.strings,
+                          self._time_strings)
+
+    def __iter__(self):
+        # Reading everything, decode the tables in one go up front
+        shapes = self._decoded()
+        strings = self.strings.decode_all()
+        times = self._time_strings.decode_all()
+        offsets = struct.unpack_from('<{}I'.format(self._count), self._map,
+                                     self._index_at)
+        for offset in offsets:
+            yield self._read(offset, shapes, strings, times)
+
+
+def iter_snapshots(source, start=None, end=None, kind=None,
+                   alert_class=None):
+    """
+    Open the snapshots of an archive in time order.
+
+    Only the headers are read to select and order the files, each snapshot
+    is mapped when it is reached and closed once the next one is asked
+    for, so days of snapshots can be replayed in constant memory.
+
+    Parameters
+    ----------
+    source : str or iterable
+        A directory, a glob pattern, or snapshot paths.
+    start : int
+        (Default value = None)
+        The earliest capture time in nanoseconds since the epoch.
+    end : int
+        (Default value = None)
+        The latest capture time in nanoseconds since the epoch.
+    kind : str
+        (Default value = None)
+        Only the snapshots of this kind, any if None.
+    alert_class : type
+        (Default value = None)
+        The class records are wrapped in, plain dicts if None.
+
+
+    Yields
+    ------
+    Snapshot
+        Each selected snapshot, oldest first.
+
+    """
+    if isinstance(source, str):
+        if os.path.isdir(source):
+            source = os.path.join(source, '*' + EXTENSION)
+        paths = glob.glob(source)
+    else:
+        paths = list(source)
+    selected = list()
+    for path in paths:
+        header = read_header(path)
+        if kind is not None and header['kind'] != kind:
+            continue
+        if start is not None and header['taken_at'] < start:
+            continue
+        if end is not None and header['taken_at'] > end:
+            continue
+        selected.append((header['taken_at'], path))
+    for _, path in sorted(selected):
+        with Snapshot(path, alert_class) as snapshot:
+            yield snapshot
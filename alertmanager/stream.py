@@ -0,0 +1,152 @@
+import codecs
+import json
+
+
+_WHITESPACE = ' \t\n\r'
+
+
+class ArrayDecoder(object):
+    """
+    Incrementally decode a JSON array item by item.
+
+    Bytes are fed in arbitrary chunks, for example straight off a socket,
+    and every item that is complete so far is returned as soon as it has
+    arrived. Only the unconsumed tail of the document is buffered, so memory
+    stays flat however long the array is.
+
+    Items are decoded by the standard library's C decoder through
+    JSONDecoder.raw_decode, which, unlike the faster third party codecs, can
+    decode a value starting at an offset and tell us where it ended. An item
+    cut off by a chunk boundary simply fails to decode and is retried once
+    more data has arrived.
+
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._buf = ''
+        self._pos = 0
+        self._started = False
+        self._need_comma = False
+        self.done = False
+
+    def _skip(self, chars):
+        """Advance past any of the given characters, return the next one."""
+        buf = self._buf
+        pos = self._pos
+        end = len(buf)
+        while pos < end and buf[pos] in chars:
+            pos += 1
+        self._pos = pos
+        return buf[pos] if pos < end else None
+
+    def feed(self, chunk):
+        """
+        Add a chunk of bytes and return the items it completed.
+
+        Parameters
+        ----------
+        chunk : bytes
+            The next piece of the document.
+
+
+        Returns
+        -------
+        list
+            Every item completed by this chunk, decoded.
+
+
+        Raises
+        ------
+        ValueError
+            Raise a ValueError if the document isn't a JSON array.
+
+        """
+        text = self._utf8.decode(chunk)
+        if self.done:
+            if text.strip():
+                raise ValueError('Unexpected data after the JSON array')
+            return []
+        self._buf = self._buf[self._pos:] + text
+        self._pos = 0
+        items = list()
+        if not self._started:
+            char = self._skip(_WHITESPACE)
+            if char is None:
+                return items
+            if char != '[':
+                raise ValueError('Expected a JSON array')
+            self._pos += 1
+            self._started = True
+        decode = self._decoder.raw_decode
+        buf = self._buf
+        while True:
+            char = self._skip(_WHITESPACE)
+            if char is None:
+                break
+            if char == ']':
+                self._pos += 1
+                self.done = True
+                if buf[self._pos:].strip():
+                    raise ValueError('Unexpected data after the JSON array')
+                break
+            if self._need_comma:
+                if char != ',':
+                    raise ValueError(
+                        'Expected , or ] at offset {}'.format(self._pos))
+                self._pos += 1
+                self._need_comma = False
+                if self._skip(_WHITESPACE) is None:
+                    break
+            try:
+                item, end = decode(buf, self._pos)
+            except ValueError:
+                # Most likely cut off by the chunk boundary, close() reports
+                # it if no more data comes.
+                break
+            if end >= len(buf):
+                # A number at the very end may still be growing
+                break
+            items.append(item)
+            self._pos = end
+            self._need_comma = True
+        return items
+
+    def close(self):
+        """
+        Signal the end of the document.
+
+        Raises
+        ------
+        ValueError
+            Raise a ValueError if the array was truncated or invalid.
+
+        """
+        if not self.done:
+            raise ValueError('Truncated or invalid JSON array near ==> '
+                             '{}'.format(self._buf[self._pos:][:80]))
+
+
+def iter_json_array(chunks):
+    """
+    Decode a JSON array item by item from an iterable of chunks.
+
+    Parameters
+    ----------
+    chunks : iterable
+        The document as a sequence of bytes chunks, e.g.
+        requests.Response.iter_content().
+
+
+    Yields
+    ------
+    object
+        Each decoded item of the array, as soon as it is complete.
+
+    """
+    decoder = ArrayDecoder()
+    for chunk in chunks:
+        for item in decoder.feed(chunk):
+            yield item
+    decoder.close()
@@ -0,0 +1,599 @@
+"""
+An in-process fake Alert Manager for tests and benchmarks.
+
+FakeAlertManager serves the v2 routes used by AlertManager from memory on a
+local port, with configurable latency, injected errors and a synthetic
+dataset of any size, so client code can be exercised without a real
+Alert Manager.
+"""
+from datetime import datetime, timedelta, timezone
+import gzip
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import random
+import re
+import threading
+import time
+import uuid
+from urllib.parse import parse_qs, urlsplit
+from . import codec
+from .index import AlertIndex
+from .matchers import compile_regex, matches_all, parse_matchers
+from .silencing import compile_silence, silenced_by
+from .timeutils import format_rfc3339 as _format, parse_rfc3339
+
+
+RESOLVE_TIMEOUT = timedelta(minutes=5)
+
+_SILENCE = re.compile(r'^/api/v2/silence/(?P<id>[^/]+)$')
+
+_UNSILENCED = {'state': 'active', 'silencedBy': [], 'inhibitedBy': []}
+
+
+def fingerprint(labels):
+    """
+    Return a fingerprint for a label set.
+
+    Like Alert Manager's, it is 16 hex digits derived from the sorted label
+    pairs, but it is a blake2b digest rather than Prometheus' FNV-1a hash,
+    which would be too slow to compute in Python for large datasets.
+
+    """
+    text = '\xff'.join('{}\xff{}'.format(name, labels[name])
+                       for name in sorted(labels))
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def _parse(value, default):
+    """Parse an optional timestamp field of a posted object."""
+    if not value or value.startswith('0001-01-01'):
+        return default
+    return parse_rfc3339(value)
+
+
+def make_alert(i):
+    """Return synthetic alert number i, as Prometheus would post it."""
+    return {
+        'labels': {
+            'alertname': 'SyntheticAlert{}'.format(i % 50),
+            'instance': 'host{}.example.com:9100'.format(i),
+            'job': 'node',
+            'severity': ('critical', 'warning', 'info')[i % 3],
+            'team': 'team{}'.format(i % 20),
+        },
+        'annotations': {
+            'summary': 'Synthetic alert number {}'.format(i),
+            'description': 'Generated by FakeAlertManager.',
+        },
+        'generatorURL': 'http://prometheus.example.com/graph',
+    }
+
+
+class FakeAlertManager(object):
+    """
+    An Alert Manager stand-in serving the v2 API from memory.
+
+    It implements GET/POST /api/v2/alerts, GET /api/v2/alerts/groups,
+    GET/POST /api/v2/silences, GET/DELETE /api/v2/silence/{id},
+    GET /api/v2/status and GET /api/v2/receivers. Alerts get fingerprints,
+    timestamps and a silenced state like they would from Alert Manager,
+    and get_alerts filters (matchers, silenced, receiver) are honoured.
+    Posted bodies may be gzip encoded.
+
+    Use it as a context manager, or call start() and stop().
+
+    """
+
+    def __init__(self, alerts=0, latency=0, error_rate=0.0, error_status=503,
+                 receiver='default', group_by=('alertname',),
+                 compress_responses=False, host='127.0.0.1', port=0):
+        """
+        Init method.
+
+        Parameters
+        ----------
+        alerts : int or iterable
+            (Default value = 0)
+            The initial alerts, or a number of synthetic alerts to create.
+        latency : float or tuple
+            (Default value = 0)
+            Seconds every request is delayed by, or a (min, max) range to
+            pick a random delay from.
+        error_rate : float
+            (Default value = 0.0)
+            Share of requests answered with error_status instead.
+        error_status : int
+            (Default value = 503)
+            The status code of injected errors.
+        receiver : str
+            (Default value = 'default')
+            The receiver every alert is routed to.
+        group_by : tuple
+            (Default value = ('alertname',))
+            The labels alert groups are formed by.
+        compress_responses : bool
+            (Default value = False)
+            Gzip response bodies over 1KiB for clients accepting it.
+        host : str
+            (Default value = '127.0.0.1')
+            The address to listen on.
+        port : int
+            (Default value = 0)
+            The port to listen on, 0 picks a free one.
+
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.receiver = receiver
+        self.group_by = tuple(group_by)
+        self.compress_responses = compress_responses
+        self.requests = dict()
+        self._address = (host, port)
+        self._server = None
+        self._thread = None
+        self._lock = threading.RLock()
+        self._failures = list()
+        self._index = AlertIndex()
+        self._silences = dict()
+        self._version = 0
+        self._encoded = None
+        self._started = datetime.now(timezone.utc)
+        if isinstance(alerts, int):
+            alerts = (make_alert(i) for i in range(alerts))
+        self.add_alerts(alerts)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        """Start serving from a background daemon thread."""
+        self._server = ThreadingHTTPServer(self._address, _Handler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name='fake-alertmanager', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and release the port."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+            self._thread = None
+
+    @property
+    def host(self):
+        """Return the host to pass to AlertManager, e.g. http://127.0.0.1."""
+        return 'http://{}'.format(self._server.server_address[0])
+
+    @property
+    def port(self):
+        """Return the port the server listens on."""
+        return self._server.server_address[1]
+
+    @property
+    def url(self):
+        """Return the base URL of the server."""
+        return '{}:{}'.format(self.host, self.port)
+
+    def client(self, **kwargs):
+        """Return an AlertManager pointed at this server."""
+        from .alertmanager import AlertManager
+        return AlertManager(self.host, self.port, **kwargs)
+
+    def fail_next(self, count=1, status=None, route=''):
+        """
+        Answer the next requests with an error.
+
+        Parameters
+        ----------
+        count : int
+            (Default value = 1)
+            How many requests fail.
+        status : int
+            (Default value = None)
+            Their status code, defaults to error_status.
+        route : str
+            (Default value = '')
+            Only fail requests whose path starts with this prefix.
+
+        """
+        with self._lock:
+            self._failures.extend([(route, status or self.error_status)] *
+                                  count)
+
+    @property
+    def alerts(self):
+        """Return the stored alerts, including resolved ones."""
+        with self._lock:
+            return list(self._index)
+
+    @property
+    def silences(self):
+        """Return the stored silences, including expired ones."""
+        with self._lock:
+            return list(self._silences.values())
+
+    def clear(self):
+        """Drop every alert and silence."""
+        with self._lock:
+            self._index = AlertIndex()
+            self._silences.clear()
+            self._changed()
+
+    def _changed(self):
+        self._version += 1
+        self._encoded = None
+
+    def add_alerts(self, alerts):
+        """
+        Store alerts as if Prometheus posted them.
+
+        An alert with the same label set as a stored one replaces it, the
+        original startsAt being kept while it is still firing.
+
+        Parameters
+        ----------
+        alerts : iterable
+            Alert dicts with at least labels.
+
+
+        Raises
+        ------
+        ValueError
+            Raise a ValueError for an alert without labels.
+
+        """
+        now = datetime.now(timezone.utc)
+        receivers = [{'name': self.receiver}]
+        # Most alerts of a batch share their timestamps
+        formatted = dict()
+
+        def format_once(moment):
+            text = formatted.get(moment)
+            if text is None:
+                text = formatted[moment] = _format(moment)
+            return text
+
+        with self._lock:
+            for alert in alerts:
+                labels = dict(alert.get('labels') or {})
+                if not labels:
+                    raise ValueError('Alert has no labels')
+                key = fingerprint(labels)
+                previous = self._index.get(key)
+                starts = _parse(alert.get('startsAt'), None)
+                if starts is None:
+                    starts = now
+                    if previous is not None and \
+                            previous['_endsAt'] > now:
+                        starts = previous['_startsAt']
+                ends = _parse(alert.get('endsAt'), now + RESOLVE_TIMEOUT)
+                # Everything but the status is rendered once, up front
+                self._index.add({
+                    'labels': labels,
+                    'fingerprint': key,
+                    '_startsAt': starts,
+                    '_endsAt': ends,
+                    '_view': {
+                        'labels': labels,
+                        'annotations': dict(alert.get('annotations') or {}),
+                        'startsAt': format_once(starts),
+                        'endsAt': format_once(ends),
+                        'updatedAt': format_once(now),
+                        'generatorURL': alert.get('generatorURL', ''),
+                        'fingerprint': key,
+                        'receivers': receivers,
+                    },
+                })
+            self._changed()
+
+    def add_silence(self, silence):
+        """
+        Create or update a silence.
+
+        Parameters
+        ----------
+        silence : dict
+            A silence as posted to /api/v2/silences. An id updates the
+            silence with that id.
+
+
+        Returns
+        -------
+        str
+            The id of the silence.
+
+
+        Raises
+        ------
+        ValueError
+            Raise a ValueError for a silence without matchers, with an
+            invalid matcher or ending before it starts.
+        KeyError
+            Raise a KeyError when updating an unknown silence.
+
+        """
+        compile_silence(silence)
+        if not silence.get('matchers'):
+            raise ValueError('Silence has no matchers')
+        now = datetime.now(timezone.utc)
+        starts = max(_parse(silence.get('startsAt'), now), now)
+        ends = _parse(silence.get('endsAt'), None)
+        if ends is None or ends < starts:
+            raise ValueError('Silence ends before it starts')
+        with self._lock:
+            silence_id = silence.get('id')
+            if silence_id and silence_id not in self._silences:
+                raise KeyError(silence_id)
+            silence_id = silence_id or str(uuid.uuid4())
+            self._silences[silence_id] = {
+                'id': silence_id,
+                'matchers': [dict(m) for m in silence['matchers']],
+                'createdBy': silence.get('createdBy', ''),
+                'comment': silence.get('comment', ''),
+                '_startsAt': starts,
+                '_endsAt': ends,
+                '_updatedAt': now,
+            }
+            self._changed()
+        return silence_id
+
+    def expire_silence(self, silence_id):
+        """End a silence now, raise a KeyError if it doesn't exist."""
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            silence = self._silences[silence_id]
+            if silence['_endsAt'] > now:
+                silence['_endsAt'] = now
+                silence['_startsAt'] = min(silence['_startsAt'], now)
+                silence['_updatedAt'] = now
+                self._changed()
+
+    @staticmethod
+    def _silence_state(silence, now):
+        if silence['_endsAt'] <= now:
+            return 'expired'
+        if silence['_startsAt'] > now:
+            return 'pending'
+        return 'active'
+
+    def _render_silence(self, silence, now):
+        return {
+            'id': silence['id'],
+            'matchers': silence['matchers'],
+            'startsAt': _format(silence['_startsAt']),
+            'endsAt': _format(silence['_endsAt']),
+            'updatedAt': _format(silence['_updatedAt']),
+            'createdBy': silence['createdBy'],
+            'comment': silence['comment'],
+            'status': {'state': self._silence_state(silence, now)},
+        }
+
+    def _render_alerts(self, now):
+        """Return the unresolved alerts as Alert Manager reports them."""
+        active = [s for s in self._silences.values()
+                  if self._silence_state(s, now) == 'active']
+        muted = silenced_by(active, self._index) if active else {}
+        rendered = list()
+        for alert in self._index:
+            if alert['_endsAt'] <= now:
+                continue
+            silenced = muted.get(alert['fingerprint'])
+            if silenced:
+                status = {'state': 'suppressed', 'silencedBy': silenced,
+                          'inhibitedBy': []}
+            else:
+                status = _UNSILENCED
+            rendered.append(dict(alert['_view'], status=status))
+        return rendered
+
+    def _alerts_body(self, now):
+        """Return the encoded unfiltered alert list, cached for a second."""
+        encoded = self._encoded
+        if encoded is not None and encoded[0] == self._version and \
+                now - encoded[1] < timedelta(seconds=1):
+            return encoded[2]
+        body = codec.dumps(self._render_alerts(now))
+        self._encoded = (self._version, now, body)
+        return body
+
+    def _filtered_alerts(self, query, now):
+        alerts = self._render_alerts(now)
+        matchers = list()
+        for text in query.get('filter', []):
+            matchers.extend(parse_matchers(text))
+        flags = dict((name, query.get(name, ['true'])[0].lower() != 'false')
+                     for name in ('active', 'silenced', 'inhibited',
+                                  'unprocessed'))
+        receiver = query.get('receiver', [None])[0]
+        if receiver:
+            receiver = compile_regex(receiver)
+        result = list()
+        for alert in alerts:
+            if not matches_all(matchers, alert['labels']):
+                continue
+            suppressed = alert['status']['state'] == 'suppressed'
+            if suppressed and not flags['silenced']:
+                continue
+            if not suppressed and not flags['active']:
+                continue
+            if receiver and not receiver(self.receiver):
+                continue
+            result.append(alert)
+        return result
+
+    def _groups(self, now):
+        groups = dict()
+        for alert in self._render_alerts(now):
+            labels = dict((name, alert['labels'][name])
+                          for name in self.group_by
+                          if name in alert['labels'])
+            key = tuple(sorted(labels.items()))
+            group = groups.setdefault(key, {
+                'labels': labels,
+                'receiver': {'name': self.receiver},
+                'alerts': [],
+            })
+            group['alerts'].append(alert)
+        return list(groups.values())
+
+    def _status(self, now):
+        return {
+            'cluster': {
+                'name': 'fake-0',
+                'status': 'ready',
+                'peers': [{'name': 'fake-0',
+                           'address': '{}:9094'.format(
+                               self._server.server_address[0])}],
+            },
+            'config': {'original': 'route:\n  receiver: {}\n'.format(
+                self.receiver)},
+            'uptime': _format(self._started),
+            'versionInfo': {'version': 'fake', 'branch': '', 'revision': '',
+                            'buildUser': '', 'buildDate': '',
+                            'goVersion': ''},
+        }
+
+    def _injected_error(self, path):
+        """Return the status of an injected error for this request, if any."""
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+            for position, (route, status) in enumerate(self._failures):
+                if path.startswith(route):
+                    del self._failures[position]
+                    return status
+        if self.error_rate and random.random() < self.error_rate:
+            return self.error_status
+        return None
+
+    def _delay(self):
+        latency = self.latency
+        if isinstance(latency, (tuple, list)):
+            latency = random.uniform(*latency)
+        if latency:
+            time.sleep(latency)
+
+    def handle(self, method, path, query, body):
+        """
+        Answer one request.
+
+        Returns
+        -------
+        tuple
+            The status code and the body, either bytes or an object to
+            encode as JSON.
+
+        """
+        self._delay()
+        status = self._injected_error(path)
+        if status is not None:
+            return status, b'injected error'
+        now = datetime.now(timezone.utc)
+        try:
+            with self._lock:
+                return self._route(method, path, query, body, now)
+        except (ValueError, TypeError, AttributeError) as err:
+            return 400, str(err).encode('utf-8')
+        except KeyError as err:
+            return 404, 'not found: {}'.format(err).encode('utf-8')
+
+    def _route(self, method, path, query, body, now):
+        if path == '/api/v2/alerts':
+            if method == 'POST':
+                alerts = codec.loads(body)
+                if not isinstance(alerts, list):
+                    raise ValueError('Expected a list of alerts')
+                self.add_alerts(alerts)
+                return 200, b''
+            if any(query.get(name) for name in ('filter', 'receiver')) or \
+                    any(query.get(name, ['true'])[0].lower() == 'false'
+                        for name in ('active', 'silenced', 'inhibited',
+                                     'unprocessed')):
+                return 200, self._filtered_alerts(query, now)
+            return 200, self._alerts_body(now)
+        if path == '/api/v2/alerts/groups' and method == 'GET':
+            return 200, self._groups(now)
+        if path == '/api/v2/silences':
+            if method == 'POST':
+                return 200, {'silenceID': self.add_silence(codec.loads(body))}
+            return 200, self._silences_matching(query, now)
+        match = _SILENCE.match(path)
+        if match is not None:
+            silence_id = match.group('id')
+            if method == 'DELETE':
+                self.expire_silence(silence_id)
+                return 200, b''
+            return 200, self._render_silence(self._silences[silence_id], now)
+        if path == '/api/v2/status' and method == 'GET':
+            return 200, self._status(now)
+        if path == '/api/v2/receivers' and method == 'GET':
+            return 200, [{'name': self.receiver}]
+        return 404, b'not found'
+
+    def _silences_matching(self, query, now):
+        """Render the silences, filtered like Alert Manager does."""
+        filters = list()
+        for text in query.get('filter', []):
+            filters.extend(parse_matchers(text))
+        result = list()
+        for silence in self._silences.values():
+            values = dict((m['name'], m['value'])
+                          for m in silence['matchers'])
+            if all(f.name in values and f.matches_value(values[f.name])
+                   for f in filters):
+                result.append(self._render_silence(silence, now))
+        return result
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Translate HTTP requests into FakeAlertManager.handle calls."""
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately, don't let Nagle's algorithm
+    # hold the body back until the client's delayed ACK.
+    disable_nagle_algorithm = True
+
+    def _dispatch(self, method):
+        parts = urlsplit(self.path)
+        body = b''
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            body = self.rfile.read(length)
+        if self.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        status, payload = self.server.fake.handle(
+            method, parts.path, parse_qs(parts.query), body)
+        if not isinstance(payload, bytes):
+            payload = codec.dumps(payload)
+        headers = {'Content-Type': 'application/json'}
+        if self.server.fake.compress_responses and len(payload) > 1024 and \
+                'gzip' in self.headers.get('Accept-Encoding', ''):
+            payload = gzip.compress(payload, compresslevel=1)
+            headers['Content-Encoding'] = 'gzip'
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+    def log_message(self, *args):
+        pass
@@ -0,0 +1,171 @@
+from datetime import datetime, timedelta
+import time
+from .lazy import LazyAlertList
+from .timeutils import parse_rfc3339
+
+
+def _seconds(value):
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    return float(value)
+
+
+def _now(now):
+    if now is None:
+        return time.time()
+    if isinstance(now, datetime):
+        return now.timestamp()
+    return float(now)
+
+
+def _records(alerts):
+    """Return the alerts to work on, plain dicts for a LazyAlertList."""
+    if isinstance(alerts, LazyAlertList):
+        return alerts.items
+    return alerts if isinstance(alerts, list) else list(alerts)
+
+
+def _rebuild(alerts, selected):
+    """Return selected records in the same kind of container as alerts."""
+    if isinstance(alerts, LazyAlertList):
+        return LazyAlertList(alert_class=alerts.alert_class, items=selected)
+    return selected
+
+
+def epochs(alerts, field='startsAt'):
+    """
+    Return a timestamp field of every alert as seconds since the epoch.
+
+    Alert and Silence objects parse each field once and keep the result.
+    Plain dicts, including the items of a LazyAlertList, are parsed without
+    being wrapped, and a timestamp shared by many alerts is parsed once.
+
+    Parameters
+    ----------
+    alerts : iterable
+        Alerts or silences, as objects, compact objects or plain dicts.
+    field : str
+        (Default value = 'startsAt')
+        One of startsAt, endsAt or updatedAt.
+
+
+    Returns
+    -------
+    list
+        One float per alert, None where the field isn't set.
+
+    """
+    return _epochs(_records(alerts), field)
+
+
+def _epochs(records, field):
+    seen = dict()
+    values = list()
+    for record in records:
+        epoch = getattr(record, 'epoch', None)
+        if epoch is not None:
+            values.append(epoch(field))
+            continue
+        raw = record.get(field)
+        value = seen.get(raw)
+        if value is None and raw:
+            value = seen[raw] = parse_rfc3339(raw).timestamp()
+        values.append(value)
+    return values
+
+
+def sort_by_time(alerts, field='startsAt', reverse=False):
+    """
+    Sort alerts or silences by one of their timestamps.
+
+    Parameters
+    ----------
+    alerts : iterable
+        Alerts or silences, as objects, compact objects or plain dicts.
+    field : str
+        (Default value = 'startsAt')
+        One of startsAt, endsAt or updatedAt.
+    reverse : bool
+        (Default value = False)
+        Newest first instead of oldest first.
+
+
+    Returns
+    -------
+    list or LazyAlertList
+        The sorted alerts, those without the field last. A LazyAlertList
+        comes back as a LazyAlertList.
+
+    """
+    records = _records(alerts)
+    keys = _epochs(records, field)
+    present = [i for i in range(len(records)) if keys[i] is not None]
+    present.sort(key=keys.__getitem__, reverse=reverse)
+    missing = [i for i in range(len(records)) if keys[i] is None]
+    return _rebuild(alerts, [records[i] for i in present + missing])
+
+
+def started_between(alerts, start=None, end=None):
+    """
+    Select the alerts that started within a time range.
+
+    Parameters
+    ----------
+    alerts : iterable
+        Alerts, as objects, compact objects or plain dicts.
+    start : datetime or float
+        (Default value = None)
+        The earliest start time, unbounded if None.
+    end : datetime or float
+        (Default value = None)
+        The latest start time, unbounded if None.
+
+
+    Returns
+    -------
+    list or LazyAlertList
+        The matching alerts, in their original order.
+
+    """
+    records = _records(alerts)
+    low = float('-inf') if start is None else _now(start)
+    high = float('inf') if end is None else _now(end)
+    starts = _epochs(records, 'startsAt')
+    return _rebuild(alerts, [record for record, started
+                             in zip(records, starts)
+                             if started is not None and low <= started <= high])
+
+
+def firing_longer_than(alerts, duration, now=None):
+    """
+    Select the alerts that have been firing for at least a given time.
+
+    An alert is firing if it has started and hasn't ended, its endsAt is
+    unset or still in the future.
+
+    Parameters
+    ----------
+    alerts : iterable
+        Alerts, as objects, compact objects or plain dicts.
+    duration : timedelta or float
+        The minimum time the alert has been firing, seconds if a number.
+    now : datetime or float
+        (Default value = None)
+        The reference time, the current time if None.
+
+
+    Returns
+    -------
+    list or LazyAlertList
+        The matching alerts, in their original order.
+
+    """
+    records = _records(alerts)
+    now = _now(now)
+    cutoff = now - _seconds(duration)
+    starts = _epochs(records, 'startsAt')
+    ends = _epochs(records, 'endsAt')
+    return _rebuild(alerts, [
+        record for record, started, ended in zip(records, starts, ends)
+        if started is not None and started <= cutoff and
+        (ended is None or ended > now)])
@@ -0,0 +1,275 @@
+import calendar
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+import re
+import threading
+import time
+
+
+_RFC3339 = re.compile(
+    r'(\d{4})-(\d\d)-(\d\d)[Tt ](\d\d):(\d\d):(\d\d)(?:\.(\d+))?'
+    r'(?:([Zz])|([+-])(\d\d):(\d\d))$')
+
+_OFFSETS = dict()
+
+# 'in 5 minutes', 'in an hour', '90 seconds ago'
+_RELATIVE = re.compile(
+    r'(in\s+)?(\d+(?:\.\d+)?|an?)\s*'
+    r'(s|secs?|seconds?|m|mins?|minutes?|h|hrs?|hours?|d|days?|w|weeks?)'
+    r'(\s+ago)?$', re.IGNORECASE)
+
+_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+_local = threading.local()
+
+
+def _offset(sign, hours, minutes):
+    """Return a cached timezone for a +HH:MM/-HH:MM offset."""
+    key = (sign, hours, minutes)
+    tz = _OFFSETS.get(key)
+    if tz is None:
+        delta = timedelta(hours=int(hours), minutes=int(minutes))
+        tz = timezone(-delta if sign == '-' else delta)
+        _OFFSETS[key] = tz
+    return tz
+
+
+def parse_rfc3339(value):
+    """
+    Parse an RFC3339 timestamp into an aware datetime.
+
+    Alert Manager emits timestamps with up to nanosecond precision, which
+    datetime can't represent, so fractional seconds are truncated to
+    microseconds. The result is normalized to UTC.
+
+    Parameters
+    ----------
+    value : str
+        A timestamp such as '2018-11-08T16:25:02.327027475Z'.
+
+
+    Returns
+    -------
+    datetime
+        The timestamp as an aware UTC datetime.
+
+
+    Raises
+    ------
+    ValueError
+        Raise a ValueError if value isn't an RFC3339 timestamp.
+
+    """
+    match = _RFC3339.match(value)
+    if match is None:
+        raise ValueError('Invalid RFC3339 timestamp ==> {}'.format(value))
+    (year, month, day, hour, minute, second, fraction, zulu, sign, off_hours,
+     off_minutes) = match.groups()
+    microsecond = int(fraction[:6].ljust(6, '0')) if fraction else 0
+    tz = timezone.utc if zulu else _offset(sign, off_hours, off_minutes)
+    parsed = datetime(int(year), int(month), int(day), int(hour), int(minute),
+                      int(second), microsecond, tz)
+    if tz is not timezone.utc:
+        parsed = parsed.astimezone(timezone.utc)
+    return parsed
+
+
+def parse_epoch_ns(value):
+    """
+    Parse an RFC3339 timestamp into integer nanoseconds since the epoch.
+
+    Unlike parse_rfc3339 this keeps the full nanosecond precision Alert
+    Manager emits.
+
+    Parameters
+    ----------
+    value : str
+        A timestamp such as '2018-11-08T16:25:02.327027475Z'.
+
+
+    Returns
+    -------
+    int
+        Nanoseconds since 1970-01-01T00:00:00Z.
+
+
+    Raises
+    ------
+    ValueError
+        Raise a ValueError if value isn't an RFC3339 timestamp.
+
+    """
+    match = _RFC3339.match(value)
+    if match is None:
+        raise ValueError('Invalid RFC3339 timestamp ==> {}'.format(value))
+    (year, month, day, hour, minute, second, fraction, zulu, sign, off_hours,
+     off_minutes) = match.groups()
+    seconds = calendar.timegm((int(year), int(month), int(day), int(hour),
+                               int(minute), int(second)))
+    if not zulu:
+        offset = int(off_hours) * 3600 + int(off_minutes) * 60
+        seconds += offset if sign == '-' else -offset
+    nanos = int(fraction[:9].ljust(9, '0')) if fraction else 0
+    return seconds * 1000000000 + nanos
+
+
+def format_epoch_ns(value):
+    """
+    Render nanoseconds since the epoch as an RFC3339 UTC timestamp.
+
+    This is the format Alert Manager writes: nanosecond precision with the
+    trailing zeros of the fraction trimmed. It is the inverse of
+    parse_epoch_ns for timestamps in that format.
+
+    Parameters
+    ----------
+    value : int
+        Nanoseconds since 1970-01-01T00:00:00Z.
+
+
+    Returns
+    -------
+    str
+        A timestamp such as '2018-11-08T16:25:02.327027475Z'.
+
+    """
+    seconds, nanos = divmod(value, 1000000000)
+    text = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds))
+    if nanos:
+        text += '.{:09d}'.format(nanos).rstrip('0')
+    return text + 'Z'
+
+
+def format_rfc3339(moment):
+    """
+    Render a datetime as an RFC3339 UTC timestamp.
+
+    Parameters
+    ----------
+    moment : datetime
+        The time to render. Naive datetimes are taken to be local time,
+        like the ones datetime.now() returns.
+
+
+    Returns
+    -------
+    str
+        A timestamp such as '2018-11-08T16:25:02.327027Z'.
+
+    """
+    if moment.tzinfo is not timezone.utc:
+        moment = moment.astimezone(timezone.utc)
+    return moment.replace(tzinfo=None).isoformat('T', 'microseconds') + 'Z'
+
+
+def utc_now():
+    """Return the current time, or the frozen one inside frozen_now()."""
+    batch = getattr(_local, 'batch', None)
+    if batch is not None:
+        return batch[0]
+    return datetime.now(timezone.utc)
+
+
+@contextmanager
+def frozen_now(moment=None):
+    """
+    Use the same reference time for relative end times in this block.
+
+    Setting the end time of a whole batch of alerts then reads the clock
+    once, and every distinct string such as 'in 5 minutes' is only
+    converted once. The frozen time is local to the current thread.
+
+    Parameters
+    ----------
+    moment : datetime
+        (Default value = None)
+        The reference time, the current time if None.
+
+    """
+    previous = getattr(_local, 'batch', None)
+    _local.batch = (moment or datetime.now(timezone.utc), dict())
+    try:
+        yield _local.batch[0]
+    finally:
+        _local.batch = previous
+
+
+def _relative(text, now):
+    """Resolve 'in N units' and 'N units ago', or return None."""
+    match = _RELATIVE.match(text)
+    if match is None:
+        return None
+    future, amount, unit, past = match.groups()
+    if bool(future) == bool(past):
+        return None
+    amount = 1 if amount.lower() in ('a', 'an') else float(amount)
+    delta = timedelta(seconds=amount * _UNITS[unit[0].lower()])
+    return now + delta if future else now - delta
+
+
+def _convert(value, now):
+    if isinstance(value, datetime):
+        return format_rfc3339(value)
+    if isinstance(value, timedelta):
+        return format_rfc3339((now or datetime.now(timezone.utc)) + value)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        try:
+            moment = datetime.fromtimestamp(value, timezone.utc)
+        except (OverflowError, OSError, ValueError):
+            raise ValueError('Time out of range ==> {!r}'.format(value))
+        return format_rfc3339(moment)
+    if not isinstance(value, str):
+        raise ValueError('Unsupported time ==> {!r}'.format(value))
+    text = value.strip()
+    if text.lower() == 'now':
+        return format_rfc3339(now or datetime.now(timezone.utc))
+    moment = _relative(text, now or datetime.now(timezone.utc))
+    if moment is None and _RFC3339.match(text):
+        moment = parse_rfc3339(text)
+    if moment is not None:
+        return format_rfc3339(moment)
+    # Anything else goes through maya's natural language parsing, which is
+    # both slow to import and slow to run
+    import maya
+    return maya.when(text).rfc3339()
+
+
+def to_rfc3339(value):
+    """
+    Convert a point in time to an RFC3339 UTC timestamp.
+
+    The common forms are handled directly: datetimes, naive ones being
+    local time, timedeltas from now, epoch seconds, RFC3339 strings, 'now',
+    and relative strings such as 'in 5 minutes', 'in an hour' or '30s ago'.
+    Any other string is parsed by maya, e.g. 'tomorrow'.
+
+    Parameters
+    ----------
+    value : str, datetime, timedelta, int or float
+        The time to convert.
+
+
+    Returns
+    -------
+    str
+        A timestamp such as '2018-11-08T16:25:02.327027Z'.
+
+
+    Raises
+    ------
+    ValueError
+        Raise a ValueError if the time can't be understood.
+
+    """
+    batch = getattr(_local, 'batch', None)
+    if batch is None:
+        return _convert(value, None)
+    cacheable = type(value) in (str, timedelta)
+    if cacheable:
+        cached = batch[1].get(value)
+        if cached is not None:
+            return cached
+    result = _convert(value, batch[0])
+    if cacheable:
+        batch[1][value] = result
+    return result
@@ -0,0 +1,197 @@
+import logging
+import socket
+import threading
+import requests
+from requests.adapters import HTTPAdapter, DEFAULT_POOLSIZE
+from urllib3.connection import HTTPConnection
+
+
+log = logging.getLogger(__name__)
+
+_shared = dict()
+_shared_lock = threading.Lock()
+_http2_enabled = False
+
+
+def keepalive_options(idle, interval=None, count=3):
+    """
+    Return the socket options turning on TCP keep-alive.
+
+    Parameters
+    ----------
+    idle : int
+        Seconds a connection sits idle before the first probe.
+    interval : int
+        (Default value = None)
+        Seconds between probes, defaults to idle / 3.
+    count : int
+        (Default value = 3)
+        Unanswered probes before the connection is dropped.
+
+
+    Returns
+    -------
+    list
+        (level, option, value) tuples for urllib3's socket_options. Options
+        the platform doesn't support are left out.
+
+    """
+    interval = interval or max(idle // 3, 1)
+    options = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    # Linux calls it TCP_KEEPIDLE, macOS TCP_KEEPALIVE.
+    idle_option = getattr(socket, 'TCP_KEEPIDLE',
+                          getattr(socket, 'TCP_KEEPALIVE', None))
+    for option, value in ((idle_option, idle),
+                          (getattr(socket, 'TCP_KEEPINTVL', None), interval),
+                          (getattr(socket, 'TCP_KEEPCNT', None), count)):
+        if option is not None:
+            options.append((socket.IPPROTO_TCP, option, value))
+    return options
+
+
+class KeepAliveAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose connections send TCP keep-alive probes.
+
+    Idle pooled connections to Alert Manager are otherwise silently dropped
+    by load balancers and NAT gateways, and the next request on them fails
+    or hangs until it times out.
+
+    """
+
+    def __init__(self, idle=60, interval=None, count=3, **kwargs):
+        """
+        Init method.
+
+        Parameters
+        ----------
+        idle : int
+            (Default value = 60)
+            Seconds a connection sits idle before the first probe.
+        interval : int
+            (Default value = None)
+            Seconds between probes, defaults to idle / 3.
+        count : int
+            (Default value = 3)
+            Unanswered probes before the connection is dropped.
+        **kwargs : dict
+            Arguments passed on to HTTPAdapter, e.g. pool_maxsize.
+
+        """
+        self.socket_options = HTTPConnection.default_socket_options + \
+            keepalive_options(idle, interval, count)
+        super(KeepAliveAdapter, self).__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs.setdefault('socket_options', self.socket_options)
+        super(KeepAliveAdapter, self).init_poolmanager(*args, **kwargs)
+
+    def proxy_manager_for(self, proxy, **kwargs):
+        kwargs.setdefault('socket_options', self.socket_options)
+        return super(KeepAliveAdapter, self).proxy_manager_for(proxy,
+                                                               **kwargs)
+
+
+def enable_http2():
+    """
+    Let urllib3 negotiate HTTP/2 over TLS, if it can.
+
+    This needs urllib3 2.3 or later and the h2 package. urllib3 applies it
+    to every HTTPS connection of the process.
+
+    Returns
+    -------
+    bool
+        True if HTTP/2 is enabled.
+
+    """
+    global _http2_enabled
+    if not _http2_enabled:
+        try:
+            import h2  # noqa: F401
+            import urllib3.http2
+        except ImportError:
+            log.warning('HTTP/2 requires urllib3>=2.3 and h2, '
+                        'falling back to HTTP/1.1')
+            return False
+        urllib3.http2.inject_into_urllib3()
+        _http2_enabled = True
+    return True
+
+
+def make_session(pool_connections=DEFAULT_POOLSIZE,
+                 pool_maxsize=DEFAULT_POOLSIZE, pool_block=False,
+                 keepalive=0, http2=False):
+    """
+    Build a requests.Session with a tuned connection pool.
+
+    Parameters
+    ----------
+    pool_connections : int
+        (Default value = 10)
+        Number of hosts whose connection pools are kept.
+    pool_maxsize : int
+        (Default value = 10)
+        Connections kept open per host. Size it to the number of threads
+        sharing the session, e.g. post_alerts_bulk's max_workers, or
+        connections beyond it are discarded after every request.
+    pool_block : bool
+        (Default value = False)
+        Wait for a free connection instead of opening one that is thrown
+        away afterwards.
+    keepalive : int
+        (Default value = 0)
+        Seconds of idleness before TCP keep-alive probes are sent. 0 leaves
+        keep-alive off.
+    http2 : bool
+        (Default value = False)
+        Negotiate HTTP/2 with HTTPS hosts where supported, see
+        enable_http2.
+
+
+    Returns
+    -------
+    requests.Session
+        The configured session.
+
+    """
+    if http2:
+        enable_http2()
+    options = dict(pool_connections=pool_connections,
+                   pool_maxsize=pool_maxsize, pool_block=pool_block)
+    if keepalive:
+        adapter = KeepAliveAdapter(idle=keepalive, **options)
+    else:
+        adapter = HTTPAdapter(**options)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def shared_session(**options):
+    """
+    Return a process wide session for the given pool options.
+
+    AlertManager instances built with the same options, e.g. one per
+    worker or one per request handler, then reuse the same open
+    connections instead of each keeping its own pool.
+
+    Parameters
+    ----------
+    **options : dict
+        Arguments accepted by make_session.
+
+
+    Returns
+    -------
+    requests.Session
+        The session shared by every caller passing the same options.
+
+    """
+    key = tuple(sorted(options.items()))
+    with _shared_lock:
+        session = _shared.get(key)
+        if session is None:
+            session = _shared[key] = make_session(**options)
+    return session
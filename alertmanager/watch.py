@@ -0,0 +1,236 @@
+from collections import namedtuple
+import logging
+import random
+import threading
+from .alert_objects import alert_key
+
+
+log = logging.getLogger(__name__)
+
+ADDED = 'added'
+RESOLVED = 'resolved'
+CHANGED = 'changed'
+
+
+class AlertEvent(namedtuple('AlertEvent', ['kind', 'key', 'alert',
+                                           'previous', 'diff'])):
+    """
+    A change between two consecutive alert snapshots.
+
+    Attributes
+    ----------
+    kind : str
+        'added', 'resolved' or 'changed'.
+    key : str
+        The alert's fingerprint, or label set when it has none.
+    alert : Alert
+        The alert as it is now. For resolved alerts, its last known state.
+    previous : Alert
+        The alert as it was in the previous snapshot, None when added.
+    diff : dict
+        For changed alerts, each watched field that changed. Dict fields
+        such as labels and annotations map to {key: (old, new)} for the
+        keys that changed, other fields map to (old, new). Empty otherwise.
+
+    """
+
+    __slots__ = ()
+
+
+def diff_alerts(previous, current, fields):
+    """
+    Compare two versions of an alert.
+
+    Parameters
+    ----------
+    previous : Alert
+        The older version.
+    current : Alert
+        The newer version.
+    fields : iterable
+        The top level fields to compare.
+
+
+    Returns
+    -------
+    dict
+        The changed fields, see AlertEvent.diff. Empty if nothing changed.
+
+    """
+    diff = dict()
+    for field in fields:
+        old = previous.get(field)
+        new = current.get(field)
+        if old == new:
+            continue
+        if isinstance(old, dict) or isinstance(new, dict):
+            old = old or {}
+            new = new or {}
+            diff[field] = {key: (old.get(key), new.get(key))
+                           for key in old.keys() | new.keys()
+                           if old.get(key) != new.get(key)}
+        else:
+            diff[field] = (old, new)
+    return diff
+
+
+class AlertWatcher(object):
+    """
+    Turn get_alerts polling into a feed of changes.
+
+    Each poll is compared with the previous snapshot by fingerprint, and
+    only the alerts that appeared, disappeared or changed are reported, so
+    downstream work scales with churn rather than with the number of alerts.
+
+    Events can be consumed by iterating over the watcher or by registering
+    callbacks and calling run(), or start() to poll from a background
+    thread.
+
+    """
+
+    def __init__(self, manager, interval=30, jitter=0.1,
+                 fields=('labels', 'annotations', 'status'),
+                 emit_initial=True, **kwargs):
+        """
+        Init method.
+
+        Parameters
+        ----------
+        manager : AlertManager
+            The instance to poll. Anything with a get_alerts method works,
+            including MultiAlertManager.
+        interval : float
+            (Default value = 30)
+            Seconds between polls.
+        jitter : float
+            (Default value = 0.1)
+            Fraction of the interval the wait is randomly shortened or
+            lengthened by, so many watchers don't poll in lockstep.
+        fields : tuple
+            (Default value = ('labels', 'annotations', 'status'))
+            The fields compared to detect changes. endsAt and updatedAt are
+            left out by default because Alert Manager moves them every time
+            Prometheus re-sends an alert.
+        emit_initial : bool
+            (Default value = True)
+            Report every alert of the first snapshot as added.
+        **kwargs : dict
+            Arguments passed on to get_alerts, e.g. filter or compact.
+
+        """
+        self.manager = manager
+        self.interval = interval
+        self.jitter = jitter
+        self.fields = fields
+        self.emit_initial = emit_initial
+        self.kwargs = kwargs
+        self.snapshot = None
+        self._callbacks = list()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_callback(self, callback):
+        """
+        Register a function called with every event by run().
+
+        Parameters
+        ----------
+        callback : callable
+            Called with one AlertEvent.
+
+        """
+        self._callbacks.append(callback)
+
+    def poll(self):
+        """
+        Fetch a new snapshot and return what changed since the last one.
+
+        When a MultiAlertManager returns a partial result, the alerts of
+        the hosts that failed are missing rather than resolved. Alerts
+        absent from a partial snapshot are then kept as they were, and only
+        reported as resolved once a complete snapshot leaves them out.
+
+        Returns
+        -------
+        list
+            The AlertEvents of this poll.
+
+        """
+        alerts = self.manager.get_alerts(**self.kwargs)
+        current = dict()
+        for alert in alerts:
+            current[alert_key(alert)] = alert
+        previous = self.snapshot
+        if previous is not None and getattr(alerts, 'partial', False):
+            log.warning('Partial alert snapshot, not resolving alerts: %s',
+                        alerts.errors)
+            for key in previous.keys() - current.keys():
+                current[key] = previous[key]
+        self.snapshot = current
+        if previous is None:
+            if not self.emit_initial:
+                return []
+            previous = dict()
+        events = list()
+        for key, alert in current.items():
+            old = previous.get(key)
+            if old is None:
+                events.append(AlertEvent(ADDED, key, alert, None, {}))
+                continue
+            diff = diff_alerts(old, alert, self.fields)
+            if diff:
+                events.append(AlertEvent(CHANGED, key, alert, old, diff))
+        for key in previous.keys() - current.keys():
+            old = previous[key]
+            events.append(AlertEvent(RESOLVED, key, old, old, {}))
+        return events
+
+    def _wait(self):
+        """Sleep one jittered interval, return False if we were stopped."""
+        spread = self.interval * self.jitter
+        delay = self.interval + random.uniform(-spread, spread)
+        return not self._stop.wait(max(delay, 0))
+
+    def __iter__(self):
+        """
+        Yield events forever, polling every interval until stop().
+
+        A failed poll is logged and retried at the next interval, the
+        previous snapshot is kept so no changes are lost.
+
+        """
+        while not self._stop.is_set():
+            try:
+                events = self.poll()
+            except Exception:
+                log.exception('Polling alerts failed')
+                events = []
+            for event in events:
+                yield event
+            if not self._wait():
+                return
+
+    def run(self):
+        """Poll until stop(), passing every event to the callbacks."""
+        for event in self:
+            for callback in self._callbacks:
+                try:
+                    callback(event)
+                except Exception:
+                    log.exception('Alert watcher callback failed')
+
+    def start(self):
+        """Run the watcher in a background daemon thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run,
+                                        name='alertmanager-watcher',
+                                        daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout=None):
+        """Stop polling, and wait for the background thread if any."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -0,0 +1,111 @@
+"""
+Measure gzip compression of request and response bodies against a local
+server, optionally throttled to a given bandwidth.
+
+Usage: python benchmarks/bench_compression.py [count] [mbit/s ...]
+"""
+import gzip
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from alertmanager import AlertManager, CompactAlert, codec  # noqa: E402
+from common import make_alerts  # noqa: E402
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def throttle(self, size):
+        # One link shared by every connection
+        if self.server.bandwidth:
+            with self.server.link:
+                time.sleep(size / self.server.bandwidth)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.received += len(body)
+        self.throttle(len(body))
+        if self.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        codec.loads(body)
+        self.reply(b'{}', {})
+
+    def do_GET(self):
+        headers = {}
+        body = self.server.payload
+        if self.server.gzip and \
+                'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = self.server.gzipped
+            headers['Content-Encoding'] = 'gzip'
+        self.server.sent += len(body)
+        self.throttle(len(body))
+        self.reply(body, headers)
+
+    def reply(self, body, headers):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server(alerts):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    server.payload = codec.dumps(alerts)
+    server.gzipped = gzip.compress(server.payload, compresslevel=5)
+    server.bandwidth = 0
+    server.link = threading.Lock()
+    server.gzip = False
+    server.received = server.sent = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def timed(server, func):
+    server.received = server.sent = 0
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start, server.received + server.sent
+
+
+def main(count, bandwidths):
+    alerts = make_alerts(count)
+    server = start_server(alerts)
+    # Validate once up front so posting measures the transport
+    compact = [CompactAlert.from_dict(alert) for alert in alerts]
+    for mbit in bandwidths:
+        server.bandwidth = mbit * 125000
+        label = '{} Mbit/s'.format(mbit) if mbit else 'loopback'
+        print('{} alerts, {}'.format(count, label))
+        for compress in (None, 8192):
+            server.gzip = compress is not None
+            a_manager = AlertManager('http://127.0.0.1', server.server_port,
+                                     compress_threshold=compress)
+            name = 'gzip' if compress is not None else 'identity'
+            post, sent = timed(server, lambda: a_manager.post_alerts_bulk(
+                compact, batch_size=1000))
+            get, received = timed(server, lambda: list(
+                a_manager.iter_alerts(compact=True)))
+            print('  {:8} post_alerts_bulk {:8.1f} ms {:8.1f} KiB | '
+                  'iter_alerts {:8.1f} ms {:8.1f} KiB'.format(
+                      name, post * 1000, sent / 1024.0,
+                      get * 1000, received / 1024.0))
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 20000,
+         [float(arg) for arg in args[1:]] or [0, 100, 1000])
@@ -0,0 +1,93 @@
+"""
+Measure how long importing the client takes in a fresh interpreter, from
+python -X importtime, and check it against a budget.
+
+Short-lived scripts that post one alert spend most of their time importing,
+so every scenario also lists modules it must not load at all. Exits with
+status 1 when a scenario is over budget or loads a forbidden module.
+
+Usage: python benchmarks/bench_import.py [runs] [--top N]
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# name, statement, budget in seconds, modules it must not import
+SCENARIOS = (
+    ('import alertmanager', 'import alertmanager', 0.02,
+     ('requests', 'box', 'maya', 'aiohttp')),
+    ('post one alert', 'from alertmanager import AlertManager, Alert', 0.25,
+     ('maya', 'aiohttp', 'http.server')),
+    ('alert objects', 'from alertmanager import CompactAlert', 0.08,
+     ('requests', 'maya', 'aiohttp')),
+    ('asyncio client', 'from alertmanager import AsyncAlertManager', 0.6,
+     ('maya',)),
+)
+
+CHECK = ('import sys\n{}\n'
+         'print(" ".join(m for m in {!r} if m in sys.modules))')
+
+
+def parse(stderr):
+    """
+    Return the modules imported after startup with their cumulative time.
+
+    Only top level entries are returned, their time includes everything
+    they imported in turn.
+
+    """
+    modules = list()
+    started = False
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        cumulative, name = line.split('|')[1:]
+        # Nested imports are indented under the module importing them
+        if name.startswith('  '):
+            continue
+        if name.strip() == 'site':
+            started = True
+        elif started:
+            modules.append((name.strip(), int(cumulative) / 1e6))
+    return modules
+
+
+def run(statement, forbidden):
+    """Import in a fresh interpreter, return the top level imports and
+    the forbidden modules that were loaded."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c',
+         CHECK.format(statement, forbidden)],
+        cwd=ROOT, capture_output=True, text=True, check=True)
+    return parse(result.stderr), result.stdout.split()
+
+
+def main(runs, top):
+    failed = False
+    for name, statement, budget, forbidden in SCENARIOS:
+        timings = list()
+        for _ in range(runs):
+            modules, loaded = run(statement, forbidden)
+            timings.append(sum(seconds for _, seconds in modules))
+        median = statistics.median(timings)
+        over = median > budget
+        failed = failed or over or bool(loaded)
+        print('{:<20} {:8.1f} ms (budget {:.0f} ms){}{}'.format(
+            name, median * 1000, budget * 1000, '  OVER BUDGET' if over else '',
+            '  loads ' + ', '.join(loaded) if loaded else ''))
+        for module, seconds in sorted(modules, key=lambda m: -m[1])[:top]:
+            print('    {:<30} {:8.1f} ms'.format(module, seconds * 1000))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    top = 0
+    if '--top' in args:
+        index = args.index('--top')
+        top = int(args[index + 1])
+        del args[index:index + 2]
+    sys.exit(main(int(args[0]) if args else 5, top))
@@ -0,0 +1,49 @@
+"""
+Compare AlertIndex queries with linear scans through filter_alerts.
+
+Usage: python benchmarks/bench_index.py [count ...]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from alertmanager import AlertIndex, filter_alerts  # noqa: E402
+from common import make_alerts  # noqa: E402
+
+QUERIES = [
+    'severity="critical"',
+    'severity="critical",team="team3"',
+    'alertname=~"SyntheticAlert1.*",team!="team3"',
+    'instance="host42.example.com:9100"',
+]
+REPEAT = 20
+
+
+def per_query(func, spec):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        result = func(spec)
+    return (time.perf_counter() - start) / REPEAT, len(result)
+
+
+def main(counts):
+    for count in counts:
+        alerts = make_alerts(count)
+        start = time.perf_counter()
+        index = AlertIndex(alerts)
+        build = time.perf_counter() - start
+        print('{} alerts, index built in {:.1f} ms'.format(count,
+                                                           build * 1000))
+        for spec in QUERIES:
+            scan, expected = per_query(
+                lambda s: list(filter_alerts(alerts, s)), spec)
+            indexed, found = per_query(index.query, spec)
+            assert found == expected
+            print('  {:<48} scan {:8.2f} ms  index {:7.3f} ms  {:6.0f}x'
+                  .format(spec, scan * 1000, indexed * 1000, scan / indexed))
+
+
+if __name__ == '__main__':
+    main([int(c) for c in sys.argv[1:]] or [10000, 100000])
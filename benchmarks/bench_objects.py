@@ -0,0 +1,40 @@
+"""
+Compare the Box based Alert with the slotted CompactAlert.
+
+Builds every alert of a synthetic get_alerts() response with both classes
+and reads one label from each, which forces Box to wrap the nested dicts.
+Time is measured without tracing, memory with tracemalloc.
+
+Usage: python benchmarks/bench_objects.py [count]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from alertmanager import Alert, CompactAlert  # noqa: E402
+from common import make_alerts, measure  # noqa: E402
+
+
+def build(cls, data):
+    alerts = [cls(alert) for alert in data]
+    for alert in alerts:
+        alert['labels']['severity']
+    return alerts
+
+
+def main(count):
+    data = make_alerts(count)
+    print('{} alerts'.format(count))
+    for cls in (Alert, CompactAlert):
+        start = time.perf_counter()
+        build(cls, data)
+        elapsed = time.perf_counter() - start
+        _, _, peak = measure(build, cls, data)
+        print('{:<14} {:8.1f} ms  {:8.1f} MiB'.format(
+            cls.__name__, elapsed * 1000, peak / 2 ** 20))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
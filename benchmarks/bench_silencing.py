@@ -0,0 +1,55 @@
+"""
+Time evaluate_silences over thousands of silences and alerts.
+
+Usage: python benchmarks/bench_silencing.py [silences] [alerts]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from alertmanager import evaluate_silences  # noqa: E402
+from common import make_alerts  # noqa: E402
+
+
+def make_silences(count):
+    """
+    Build a mix of narrow and broad silences.
+
+    Three out of four silence a single instance, the kind of silence put in
+    place for maintenance, the rest mute a whole team's alerts of one kind.
+
+    """
+    silences = list()
+    for i in range(count):
+        if i % 4:
+            matchers = [
+                {'name': 'instance', 'value': 'host{}.example.com:9100'.format(
+                    i * 7), 'isRegex': False},
+                {'name': 'severity', 'value': 'info', 'isRegex': False,
+                 'isEqual': False}]
+        else:
+            matchers = [
+                {'name': 'team', 'value': 'team{}'.format(i % 20),
+                 'isRegex': False},
+                {'name': 'alertname', 'value': 'SyntheticAlert{}.*'.format(
+                    i % 5), 'isRegex': True}]
+        silences.append({'id': str(i), 'matchers': matchers})
+    return silences
+
+
+def main(silence_count, alert_count):
+    silences = make_silences(silence_count)
+    alerts = make_alerts(alert_count)
+    start = time.perf_counter()
+    result = evaluate_silences(silences, alerts)
+    elapsed = time.perf_counter() - start
+    muted = sum(len(v) for v in result.values())
+    print('{} silences x {} alerts: {:.1f} ms, {} matches'.format(
+        silence_count, alert_count, elapsed * 1000, muted))
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args or [5000, 50000]))
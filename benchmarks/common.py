@@ -0,0 +1,54 @@
+"""Shared helpers for the benchmark scripts."""
+import gc
+import time
+import tracemalloc
+
+
+def make_alert(i):
+    """Return one synthetic alert shaped like a /api/v2/alerts item."""
+    return {
+        'labels': {
+            'alertname': 'SyntheticAlert{}'.format(i % 50),
+            'instance': 'host{}.example.com:9100'.format(i),
+            'job': 'node',
+            'severity': ('critical', 'warning', 'info')[i % 3],
+            'team': 'team{}'.format(i % 20),
+        },
+        'annotations': {
+            'summary': 'Synthetic alert number {}'.format(i),
+            'description': 'Generated for benchmarking.',
+        },
+        'startsAt': '2020-02-18T08:56:33.542977{:03d}Z'.format(i % 1000),
+        'endsAt': '2020-02-18T09:08:01.206791Z',
+        'updatedAt': '2020-02-18T09:03:01.206791Z',
+        'generatorURL': 'http://prometheus.example.com/graph',
+        'status': {'state': 'active', 'silencedBy': [], 'inhibitedBy': []},
+        'receivers': [{'name': 'team-X-mails'}],
+        'fingerprint': '{:016x}'.format(i),
+    }
+
+
+def make_alerts(count):
+    """Return a list of count synthetic alerts."""
+    return [make_alert(i) for i in range(count)]
+
+
+def measure(func, *args):
+    """
+    Run func once and return its result, wall time and peak memory.
+
+    Returns
+    -------
+    tuple
+        The result, the elapsed seconds and the peak traced allocation in
+        bytes while func ran.
+
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
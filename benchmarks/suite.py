@@ -0,0 +1,356 @@
+"""
+Benchmark suite covering the client's hot paths.
+
+Every benchmark is timed (best of several rounds, without tracing) and then
+run once more under tracemalloc for its peak memory. Results are saved as
+JSON, one file per run, so runs can be compared over time: --compare
+reports the benchmarks that got slower or hungrier than in an earlier run
+and exits with status 1 when any regressed beyond --threshold.
+
+Usage:
+    python benchmarks/suite.py [--quick] [--filter TEXT] [--sizes 1000,...]
+                               [--save DIR] [--compare FILE|latest]
+                               [--threshold 0.2]
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from requests.models import Response  # noqa: E402
+
+from alertmanager import (AlertManager, Alert, CompactAlert,  # noqa: E402
+                          Silence, codec, firing_longer_than,
+                          to_columns)
+from alertmanager.snapshot import Snapshot, write_snapshot  # noqa: E402
+from alertmanager.testing import FakeAlertManager  # noqa: E402
+from alertmanager.timeutils import frozen_now  # noqa: E402
+from common import make_alerts, measure  # noqa: E402
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SIZES = (1000, 10000, 100000)
+QUICK_SIZES = (1000, 10000)
+ROUNDS = 5
+MAX_TIME = 2.0
+
+BENCHMARKS = list()
+
+
+def benchmark(name, sized=True):
+    """
+    Register a benchmark.
+
+    The decorated function takes the dataset size (or nothing when sized
+    is False) and returns the callable to measure and the number of items
+    it processes per call.
+
+    """
+    def register(setup):
+        BENCHMARKS.append((name, sized, setup))
+        return setup
+    return register
+
+
+class StubSession(object):
+    """A session answering every request with the same canned body."""
+
+    def __init__(self, body):
+        self.body = body
+
+    def request(self, method, url, **kwargs):
+        response = Response()
+        response.status_code = 200
+        response._content = self.body
+        return response
+
+
+@benchmark('Alert.from_dict')
+def alert_from_dict(size):
+    data = make_alerts(size)
+    return lambda: [Alert.from_dict(alert) for alert in data], size
+
+
+@benchmark('CompactAlert.from_dict')
+def compact_from_dict(size):
+    data = make_alerts(size)
+    return lambda: [CompactAlert.from_dict(alert) for alert in data], size
+
+
+@benchmark('Alert.validate_and_dump')
+def validate_and_dump(size):
+    alerts = [Alert.from_dict(alert) for alert in make_alerts(size)]
+    return lambda: [alert.validate_and_dump() for alert in alerts], size
+
+
+@benchmark('post_alerts payload')
+def post_payload(size):
+    alerts = [Alert.from_dict(alert) for alert in make_alerts(size)]
+    dump = AlertManager._dump_alert
+    return lambda: codec.dumps([dump(alert) for alert in alerts]), size
+
+
+@benchmark('get_alerts decode')
+def get_alerts_decode(size):
+    body = codec.dumps(make_alerts(size))
+    a_manager = AlertManager('http://stub', req_obj=StubSession(body))
+    return a_manager.get_alerts, size
+
+
+@benchmark('get_alerts decode compact')
+def get_alerts_decode_compact(size):
+    body = codec.dumps(make_alerts(size))
+    a_manager = AlertManager('http://stub', req_obj=StubSession(body))
+    return lambda: a_manager.get_alerts(compact=True), size
+
+
+@benchmark('_handle_filters', sized=False)
+def handle_filters():
+    a_manager = AlertManager('http://stub')
+    filters = dict(('label{}'.format(i), 'value{}'.format(i))
+                   for i in range(10))
+    count = 1000
+
+    def run():
+        for _ in range(count):
+            a_manager._handle_filters(filters)
+    return run, count
+
+
+@benchmark('set_endtime', sized=False)
+def set_endtime():
+    silences = [Silence() for _ in range(200)]
+
+    def run():
+        for silence in silences:
+            silence.set_endtime('in 1 hour')
+    return run, len(silences)
+
+
+@benchmark('set_endtime batch')
+def set_endtime_batch(size):
+    alerts = [CompactAlert.from_dict(alert) for alert in make_alerts(size)]
+
+    def run():
+        with frozen_now():
+            for alert in alerts:
+                alert.set_endtime('in 5 minutes')
+    return run, size
+
+
+@benchmark('firing_longer_than dicts')
+def firing_dicts(size):
+    alerts = make_alerts(size)
+    return lambda: firing_longer_than(alerts, 60, now=1.6e9), size
+
+
+@benchmark('firing_longer_than cached')
+def firing_cached(size):
+    alerts = [CompactAlert.from_dict(alert) for alert in make_alerts(size)]
+    firing_longer_than(alerts, 60, now=1.6e9)  # parse once, as a poller would
+    return lambda: firing_longer_than(alerts, 60, now=1.6e9), size
+
+
+@benchmark('to_columns')
+def columns(size):
+    alerts = make_alerts(size)
+    return lambda: to_columns(alerts), size
+
+
+@benchmark('write_snapshot')
+def snapshot_write(size):
+    alerts = make_alerts(size)
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'bench.amsnap')
+    return (lambda: write_snapshot(path, alerts), size,
+            lambda: shutil.rmtree(directory))
+
+
+@benchmark('Snapshot read all')
+def snapshot_read(size):
+    directory = tempfile.mkdtemp()
+    path = write_snapshot(directory, make_alerts(size))
+    return (lambda: list(Snapshot(path)), size,
+            lambda: shutil.rmtree(directory))
+
+
+@benchmark('Snapshot read one')
+def snapshot_read_one(size):
+    directory = tempfile.mkdtemp()
+    path = write_snapshot(directory, make_alerts(size))
+    return (lambda: Snapshot(path)[size // 2], 1,
+            lambda: shutil.rmtree(directory))
+
+
+@benchmark('e2e get_alerts compact')
+def e2e_get_alerts(size):
+    fake = FakeAlertManager(alerts=size).start()
+    a_manager = fake.client()
+    return lambda: a_manager.get_alerts(compact=True), size, fake.stop
+
+
+@benchmark('e2e post_alerts_bulk')
+def e2e_post_bulk(size):
+    fake = FakeAlertManager().start()
+    a_manager = fake.client()
+    alerts = [CompactAlert.from_dict(alert) for alert in make_alerts(size)]
+    return lambda: a_manager.post_alerts_bulk(alerts), size, fake.stop
+
+
+@benchmark('e2e get_status', sized=False)
+def e2e_get_status():
+    fake = FakeAlertManager().start()
+    a_manager = fake.client()
+    count = 200
+
+    def run():
+        for _ in range(count):
+            a_manager.get_status()
+    return run, count, fake.stop
+
+
+def time_it(func):
+    """Return the best time of a call over up to ROUNDS rounds."""
+    func()  # warm up caches and connections
+    timings = list()
+    started = time.perf_counter()
+    while len(timings) < ROUNDS:
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+        if time.perf_counter() - started > MAX_TIME:
+            break
+    return min(timings), len(timings)
+
+
+def run_one(name, size, setup):
+    """Set up and measure one benchmark, return its result record."""
+    prepared = setup(size) if size is not None else setup()
+    func, items = prepared[:2]
+    teardown = prepared[2] if len(prepared) > 2 else None
+    try:
+        seconds, rounds = time_it(func)
+        _, _, peak = measure(func)
+    finally:
+        if teardown is not None:
+            teardown()
+    return {
+        'name': name,
+        'size': size,
+        'seconds': seconds,
+        'rounds': rounds,
+        'items_per_second': items / seconds if seconds else None,
+        'peak_bytes': peak,
+    }
+
+
+def environment():
+    """Describe what the results were measured on."""
+    try:
+        commit = subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE,
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'json_backend': codec.backend,
+    }
+
+
+def key(result):
+    return '{}[{}]'.format(result['name'], result['size'] or '')
+
+
+def compare(results, baseline, threshold):
+    """Print the changes against a baseline run, return the regressions."""
+    previous = dict((key(r), r) for r in baseline['results'])
+    regressions = list()
+    base = baseline['environment']
+    print('\nCompared with {} ({})'.format(base['commit'], base['timestamp']))
+    for result in results:
+        before = previous.get(key(result))
+        if before is None:
+            continue
+        time_change = result['seconds'] / before['seconds'] - 1
+        memory_change = (result['peak_bytes'] + 1) / \
+            (before['peak_bytes'] + 1) - 1
+        flag = ''
+        if time_change > threshold or memory_change > threshold:
+            flag = '  REGRESSION'
+            regressions.append(key(result))
+        print('{:<42} time {:+7.1%}  memory {:+7.1%}{}'.format(
+            key(result), time_change, memory_change, flag))
+    return regressions
+
+
+def latest(directory):
+    files = sorted(glob.glob(os.path.join(directory, '*.json')))
+    return files[-1] if files else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--quick', action='store_true',
+                        help='skip the 100k alert datasets')
+    parser.add_argument('--sizes', help='comma separated dataset sizes')
+    parser.add_argument('--filter', default='',
+                        help='only run benchmarks whose name contains this')
+    parser.add_argument('--save', default=os.path.join(HERE, 'results'),
+                        help='directory to save results in, "" to skip')
+    parser.add_argument('--compare',
+                        help='results file to compare with, or "latest"')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='relative slowdown reported as a regression')
+    args = parser.parse_args(argv)
+
+    sizes = QUICK_SIZES if args.quick else SIZES
+    if args.sizes:
+        sizes = tuple(int(size) for size in args.sizes.split(','))
+    baseline_path = args.compare
+    if baseline_path == 'latest':
+        baseline_path = latest(args.save)
+
+    results = list()
+    print('{:<42} {:>11} {:>14} {:>11}'.format('benchmark', 'time',
+                                               'items/s', 'peak'))
+    for name, sized, setup in BENCHMARKS:
+        if args.filter.lower() not in name.lower():
+            continue
+        for size in (sizes if sized else (None,)):
+            result = run_one(name, size, setup)
+            results.append(result)
+            print('{:<42} {:>8.2f} ms {:>14,.0f} {:>7.1f} MiB'.format(
+                key(result), result['seconds'] * 1000,
+                result['items_per_second'], result['peak_bytes'] / 2 ** 20))
+
+    run = {'environment': environment(), 'results': results}
+    if args.save:
+        os.makedirs(args.save, exist_ok=True)
+        path = os.path.join(args.save, '{}-{}.json'.format(
+            time.strftime('%Y%m%dT%H%M%S'), run['environment']['commit']))
+        with open(path, 'w') as handle:
+            json.dump(run, handle, indent=2)
+        print('\nSaved {}'.format(path))
+    if baseline_path:
+        with open(baseline_path) as handle:
+            regressions = compare(results, json.load(handle), args.threshold)
+        if regressions:
+            print('\n{} regression(s) beyond {:.0%}'.format(
+                len(regressions), args.threshold))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
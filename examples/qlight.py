@@ -1,4 +1,4 @@
-from alertmanager import AlertManager, Alert
+from alertmanager import AlertManager, Alert, MultiAlertManager
 from copy import copy
 from time import sleep
 
@@ -107,7 +107,9 @@ if __name__ == "__main__":
     v3AlM = AlertManager('http://api.kube.example.com')
     alerts = []
 
-    alerts = list(v2AlM.get_alerts() + v3AlM.get_alerts())
+    # Query both clusters at once, duplicates are merged by fingerprint
+    with MultiAlertManager([v2AlM, v3AlM], timeout=10) as multi:
+        alerts = multi.get_alerts()
 
     _CONFIRMATION = {}
 
@@ -24,7 +24,7 @@ DESCRIPTION = 'Library to ease interaction with Alert Manager API.'
 URL = 'https://github.com/ABORGT/PylertAlertManager.git'
 EMAIL = 'kamori.goat@gmail.com'
 AUTHOR = 'Tyler Coil'
-REQUIRES_PYTHON = '>=3.4.0'
+REQUIRES_PYTHON = '>=3.8.0'
 VERSION = None # Rely on alertmanager/__version__.py
 PACKAGES = ['alertmanager']
 REQUIRED = [
@@ -33,7 +33,13 @@ REQUIRED = [
     'requests>=2.20.0'
 ]
 
-EXTRAS = {}
+EXTRAS = {
+    'async': ['aiohttp>=3.6.0'],
+    'fast': ['orjson>=3.0.0'],
+    'http2': ['urllib3>=2.3.0', 'h2>=4.1.0'],
+    'otel': ['opentelemetry-api>=1.0.0'],
+    'analytics': ['numpy>=1.17.0'],
+}
 
 here = os.path.abspath(os.path.dirname(__file__))
 
@@ -106,6 +112,11 @@ setup(
     classifiers=[
         'License :: OSI Approved :: MIT License',
         'Programming Language :: Python :: 3',
+        'Programming Language :: Python :: 3 :: Only',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
         'Topic :: System :: Systems Administration',
         'Topic :: Software Development :: Libraries',
         'Topic :: Software Development :: Libraries :: Python Modules'
@@ -4,16 +4,30 @@ import time
 from alertmanager import AlertManager
 from alertmanager import Alert
 from alertmanager import Silence
+from alertmanager.testing import FakeAlertManager
 
-from tests.constants import HOST
+from tests.constants import HOST, PORT
 from tests.data import TEST_ALERT_POST_DATA
 from tests.data import TEST_SILENCE_POST_DATA
 
 
 class TestAlertManagerMethods(unittest.TestCase):
 
+    @classmethod
+    def setUpClass(cls):
+        cls.fake = None
+        cls.host, cls.port = HOST, PORT
+        if HOST is None:
+            cls.fake = FakeAlertManager().start()
+            cls.host, cls.port = cls.fake.host, cls.fake.port
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.fake is not None:
+            cls.fake.stop()
+
     def setUp(self):
-        self.a_manager = AlertManager(host=HOST)
+        self.a_manager = AlertManager(host=self.host, port=self.port)
         self.a_manager.post_alerts(TEST_ALERT_POST_DATA)
         self.alert = Alert.from_dict(TEST_ALERT_POST_DATA)
         self.silence = Silence.from_dict(TEST_SILENCE_POST_DATA)
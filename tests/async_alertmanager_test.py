@@ -0,0 +1,96 @@
+import unittest
+import asyncio
+
+from requests import HTTPError
+
+from alertmanager import Alert
+
+from tests.data import TEST_ALERT_POST_DATA
+from tests.data import TEST_ADD_MATCHER_DATA
+
+try:
+    from aiohttp import web
+    from aiohttp.test_utils import TestServer
+    from alertmanager import AsyncAlertManager
+except ImportError:
+    web = None
+
+
+def make_app(requests_seen):
+    async def get_alerts(request):
+        requests_seen.append(request.query.getall('filter', []))
+        return web.json_response([TEST_ALERT_POST_DATA])
+
+    async def post_alerts(request):
+        requests_seen.append(await request.json())
+        return web.json_response({})
+
+    async def get_status(request):
+        return web.json_response({'cluster': {'status': 'ready'}})
+
+    async def post_silence(request):
+        return web.json_response({'silenceID': 'abc'})
+
+    async def delete_silence(request):
+        if request.match_info['id'] != 'abc':
+            return web.Response(status=404, text='not found')
+        return web.json_response({})
+
+    app = web.Application()
+    app.router.add_get('/api/v2/alerts', get_alerts)
+    app.router.add_post('/api/v2/alerts', post_alerts)
+    app.router.add_get('/api/v2/status', get_status)
+    app.router.add_post('/api/v2/silences', post_silence)
+    app.router.add_delete('/api/v2/silence/{id}', delete_silence)
+    return app
+
+
+@unittest.skipIf(web is None, 'aiohttp is not installed')
+class TestAsyncAlertManager(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.seen = list()
+        self.server = TestServer(make_app(self.seen))
+        await self.server.start_server()
+        self.a_manager = AsyncAlertManager(host='http://127.0.0.1',
+                                           port=self.server.port)
+
+    async def asyncTearDown(self):
+        await self.a_manager.close()
+        await self.server.close()
+
+    async def test_get_alerts(self):
+        result = await self.a_manager.get_alerts(filter={'alertname': 'a1'})
+        self.assertIsInstance(result[0], Alert)
+        self.assertEqual(result[0].labels.alertname, 'alert1')
+        self.assertEqual(self.seen, [['alertname="a1"']])
+
+    async def test_concurrent_get_alerts(self):
+        results = await asyncio.gather(
+            *[self.a_manager.get_alerts() for _ in range(20)])
+        self.assertEqual(len(results), 20)
+        self.assertTrue(all(results))
+
+    async def test_post_alerts(self):
+        result = await self.a_manager.post_alerts(TEST_ALERT_POST_DATA)
+        self.assertIn(200, result.status)
+        self.assertEqual(self.seen, [[TEST_ALERT_POST_DATA]])
+
+    async def test_post_alerts_compressed(self):
+        self.a_manager.compress_threshold = 0
+        result = await self.a_manager.post_alerts(TEST_ALERT_POST_DATA)
+        self.assertIn(200, result.status)
+        self.assertEqual(self.seen, [[TEST_ALERT_POST_DATA]])
+
+    async def test_get_status(self):
+        result = await self.a_manager.get_status()
+        self.assertIn('ready', result.cluster.status)
+
+    async def test_post_silence(self):
+        result = await self.a_manager.post_silence(TEST_ADD_MATCHER_DATA)
+        self.assertEqual(result.silenceID, 'abc')
+
+    async def test_delete_silence_error(self):
+        with self.assertRaises(HTTPError) as cm:
+            await self.a_manager.delete_silence('missing')
+        self.assertIn('404', str(cm.exception))
@@ -0,0 +1,71 @@
+import unittest
+import json
+import threading
+
+from alertmanager import AlertManager
+from alertmanager.bulk import iter_batches
+
+from tests.helpers import FakeSession, make_response
+
+
+def synthetic_alerts(count, consumed=None):
+    for i in range(count):
+        if consumed is not None:
+            consumed.append(i)
+        yield {'labels': {'alertname': 'alert{}'.format(i)}}
+
+
+class TestIterBatches(unittest.TestCase):
+
+    def test_batch_size(self):
+        batches = list(iter_batches(range(5), batch_size=2))
+        self.assertEqual([size for size, _ in batches], [2, 2, 1])
+        self.assertEqual(json.loads(batches[2][1]), [4])
+
+    def test_max_bytes(self):
+        items = ['x' * 10] * 4
+        for size, body in iter_batches(items, max_bytes=30):
+            self.assertLessEqual(len(body), 30)
+            self.assertEqual(json.loads(body), ['x' * 10] * size)
+
+    def test_oversized_item_is_sent_alone(self):
+        batches = list(iter_batches(['x' * 50, 'y'], max_bytes=10))
+        self.assertEqual([size for size, _ in batches], [1, 1])
+
+    def test_lazy(self):
+        consumed = list()
+        batches = iter_batches(synthetic_alerts(100, consumed), batch_size=10)
+        next(batches)
+        self.assertEqual(len(consumed), 10)
+
+
+class TestPostAlertsBulk(unittest.TestCase):
+
+    def setUp(self):
+        self.lock = threading.Lock()
+        self.received = list()
+
+        def post(data=None, **kwargs):
+            batch = json.loads(data)
+            with self.lock:
+                self.received.extend(batch)
+            if batch[0]['labels']['alertname'] == 'alert20':
+                return make_response(500, b'boom')
+            return make_response(200, {})
+
+        self.a_manager = AlertManager('http://am', req_obj=FakeSession({
+            ('POST', '/api/v2/alerts'): post}))
+
+    def test_post_alerts_bulk(self):
+        results = self.a_manager.post_alerts_bulk(synthetic_alerts(45),
+                                                  batch_size=10)
+        self.assertEqual([r.index for r in results], [0, 1, 2, 3, 4])
+        self.assertEqual([r.size for r in results], [10, 10, 10, 10, 5])
+        self.assertEqual([r.ok for r in results],
+                         [True, True, False, True, True])
+        self.assertEqual(results[2].status_code, 500)
+        self.assertEqual(len(self.received), 45)
+
+    def test_post_alerts_bulk_invalid_alert(self):
+        with self.assertRaises(ValueError):
+            self.a_manager.post_alerts_bulk([{'labels': {}}])
@@ -0,0 +1,118 @@
+import unittest
+import threading
+
+from alertmanager import AlertManager
+from alertmanager import ResponseCache
+
+from tests.data import TEST_ADD_MATCHER_DATA
+from tests.helpers import FakeSession, make_response
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.session = FakeSession({
+            ('GET', '/api/v2/status'): {'cluster': {'status': 'ready'}},
+            ('GET', '/api/v2/receivers'): {'name': 'team-X'},
+            ('GET', '/api/v2/alerts'): [],
+            ('GET', '/api/v2/silences'): [],
+            ('POST', '/api/v2/silences'): {'silenceID': 'abc'},
+            ('DELETE', '/api/v2/silence/abc'): {},
+        })
+        self.cache = ResponseCache()
+        self.a_manager = AlertManager('http://am', req_obj=self.session,
+                                      cache=self.cache)
+
+    def count(self, path):
+        return len([c for c in self.session.calls if c[1] == path])
+
+    def expire(self):
+        for entry in self.cache._entries.values():
+            entry.expires = 0
+
+    def test_status_and_receivers_cached(self):
+        for _ in range(3):
+            self.assertIn('ready', self.a_manager.get_status().cluster.status)
+            self.a_manager.get_receivers()
+        self.assertEqual(self.count('/api/v2/status'), 1)
+        self.assertEqual(self.count('/api/v2/receivers'), 1)
+        self.assertEqual(self.cache.stats['hits'], 4)
+
+    def test_uncached_routes(self):
+        self.a_manager.get_alerts()
+        self.a_manager.get_alerts()
+        self.assertEqual(self.count('/api/v2/alerts'), 2)
+
+    def test_params_are_part_of_the_key(self):
+        cache = ResponseCache(ttls={'/api/v2/alerts': 60})
+        a_manager = AlertManager('http://am', req_obj=self.session,
+                                 cache=cache)
+        a_manager.get_alerts(filter={'a': 'b'})
+        a_manager.get_alerts(filter={'a': 'c'})
+        a_manager.get_alerts(filter={'a': 'b'})
+        self.assertEqual(self.count('/api/v2/alerts'), 2)
+
+    def test_expiry(self):
+        self.a_manager.get_status()
+        self.expire()
+        self.a_manager.get_status()
+        self.assertEqual(self.count('/api/v2/status'), 2)
+
+    def test_errors_not_cached(self):
+        self.session.routes[('GET', '/api/v2/status')] = \
+            lambda **kwargs: make_response(503, b'unavailable')
+        for _ in range(2):
+            with self.assertRaises(Exception):
+                self.a_manager.get_status()
+        self.assertEqual(self.count('/api/v2/status'), 2)
+
+    def test_lru_eviction(self):
+        self.cache.maxsize = 1
+        self.a_manager.get_status()
+        self.a_manager.get_receivers()
+        self.a_manager.get_status()
+        self.assertEqual(self.count('/api/v2/status'), 2)
+        self.assertEqual(len(self.cache), 1)
+
+    def test_single_flight(self):
+        self.session.delay = 0.2
+        threads = [threading.Thread(target=self.a_manager.get_status)
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.count('/api/v2/status'), 1)
+        self.assertEqual(self.cache.stats['collapsed'], 4)
+
+    def test_etag_revalidation(self):
+        def status(headers=None, **kwargs):
+            if (headers or {}).get('If-None-Match') == '"v1"':
+                return make_response(304, b'')
+            return make_response(200, {'cluster': {'status': 'ready'}},
+                                 headers={'ETag': '"v1"'})
+
+        self.session.routes[('GET', '/api/v2/status')] = status
+        first = self.a_manager.get_status()
+        self.expire()
+        second = self.a_manager.get_status()
+        self.assertEqual(first, second)
+        self.assertEqual(self.count('/api/v2/status'), 2)
+        self.assertEqual(self.cache.stats['revalidated'], 1)
+        # The revalidated entry is fresh again
+        self.a_manager.get_status()
+        self.assertEqual(self.count('/api/v2/status'), 2)
+
+    def test_invalidated_by_silence_changes(self):
+        cache = ResponseCache(ttls={'/api/v2/silence': 60})
+        a_manager = AlertManager('http://am', req_obj=self.session,
+                                 cache=cache)
+        a_manager.get_silences()
+        a_manager.get_silences()
+        self.assertEqual(self.count('/api/v2/silences'), 1)
+        a_manager.post_silence(TEST_ADD_MATCHER_DATA)
+        a_manager.get_silences()
+        a_manager.delete_silence('abc')
+        a_manager.get_silences()
+        self.assertEqual(len([c for c in self.session.calls
+                              if c[:2] == ('GET', '/api/v2/silences')]), 3)
@@ -0,0 +1,61 @@
+import unittest
+import json
+
+from alertmanager import Alert
+from alertmanager import codec
+
+from tests.data import TEST_ALERT_POST_DATA
+
+
+def installed_backends():
+    for name in codec.PREFERENCE:
+        try:
+            codec.set_backend(name)
+        except ImportError:
+            continue
+        yield name
+
+
+class TestCodec(unittest.TestCase):
+
+    def setUp(self):
+        self.default = codec.backend
+
+    def tearDown(self):
+        codec.set_backend(self.default)
+
+    def test_round_trip_every_backend(self):
+        document = [TEST_ALERT_POST_DATA, {'unicode': 'café'}]
+        for name in installed_backends():
+            encoded = codec.dumps(document)
+            self.assertIsInstance(encoded, bytes, name)
+            self.assertEqual(json.loads(encoded), document, name)
+            self.assertEqual(codec.loads(encoded), document, name)
+            self.assertEqual(codec.loads(encoded.decode('utf-8')), document,
+                             name)
+
+    def test_box_objects_encode(self):
+        alert = Alert(TEST_ALERT_POST_DATA)
+        for name in installed_backends():
+            self.assertEqual(json.loads(codec.dumps(alert)),
+                             TEST_ALERT_POST_DATA, name)
+
+    def test_falls_back_to_stdlib(self):
+        for name in installed_backends():
+            self.assertEqual(codec.dumps({'big': 2 ** 70}),
+                             b'{"big":1180591620717411303424}', name)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            codec.set_backend('yaml')
+
+
+class TestFromDict(unittest.TestCase):
+
+    def test_from_dict_bytes_and_str(self):
+        raw = json.dumps(TEST_ALERT_POST_DATA)
+        self.assertEqual(Alert.from_dict(raw), TEST_ALERT_POST_DATA)
+        self.assertEqual(Alert.from_dict(raw.encode('utf-8')),
+                         TEST_ALERT_POST_DATA)
+        self.assertEqual(Alert.from_dict(TEST_ALERT_POST_DATA),
+                         TEST_ALERT_POST_DATA)
@@ -0,0 +1,162 @@
+from array import array
+import unittest
+
+from alertmanager import (Alert, AlertColumns, CompactAlert, LazyAlertList,
+                          codec, to_columns)
+from alertmanager.columnar import MISSING, STATES, from_groups
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+def make_alert(name, team, started, state='active', silenced=()):
+    alert = {'labels': {'alertname': name},
+             'startsAt': started,
+             'endsAt': '2020-01-01T13:00:00Z',
+             'status': {'state': state, 'silencedBy': list(silenced),
+                        'inhibitedBy': []},
+             'fingerprint': name}
+    if team is not None:
+        alert['labels']['team'] = team
+    return alert
+
+
+ALERTS = [
+    make_alert('a', 'db', '2020-01-01T12:00:00.123456789Z'),
+    make_alert('b', 'web', '2020-01-01T12:00:00+01:00', 'suppressed', ['s']),
+    make_alert('c', 'db', None, 'unprocessed'),
+    make_alert('d', None, '2020-01-01T12:00:00.123456789Z', 'weird'),
+]
+
+NOON = 1577880000 * 10 ** 9
+
+
+class TestToColumns(unittest.TestCase):
+
+    def check(self, columns):
+        self.assertIsInstance(columns, AlertColumns)
+        self.assertEqual(len(columns), 4)
+        team = columns.labels['team']
+        self.assertEqual(team.categories, ['db', 'web'])
+        self.assertEqual(list(team.codes), [0, 1, 0, -1])
+        self.assertEqual(team.values(), ['db', 'web', 'db', None])
+        self.assertEqual(team.counts(), {'db': 2, 'web': 1})
+        self.assertEqual(list(columns.starts_at),
+                         [NOON + 123456789, NOON - 3600 * 10 ** 9, MISSING,
+                          NOON + 123456789])
+        self.assertEqual(list(columns.updated_at), [MISSING] * 4)
+        self.assertEqual([STATES[code] for code in columns.state],
+                         ['active', 'suppressed', 'unprocessed', 'unknown'])
+        self.assertEqual(list(columns.silenced), [0, 1, 0, 0])
+        self.assertEqual(columns.fingerprint, ['a', 'b', 'c', 'd'])
+        self.assertIsNone(columns.group)
+
+    def test_inputs(self):
+        for alerts in (ALERTS, [Alert.from_dict(a) for a in ALERTS],
+                       [CompactAlert.from_dict(a) for a in ALERTS],
+                       LazyAlertList(codec.dumps(ALERTS))):
+            self.check(to_columns(alerts))
+
+    def test_non_str_labels_unset(self):
+        accessed = Alert.from_dict(make_alert('a', None, None))
+        accessed.labels.team
+        columns = to_columns([accessed, {'labels': {'code': 500}}],
+                             use_numpy=False)
+        self.assertEqual(list(columns.labels['alertname'].codes), [0, -1])
+        self.assertNotIn('team', columns.labels)
+        self.assertNotIn('code', columns.labels)
+
+    def test_array_fallback(self):
+        columns = to_columns(ALERTS, use_numpy=False)
+        self.check(columns)
+        self.assertIsInstance(columns.starts_at, array)
+        self.assertEqual(columns.starts_at.itemsize, 8)
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_numpy(self):
+        columns = to_columns(ALERTS, use_numpy=True)
+        self.check(columns)
+        self.assertEqual(columns.starts_at.dtype, numpy.int64)
+        self.assertEqual(columns.labels['team'].codes.dtype, numpy.int32)
+        started = columns.starts_at.view('M8[ns]')
+        self.assertTrue(numpy.isnat(started[2]))
+        # Vectorized group-by: alerts per team that are active
+        team = columns.labels['team']
+        active = columns.state == STATES.index('active')
+        self.assertEqual(numpy.bincount(team.codes[active & (team.codes >= 0)],
+                                        minlength=2).tolist(), [1, 0])
+
+    def test_selected_labels(self):
+        columns = to_columns(ALERTS, labels=['team', 'missing'])
+        self.assertEqual(sorted(columns.labels), ['missing', 'team'])
+        self.assertEqual(columns.labels['missing'].values(), [None] * 4)
+
+    def test_columns(self):
+        alerts = [dict(ALERTS[0], labels={'state': 'x', 'team': 'db'})]
+        columns = to_columns(alerts).columns()
+        self.assertIn('label_state', columns)
+        self.assertEqual(list(columns['state']), [STATES.index('active')])
+
+    def test_empty(self):
+        columns = to_columns([])
+        self.assertEqual(len(columns), 0)
+        self.assertEqual(columns.labels, {})
+
+
+class TestFromGroups(unittest.TestCase):
+
+    def test_groups(self):
+        groups = [
+            {'labels': {'team': 'db'}, 'receiver': {'name': 'dba'},
+             'alerts': [ALERTS[0], ALERTS[2]]},
+            {'labels': {}, 'receiver': {'name': 'default'}, 'alerts': []},
+            {'labels': {'team': 'web'}, 'receiver': {'name': 'web'},
+             'alerts': [ALERTS[1]]},
+        ]
+        for data in (groups, [Alert(group) for group in groups]):
+            columns = from_groups(data)
+            self.assertEqual(list(columns.group), [0, 0, 2])
+            self.assertEqual(columns.fingerprint, ['a', 'c', 'b'])
+            self.assertEqual(columns.groups[2],
+                             {'labels': {'team': 'web'}, 'receiver': 'web'})
+            self.assertIn('group', columns.columns())
+
+
+class TestFrames(unittest.TestCase):
+
+    @unittest.skipIf(pandas is None, 'pandas is not installed')
+    def test_pandas(self):
+        frame = to_columns(ALERTS).to_pandas()
+        self.assertEqual(len(frame), 4)
+        self.assertEqual(frame['team'].value_counts()['db'], 2)
+        self.assertTrue(frame['starts_at'].isna()[2])
+        self.assertEqual(str(frame['starts_at'].dt.tz), 'UTC')
+
+    @unittest.skipIf(pandas is not None, 'pandas is installed')
+    def test_pandas_missing(self):
+        with self.assertRaises(ImportError):
+            to_columns(ALERTS).to_pandas()
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_arrow(self):
+        table = to_columns(ALERTS).to_arrow()
+        self.assertEqual(table.num_rows, 4)
+        self.assertEqual(table.column('team').null_count, 1)
+        self.assertEqual(table.column('starts_at').null_count, 1)
+
+    @unittest.skipIf(pyarrow is not None, 'pyarrow is installed')
+    def test_arrow_missing(self):
+        with self.assertRaises(ImportError):
+            to_columns(ALERTS).to_arrow()
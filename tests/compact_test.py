@@ -0,0 +1,105 @@
+import unittest
+import json
+import pickle
+from datetime import datetime, timezone
+
+from alertmanager import AlertManager
+from alertmanager import CompactAlert
+from alertmanager import CompactSilence
+
+from tests.data import TEST_ADD_LABEL_DATA
+from tests.data import TEST_ADD_MATCHER_DATA
+from tests.data import TEST_ALERT_VALIDATE_DATA_2
+from tests.data import TEST_SILENCE_VALIDATE_DATA_3
+from tests.helpers import FakeSession
+
+TEST_RETURNED_ALERT = {
+    'labels': {'alertname': 'alert1', 'severity': 'critical'},
+    'annotations': {'summary': 'test'},
+    'startsAt': '2018-11-08T16:25:02.327027475Z',
+    'endsAt': '2018-11-08T17:25:02+01:00',
+    'fingerprint': 'e6b119b9ce57e0c4',
+    'status': {'state': 'active', 'silencedBy': [], 'inhibitedBy': []},
+    'unknownField': 'kept',
+}
+
+
+class TestCompactAlert(unittest.TestCase):
+
+    def test_round_trip(self):
+        alert = CompactAlert.from_dict(TEST_RETURNED_ALERT)
+        self.assertEqual(alert.to_dict(), TEST_RETURNED_ALERT)
+        self.assertEqual(alert, TEST_RETURNED_ALERT)
+        self.assertEqual(pickle.loads(pickle.dumps(alert)), alert)
+
+    def test_field_access(self):
+        alert = CompactAlert(TEST_RETURNED_ALERT)
+        self.assertEqual(alert.labels['severity'], 'critical')
+        self.assertEqual(alert['fingerprint'], 'e6b119b9ce57e0c4')
+        self.assertEqual(alert.get('unknownField'), 'kept')
+        self.assertIsNone(alert.get('generatorURL'))
+        self.assertNotIn('generatorURL', alert)
+        with self.assertRaises(AttributeError):
+            alert.not_a_field = 1
+
+    def test_lazy_timestamps(self):
+        alert = CompactAlert(TEST_RETURNED_ALERT)
+        self.assertEqual(alert.starts_at, datetime(
+            2018, 11, 8, 16, 25, 2, 327027, tzinfo=timezone.utc))
+        self.assertEqual(alert.ends_at, datetime(
+            2018, 11, 8, 16, 25, 2, tzinfo=timezone.utc))
+        self.assertIsNone(alert.updated_at)
+        alert.startsAt = '2020-01-01T00:00:00Z'
+        self.assertEqual(alert.starts_at.year, 2020)
+
+    def test_add_label(self):
+        alert = CompactAlert()
+        alert.add_label('alertname', 'alert1')
+        self.assertEqual(alert, TEST_ADD_LABEL_DATA)
+        self.assertTrue(alert.validate_and_dump())
+
+    def test_validate(self):
+        alert = CompactAlert.from_dict(TEST_ALERT_VALIDATE_DATA_2)
+        with self.assertRaises(ValueError):
+            alert.validate_and_dump()
+
+
+class TestCompactSilence(unittest.TestCase):
+
+    def test_add_matcher(self):
+        silence = CompactSilence()
+        silence.add_matcher('alertname', 'alert1')
+        silence['endsAt'] = 'some_date_string'
+        self.assertEqual(silence, TEST_ADD_MATCHER_DATA)
+        self.assertTrue(silence.validate_and_dump())
+
+    def test_validate(self):
+        silence = CompactSilence.from_dict(TEST_SILENCE_VALIDATE_DATA_3)
+        with self.assertRaises(ValueError):
+            silence.validate_and_dump()
+
+
+class TestCompactResults(unittest.TestCase):
+
+    def setUp(self):
+        self.session = FakeSession({
+            ('GET', '/api/v2/alerts'): [TEST_RETURNED_ALERT],
+            ('GET', '/api/v2/silences'): [TEST_ADD_MATCHER_DATA],
+            ('POST', '/api/v2/alerts'): {},
+        })
+        self.a_manager = AlertManager('http://am', req_obj=self.session)
+
+    def test_get_alerts_compact(self):
+        result = self.a_manager.get_alerts(compact=True)
+        self.assertIsInstance(result[0], CompactAlert)
+        self.assertEqual(result[0], TEST_RETURNED_ALERT)
+
+    def test_get_silences_compact(self):
+        result = self.a_manager.get_silences(compact=True)
+        self.assertIsInstance(result[0], CompactSilence)
+
+    def test_post_compact_alert(self):
+        alert = CompactAlert(TEST_ADD_LABEL_DATA)
+        self.a_manager.post_alerts(alert)
+        self.assertEqual(json.loads(self.session.calls[0][2]['data']),
+                         [TEST_ADD_LABEL_DATA])
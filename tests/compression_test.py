@@ -0,0 +1,84 @@
+import gzip
+import io
+import json
+import unittest
+
+from urllib3.response import HTTPResponse
+
+from alertmanager import AlertManager
+from alertmanager.compression import compress_body
+
+from tests.data import TEST_ALERT_POST_DATA
+from tests.helpers import FakeSession, make_response
+
+
+class TestCompressBody(unittest.TestCase):
+
+    def test_small_bodies_untouched(self):
+        headers = {'Content-Type': 'application/json'}
+        body, sent = compress_body(b'[]', headers, threshold=100)
+        self.assertEqual(body, b'[]')
+        self.assertIs(sent, headers)
+
+    def test_large_bodies_compressed(self):
+        data = json.dumps([TEST_ALERT_POST_DATA] * 100).encode('utf-8')
+        headers = {'Content-Type': 'application/json'}
+        body, sent = compress_body(data, headers, threshold=100)
+        self.assertEqual(gzip.decompress(body), data)
+        self.assertLess(len(body), len(data) / 10)
+        self.assertEqual(sent['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Encoding', headers)
+
+    def test_deterministic(self):
+        data = b'x' * 1000
+        self.assertEqual(compress_body(data, {}, 0), compress_body(data, {}, 0))
+
+
+class TestManagerCompression(unittest.TestCase):
+
+    def setUp(self):
+        self.session = FakeSession({('POST', '/api/v2/alerts'): {}})
+
+    def test_posts_compressed_above_threshold(self):
+        a_manager = AlertManager('http://am', req_obj=self.session,
+                                 compress_threshold=1024)
+        a_manager.post_alerts(TEST_ALERT_POST_DATA)
+        a_manager.post_alerts(*[TEST_ALERT_POST_DATA] * 20)
+        small, large = [c[2] for c in self.session.calls]
+        self.assertNotIn('Content-Encoding', small['headers'])
+        self.assertEqual(large['headers']['Content-Encoding'], 'gzip')
+        self.assertEqual(len(json.loads(gzip.decompress(large['data']))), 20)
+
+    def test_bulk_batches_compressed(self):
+        a_manager = AlertManager('http://am', req_obj=self.session,
+                                 compress_threshold=0)
+        results = a_manager.post_alerts_bulk([TEST_ALERT_POST_DATA] * 10,
+                                             batch_size=5)
+        self.assertTrue(all(result.ok for result in results))
+        for call in self.session.calls:
+            self.assertEqual(len(json.loads(gzip.decompress(call[2]['data']))),
+                             5)
+
+    def test_off_by_default(self):
+        AlertManager('http://am', req_obj=self.session).post_alerts(
+            *[TEST_ALERT_POST_DATA] * 20)
+        self.assertNotIn('Content-Encoding',
+                         self.session.calls[0][2]['headers'])
+
+    def test_streams_gzip_responses(self):
+        alerts = [dict(TEST_ALERT_POST_DATA, fingerprint=str(n))
+                  for n in range(500)]
+        compressed = gzip.compress(json.dumps(alerts).encode('utf-8'))
+
+        def get_alerts(**kwargs):
+            response = make_response(200, b'')
+            response.raw = HTTPResponse(
+                body=io.BytesIO(compressed), preload_content=False,
+                headers={'Content-Encoding': 'gzip'})
+            return response
+
+        self.session.routes[('GET', '/api/v2/alerts')] = get_alerts
+        a_manager = AlertManager('http://am', req_obj=self.session)
+        fingerprints = [a['fingerprint']
+                        for a in a_manager.iter_alerts(chunk_size=1024)]
+        self.assertEqual(fingerprints, [str(n) for n in range(500)])
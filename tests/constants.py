@@ -1 +1,7 @@
-HOST = 'http://127.0.0.1'
+import os
+
+# Point the integration tests at a real Alert Manager by setting
+# ALERTMANAGER_HOST (and optionally ALERTMANAGER_PORT). Without it they run
+# against alertmanager.testing.FakeAlertManager.
+HOST = os.environ.get('ALERTMANAGER_HOST')
+PORT = int(os.environ.get('ALERTMANAGER_PORT', 9093))
@@ -0,0 +1,117 @@
+import unittest
+import json
+import threading
+import time
+
+from alertmanager import AlertManager
+from alertmanager import AlertEmitter
+from alertmanager.emitter import coalesce, QueueFull
+
+from tests.helpers import FakeSession, make_response
+
+
+class TestCoalesce(unittest.TestCase):
+
+    def test_coalesce_keeps_latest(self):
+        alerts = [
+            {'labels': {'alertname': 'a'}, 'endsAt': '1',
+             'generatorURL': 'http://x'},
+            {'labels': {'alertname': 'b'}},
+            {'labels': {'alertname': 'a'}, 'endsAt': '2',
+             'annotations': {'summary': 'new'}},
+        ]
+        result = coalesce(alerts)
+        self.assertEqual(len(result), 2)
+        self.assertEqual(result[0], {'labels': {'alertname': 'a'},
+                                     'endsAt': '2',
+                                     'generatorURL': 'http://x',
+                                     'annotations': {'summary': 'new'}})
+
+
+class TestAlertEmitter(unittest.TestCase):
+
+    def setUp(self):
+        self.posted = list()
+        self.gate = threading.Event()
+        self.gate.set()
+
+        def post(data=None, **kwargs):
+            self.gate.wait()
+            self.posted.append(json.loads(data))
+            return make_response(200, {})
+
+        self.a_manager = AlertManager('http://am', req_obj=FakeSession({
+            ('POST', '/api/v2/alerts'): post}))
+
+    def alert(self, name):
+        return {'labels': {'alertname': name}}
+
+    def test_flush_on_close(self):
+        emitter = AlertEmitter(self.a_manager, flush_interval=60)
+        for i in range(3):
+            emitter.emit(self.alert(str(i)))
+        emitter.emit(self.alert('0'))
+        emitter.close()
+        self.assertEqual(len(self.posted), 1)
+        self.assertEqual(len(self.posted[0]), 3)
+        self.assertEqual(emitter.stats['coalesced'], 1)
+        self.assertEqual(emitter.stats['posted'], 3)
+
+    def test_flush_on_size(self):
+        with AlertEmitter(self.a_manager, batch_size=2,
+                          flush_interval=60) as emitter:
+            emitter.emit(self.alert('a'))
+            emitter.emit(self.alert('b'))
+            self.assertTrue(emitter.flush(timeout=5))
+        self.assertEqual(self.posted, [[self.alert('a'), self.alert('b')]])
+
+    def test_flush_on_interval(self):
+        with AlertEmitter(self.a_manager, flush_interval=0.05) as emitter:
+            emitter.emit(self.alert('a'))
+            time.sleep(0.5)
+            self.assertEqual(len(self.posted), 1)
+
+    def test_invalid_alert_raises_in_caller(self):
+        with AlertEmitter(self.a_manager) as emitter:
+            with self.assertRaises(ValueError):
+                emitter.emit({'labels': {}})
+
+    def test_drop_newest(self):
+        emitter = AlertEmitter(self.a_manager, max_queue=2,
+                               flush_interval=60, policy='drop_newest')
+        self.assertTrue(emitter.emit(self.alert('a')))
+        self.assertTrue(emitter.emit(self.alert('b')))
+        self.assertFalse(emitter.emit(self.alert('c')))
+        emitter.close()
+        self.assertEqual(self.posted, [[self.alert('a'), self.alert('b')]])
+        self.assertEqual(emitter.stats['dropped'], 1)
+
+    def test_drop_oldest(self):
+        emitter = AlertEmitter(self.a_manager, max_queue=2,
+                               flush_interval=60, policy='drop_oldest')
+        for name in 'abc':
+            emitter.emit(self.alert(name))
+        emitter.close()
+        self.assertEqual(self.posted, [[self.alert('b'), self.alert('c')]])
+
+    def test_block_timeout(self):
+        self.gate.clear()
+        emitter = AlertEmitter(self.a_manager, max_queue=1, batch_size=1,
+                               flush_interval=60, block_timeout=0.05)
+        emitter.emit(self.alert('a'))
+        # The worker is now stuck posting 'a', so the queue fills up
+        emitter.flush(timeout=0.05)
+        emitter.emit(self.alert('b'))
+        with self.assertRaises(QueueFull):
+            emitter.emit(self.alert('c'))
+        self.gate.set()
+        emitter.close()
+        self.assertEqual(self.posted, [[self.alert('a')], [self.alert('b')]])
+
+    def test_failed_post_is_counted(self):
+        self.a_manager.request_session.routes[('POST', '/api/v2/alerts')] = \
+            lambda **kwargs: make_response(500, b'boom')
+        emitter = AlertEmitter(self.a_manager)
+        emitter.emit(self.alert('a'))
+        emitter.close()
+        self.assertEqual(emitter.stats['failed'], 1)
@@ -0,0 +1,148 @@
+import unittest
+
+import requests
+from requests import HTTPError
+
+from alertmanager import AlertManager, Alert, HAAlertManager, AlertEmitter
+
+from tests.data import TEST_ADD_MATCHER_DATA
+from tests.helpers import FakeSession, make_response
+
+ALERTS = [{'labels': {'alertname': 'a'}, 'fingerprint': 'f1'}]
+STATUS = {'cluster': {'name': 'peer-0', 'status': 'ready', 'peers': [
+    {'name': 'peer-0', 'address': '10.0.0.1:9094'},
+    {'name': 'peer-1', 'address': '10.0.0.2:9094'},
+    {'name': 'peer-2', 'address': '[fd00::3]:9094'},
+]}}
+
+
+def routes():
+    return {
+        ('GET', '/api/v2/alerts'): ALERTS,
+        ('GET', '/api/v2/status'): STATUS,
+        ('POST', '/api/v2/alerts'): {},
+        ('POST', '/api/v2/silences'): {'silenceID': 'abc'},
+    }
+
+
+class TestHAAlertManager(unittest.TestCase):
+
+    def setUp(self):
+        self.sessions = [FakeSession(routes()) for _ in range(3)]
+        self.ha = HAAlertManager(
+            [AlertManager('http://am{}'.format(n), req_obj=session)
+             for n, session in enumerate(self.sessions)], explore=0)
+
+    def tearDown(self):
+        self.ha.close()
+
+    def calls(self, method='GET'):
+        return [len([c for c in s.calls if c[0] == method])
+                for s in self.sessions]
+
+    def test_needs_replicas(self):
+        with self.assertRaises(ValueError):
+            HAAlertManager([])
+        with self.assertRaises(ValueError):
+            HAAlertManager(['http://am'], post_policy='some')
+
+    def test_routes_reads_to_fastest(self):
+        self.sessions[0].delay = 0.03
+        self.sessions[1].delay = 0.01
+        self.sessions[2].delay = 0.02
+        for _ in range(3):
+            self.ha.get_alerts()
+        # Each replica is measured once, then the fastest gets the traffic
+        self.ha.get_alerts()
+        self.ha.get_alerts()
+        self.assertEqual(self.calls(), [1, 3, 1])
+        self.assertEqual(self.ha.ranked()[0].host, 'http://am1:9093')
+
+    def test_fails_over(self):
+        self.sessions[0].routes[('GET', '/api/v2/alerts')] = \
+            requests.ConnectionError('refused')
+        self.sessions[1].routes[('GET', '/api/v2/alerts')] = \
+            lambda **kwargs: make_response(503, b'unavailable')
+        self.assertEqual(len(self.ha.get_alerts()), 1)
+        self.assertEqual(self.calls(), [1, 1, 1])
+        # The failed replicas cool down
+        self.ha.get_alerts()
+        self.assertEqual(self.calls(), [1, 1, 2])
+        self.assertEqual([r.failures for r in self.ha.replicas], [1, 1, 0])
+
+    def test_all_replicas_failing(self):
+        for session in self.sessions:
+            session.routes[('GET', '/api/v2/alerts')] = \
+                requests.ConnectionError('refused')
+        with self.assertRaises(requests.ConnectionError):
+            self.ha.get_alerts()
+        # Every replica is still tried while all of them are down
+        with self.assertRaises(requests.ConnectionError):
+            self.ha.get_alerts()
+        self.assertEqual(self.calls(), [2, 2, 2])
+
+    def test_client_errors_dont_fail_over(self):
+        self.sessions[0].routes[('GET', '/api/v2/alerts')] = \
+            lambda **kwargs: make_response(400, b'bad filter')
+        for n, replica in enumerate(self.ha.replicas):
+            replica.latency = n
+        with self.assertRaises(HTTPError):
+            self.ha.get_alerts()
+        self.assertEqual(self.calls(), [1, 0, 0])
+        self.assertEqual(self.ha.replicas[0].failures, 0)
+
+    def test_post_one(self):
+        self.sessions[0].routes[('POST', '/api/v2/alerts')] = \
+            requests.ConnectionError('refused')
+        self.ha.post_alerts(Alert.from_dict({'labels': {'a': 'b'}}))
+        self.assertEqual(self.calls('POST'), [1, 1, 0])
+
+    def test_post_all(self):
+        self.ha.post_policy = 'all'
+        self.sessions[0].routes[('POST', '/api/v2/alerts')] = \
+            requests.ConnectionError('refused')
+        self.ha.post_alerts(Alert.from_dict({'labels': {'a': 'b'}}))
+        self.assertEqual(self.calls('POST'), [1, 1, 1])
+        for session in self.sessions:
+            session.routes[('POST', '/api/v2/alerts')] = \
+                requests.ConnectionError('refused')
+        with self.assertRaises(requests.ConnectionError):
+            self.ha.post_alerts(Alert.from_dict({'labels': {'a': 'b'}}))
+
+    def test_post_bulk(self):
+        self.sessions[0].routes[('POST', '/api/v2/alerts')] = \
+            requests.ConnectionError('refused')
+        alerts = [{'labels': {'n': str(n)}} for n in range(10)]
+        # One worker, concurrent batches would race for the first replica
+        results = self.ha.post_alerts_bulk(alerts, batch_size=5,
+                                           max_workers=1)
+        self.assertTrue(all(result.ok for result in results))
+        self.ha.post_policy = 'all'
+        results = self.ha.post_alerts_bulk(alerts, batch_size=5)
+        self.assertTrue(all(result.ok for result in results))
+        # Unmeasured replicas are tried before measured ones
+        self.assertEqual(self.calls('POST'), [3, 3, 3])
+
+    def test_emitter(self):
+        with AlertEmitter(self.ha, flush_interval=0.01) as emitter:
+            emitter.emit({'labels': {'a': 'b'}})
+        self.assertEqual(emitter.stats['posted'], 1)
+
+    def test_silence_fail_over_only_when_unreachable(self):
+        self.sessions[0].routes[('POST', '/api/v2/silences')] = \
+            requests.ReadTimeout('slow')
+        with self.assertRaises(requests.ReadTimeout):
+            self.ha.post_silence(TEST_ADD_MATCHER_DATA)
+        self.assertEqual(self.calls('POST'), [1, 0, 0])
+        self.sessions[1].routes[('POST', '/api/v2/silences')] = \
+            requests.ConnectionError('refused')
+        self.ha.post_silence(TEST_ADD_MATCHER_DATA)
+        self.assertEqual(self.calls('POST'), [1, 1, 1])
+
+    def test_discover(self):
+        added = self.ha.discover(timeout=5)
+        self.assertEqual(added, ['http://10.0.0.2:9093',
+                                 'http://[fd00::3]:9093'])
+        self.assertEqual(len(self.ha.replicas), 5)
+        self.assertEqual(self.ha.replicas[-1].manager.timeout, 5)
+        self.assertEqual(self.ha.discover(), [])
@@ -0,0 +1,57 @@
+import io
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+from requests.models import Response
+
+
+def make_response(status_code=200, body=None, headers=None):
+    """Build a real requests.Response carrying a json body."""
+    response = Response()
+    response.status_code = status_code
+    if isinstance(body, bytes):
+        response._content = body
+    else:
+        response._content = json.dumps(body).encode('utf-8')
+    response.raw = io.BytesIO(response._content)
+    response.headers.update(headers or {})
+    response.headers.setdefault('Content-Type', 'application/json')
+    response.encoding = 'utf-8'
+    return response
+
+
+class FakeSession(object):
+    """
+    Stand-in for requests.Session routing requests to canned handlers.
+
+    Routes map (method, path) to either a body that is returned with a 200,
+    an exception instance that is raised, or a callable taking the request
+    kwargs and returning a requests.Response.
+
+    """
+
+    def __init__(self, routes=None, delay=0):
+        self.routes = routes or dict()
+        self.delay = delay
+        self.calls = list()
+        self._lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        path = urlsplit(url).path
+        with self._lock:
+            self.calls.append((method, path, kwargs))
+        if self.delay:
+            time.sleep(self.delay)
+        handler = self.routes.get((method, path))
+        if handler is None:
+            return make_response(404, {'error': 'not found'})
+        if isinstance(handler, Exception):
+            raise handler
+        if callable(handler):
+            return handler(**kwargs)
+        return make_response(200, handler)
+
+    def close(self):
+        pass
@@ -0,0 +1,67 @@
+import os
+import subprocess
+import sys
+import unittest
+
+import alertmanager
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def loaded_modules(statement):
+    """Return the modules loaded by a statement in a fresh interpreter."""
+    code = '{}\nimport sys\nprint("\\n".join(sys.modules))'.format(statement)
+    output = subprocess.check_output([sys.executable, '-c', code], cwd=ROOT)
+    return set(output.decode('utf-8').split())
+
+
+class TestLazyImports(unittest.TestCase):
+
+    def test_import_loads_nothing_heavy(self):
+        modules = loaded_modules('import alertmanager')
+        for heavy in ('maya', 'aiohttp', 'requests', 'box'):
+            self.assertNotIn(heavy, modules)
+
+    def test_client_without_maya(self):
+        modules = loaded_modules(
+            'from alertmanager import AlertManager, Alert\n'
+            'Alert.from_dict({"labels": {"alertname": "a"}})'
+            '.validate_and_dump()')
+        self.assertIn('requests', modules)
+        self.assertNotIn('maya', modules)
+        self.assertNotIn('aiohttp', modules)
+
+    def test_index_without_client(self):
+        modules = loaded_modules('from alertmanager import AlertIndex')
+        for module in ('requests', 'alertmanager.multi',
+                       'alertmanager.alertmanager', 'concurrent.futures'):
+            self.assertNotIn(module, modules)
+
+    def test_set_endtime_without_maya(self):
+        modules = loaded_modules(
+            'from alertmanager import Silence\n'
+            'Silence().set_endtime("in 1 hour")')
+        self.assertNotIn('maya', modules)
+
+    def test_set_endtime_falls_back_to_maya(self):
+        modules = loaded_modules(
+            'from alertmanager import Silence\n'
+            'Silence().set_endtime("tomorrow")')
+        self.assertIn('maya', modules)
+
+    def test_exports(self):
+        for name in alertmanager.__all__:
+            self.assertIsNotNone(getattr(alertmanager, name))
+        self.assertIs(alertmanager.AlertManager,
+                      alertmanager.alertmanager.AlertManager)
+        self.assertIn('HAAlertManager', dir(alertmanager))
+
+    def test_submodules(self):
+        from alertmanager import codec
+        self.assertIs(alertmanager.codec, codec)
+
+    def test_unknown_name(self):
+        with self.assertRaises(AttributeError):
+            alertmanager.NotAThing
+        with self.assertRaises(ImportError):
+            from alertmanager import NotAThing  # noqa: F401
@@ -0,0 +1,84 @@
+import unittest
+
+from alertmanager import Alert
+from alertmanager import AlertIndex
+from alertmanager.matchers import filter_alerts
+
+
+def alert(fingerprint, **labels):
+    return {'fingerprint': fingerprint, 'labels': labels}
+
+
+ALERTS = [
+    alert('1', alertname='DiskFull', severity='critical', team='storage'),
+    alert('2', alertname='DiskSlow', severity='warning', team='storage'),
+    alert('3', alertname='CPUHigh', severity='critical'),
+    alert('4', alertname='CPUHigh', severity='info', team='compute'),
+]
+
+QUERIES = [
+    'severity="critical"',
+    'severity="critical",team="storage"',
+    'alertname=~"Disk.*"',
+    'team!="storage"',
+    'team=""',
+    'team!~"stor.*",severity=~"critical|info"',
+    'severity="nope"',
+    'missing=~".+"',
+    {'alertname': 'CPUHigh'},
+]
+
+
+def fingerprints(alerts):
+    return sorted(a['fingerprint'] for a in alerts)
+
+
+class TestAlertIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = AlertIndex(ALERTS)
+
+    def test_queries_match_linear_scan(self):
+        for spec in QUERIES:
+            self.assertEqual(fingerprints(self.index.query(spec)),
+                             fingerprints(filter_alerts(ALERTS, spec)), spec)
+
+    def test_count(self):
+        self.assertEqual(self.index.count('severity="critical"'), 2)
+
+    def test_remove(self):
+        self.index.remove(ALERTS[0])
+        self.assertEqual(len(self.index), 3)
+        self.assertNotIn(ALERTS[0], self.index)
+        self.assertEqual(fingerprints(self.index.query('team="storage"')),
+                         ['2'])
+        self.index.remove('2')
+        self.assertEqual(self.index.label_values('team'), {'compute'})
+
+    def test_add_replaces(self):
+        self.index.add(alert('3', alertname='CPUHigh', severity='warning'))
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(fingerprints(self.index.query('severity="warning"')),
+                         ['2', '3'])
+        self.assertEqual(fingerprints(self.index.query('severity="critical"')),
+                         ['1'])
+
+    def test_alert_objects(self):
+        index = AlertIndex(Alert(a) for a in ALERTS)
+        result = index.query('alertname="DiskFull"')
+        self.assertIsInstance(result[0], Alert)
+        self.assertIs(index.get('1'), result[0])
+
+    def test_non_str_labels_unset(self):
+        accessed = Alert(alert('5', alertname='Lost'))
+        accessed.labels.team
+        index = AlertIndex([accessed, alert('6', alertname='Error', code=500)])
+        self.assertEqual(fingerprints(index.query('team!="storage"')),
+                         ['5', '6'])
+        self.assertEqual(index.query('team="storage"'), [])
+        self.assertEqual(index.query('code="500"'), [])
+        self.assertEqual(index.label_values('code'), set())
+
+    def test_remove_missing(self):
+        with self.assertRaises(KeyError):
+            self.index.remove('nope')
@@ -0,0 +1,239 @@
+import unittest
+import urllib.request
+
+import requests
+from requests import HTTPError
+
+from alertmanager import (AlertManager, Hook, MetricsCollector,
+                          OpenTelemetryHook)
+from alertmanager.instrumentation import current_call
+
+from tests.data import TEST_ALERT_POST_DATA
+from tests.helpers import FakeSession, make_response
+
+try:
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import \
+        InMemorySpanExporter
+except ImportError:
+    TracerProvider = None
+
+
+class Recorder(Hook):
+
+    def __init__(self):
+        self.before_calls = list()
+        self.after_calls = list()
+
+    def before(self, call):
+        self.before_calls.append((call.name, call.status))
+
+    def after(self, call):
+        self.after_calls.append(call)
+
+
+class Broken(Hook):
+
+    def before(self, call):
+        raise RuntimeError('broken hook')
+
+
+class TestHooks(unittest.TestCase):
+
+    def setUp(self):
+        self.session = FakeSession({
+            ('GET', '/api/v2/alerts'): [TEST_ALERT_POST_DATA] * 3,
+            ('GET', '/api/v2/silences'): lambda **kw: make_response(503),
+            ('POST', '/api/v2/alerts'): {},
+            ('GET', '/api/v2/status'): lambda **kw: make_response(503, b'x'),
+            ('DELETE', '/api/v2/silence/abc'): {},
+            ('GET', '/api/v2/receivers'): requests.ConnectionError('down'),
+        })
+        self.recorder = Recorder()
+        self.a_manager = AlertManager('http://am', req_obj=self.session,
+                                      hooks=[self.recorder])
+
+    def test_successful_call(self):
+        self.a_manager.get_alerts(filter={'a': 'b'})
+        self.assertEqual(self.recorder.before_calls, [('get_alerts', None)])
+        call = self.recorder.after_calls[0]
+        self.assertEqual((call.method, call.route, call.status),
+                         ('GET', '/api/v2/alerts', 200))
+        self.assertEqual(call.host, 'http://am:9093')
+        self.assertEqual(call.items, 3)
+        self.assertGreater(call.response_bytes, 0)
+        self.assertIsNone(call.error)
+        self.assertEqual(set(call.phases),
+                         {'http', 'transfer', 'decode', 'build'})
+        self.assertAlmostEqual(sum(call.phases.values()), call.duration)
+        self.assertIsNone(current_call())
+
+    def test_results_unchanged(self):
+        session = FakeSession({
+            ('GET', '/api/v2/status'): {'cluster': {'status': 'ready'}},
+            ('GET', '/api/v2/alerts'): [TEST_ALERT_POST_DATA],
+            ('POST', '/api/v2/alerts'): {},
+        })
+        plain = AlertManager('http://am', req_obj=session)
+        hooked = AlertManager('http://am', req_obj=session,
+                              hooks=[MetricsCollector()])
+        for name, args in (('get_status', ()), ('get_alerts', ()),
+                           ('post_alerts', (TEST_ALERT_POST_DATA,))):
+            expected = getattr(plain, name)(*args)
+            result = getattr(hooked, name)(*args)
+            self.assertEqual(result, expected, msg=name)
+            self.assertEqual(type(result), type(expected), msg=name)
+
+    def test_lazy_items_counted(self):
+        self.a_manager.get_alerts(lazy=True)
+        call = self.recorder.after_calls[0]
+        self.assertEqual(call.items, 3)
+        self.assertIn('decode', call.phases)
+
+    def test_streaming_call(self):
+        alerts = self.a_manager.iter_alerts()
+        self.assertEqual(self.recorder.before_calls, [])
+        next(alerts)
+        self.assertEqual(self.recorder.before_calls, [('iter_alerts', None)])
+        self.assertIsNone(current_call())
+        self.assertEqual(len(list(alerts)), 2)
+        call, = self.recorder.after_calls
+        self.assertEqual((call.route, call.status, call.items),
+                         ('/api/v2/alerts', 200, 3))
+        self.assertLessEqual(sum(call.phases.values()), call.duration)
+
+    def test_streaming_call_closed_early(self):
+        alerts = self.a_manager.iter_alerts()
+        next(alerts)
+        alerts.close()
+        call, = self.recorder.after_calls
+        self.assertEqual(call.items, 1)
+        self.assertIsNone(call.error)
+
+    def test_streaming_call_failed(self):
+        with self.assertRaises(HTTPError):
+            list(self.a_manager.iter_silences())
+        call, = self.recorder.after_calls
+        self.assertEqual((call.name, call.status, call.items),
+                         ('iter_silences', 503, 0))
+        self.assertIsInstance(call.error, HTTPError)
+
+    def test_request_bytes(self):
+        self.a_manager.post_alerts(TEST_ALERT_POST_DATA)
+        call = self.recorder.after_calls[0]
+        self.assertEqual(call.name, 'post_alerts')
+        self.assertEqual(call.request_bytes,
+                         len(self.session.calls[0][2]['data']))
+
+    def test_failed_calls(self):
+        with self.assertRaises(HTTPError):
+            self.a_manager.get_status()
+        with self.assertRaises(requests.ConnectionError):
+            self.a_manager.get_receivers()
+        status, receivers = self.recorder.after_calls
+        self.assertEqual(status.status, 503)
+        self.assertIsInstance(status.error, HTTPError)
+        self.assertIsNone(receivers.status)
+        self.assertIsInstance(receivers.error, requests.ConnectionError)
+
+    def test_bulk_batches(self):
+        self.a_manager.post_alerts_bulk([TEST_ALERT_POST_DATA] * 5,
+                                        batch_size=2)
+        calls = self.recorder.after_calls
+        self.assertEqual([c.name for c in calls], ['post_batch'] * 3)
+        self.assertEqual(sorted(c.items for c in calls), [1, 2, 2])
+
+    def test_broken_hook_ignored(self):
+        self.a_manager.hooks.insert(0, Broken())
+        with self.assertLogs('alertmanager.instrumentation'):
+            self.assertEqual(len(self.a_manager.get_alerts()), 3)
+        self.assertEqual(len(self.recorder.after_calls), 1)
+
+
+class TestMetricsCollector(unittest.TestCase):
+
+    def setUp(self):
+        self.session = FakeSession({
+            ('GET', '/api/v2/alerts'): [TEST_ALERT_POST_DATA] * 3,
+            ('DELETE', '/api/v2/silence/abc'): {},
+            ('DELETE', '/api/v2/silence/def'): lambda **kw: make_response(
+                404, b'not found'),
+        })
+        self.metrics = MetricsCollector(buckets=(0.5, 0.1, 60))
+        self.a_manager = AlertManager('http://am', req_obj=self.session,
+                                      hooks=[self.metrics])
+
+    def test_snapshot(self):
+        for _ in range(2):
+            self.a_manager.get_alerts()
+        metrics = self.metrics.snapshot()[('get_alerts', '/api/v2/alerts')]
+        self.assertEqual(metrics['count'], 2)
+        self.assertEqual(metrics['buckets'][60], 2)
+        self.assertEqual(metrics['statuses'], {'200': 2})
+        self.assertEqual(metrics['items'], 6)
+        self.assertIn('decode', metrics['phases'])
+
+    def test_routes_normalized(self):
+        self.a_manager.delete_silence('abc')
+        with self.assertRaises(HTTPError):
+            self.a_manager.delete_silence('def')
+        metrics = self.metrics.snapshot()
+        self.assertEqual(list(metrics),
+                         [('delete_silence', '/api/v2/silence/{id}')])
+        silence = metrics[('delete_silence', '/api/v2/silence/{id}')]
+        self.assertEqual(silence['statuses'], {'200': 1, '404': 1})
+        self.assertEqual(silence['errors'], {'HTTPError': 1})
+
+    def test_render(self):
+        self.a_manager.get_alerts()
+        text = self.metrics.render()
+        labels = 'call="get_alerts",route="/api/v2/alerts"'
+        self.assertIn('# TYPE alertmanager_client_request_duration_seconds '
+                      'histogram', text)
+        prefix = 'alertmanager_client_'
+        for line in (
+                'request_duration_seconds_bucket{' + labels + ',le="+Inf"} 1',
+                'request_duration_seconds_count{' + labels + '} 1',
+                'requests_total{' + labels + ',status="200"} 1',
+                'items_total{' + labels + '} 3'):
+            self.assertIn(prefix + line, text)
+        # Buckets are sorted and cumulative
+        bounds = [line.split('le="')[1].split('"')[0]
+                  for line in text.splitlines() if '_bucket{' in line]
+        self.assertEqual(bounds, ['0.1', '0.5', '60', '+Inf'])
+
+    def test_http_server(self):
+        self.a_manager.get_alerts()
+        server = self.metrics.start_http_server()
+        try:
+            url = 'http://127.0.0.1:{}/metrics'.format(server.server_port)
+            with urllib.request.urlopen(url) as response:
+                body = response.read().decode('utf-8')
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual(body, self.metrics.render())
+
+
+class TestOpenTelemetryHook(unittest.TestCase):
+
+    @unittest.skipIf(TracerProvider is not None,
+                     'opentelemetry is installed')
+    def test_requires_opentelemetry(self):
+        with self.assertRaises(ImportError):
+            OpenTelemetryHook()
+
+    @unittest.skipIf(TracerProvider is None,
+                     'opentelemetry-sdk is not installed')
+    def test_spans(self):
+        exporter = InMemorySpanExporter()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+        session = FakeSession({('GET', '/api/v2/alerts'): []})
+        a_manager = AlertManager('http://am', req_obj=session, hooks=[
+            OpenTelemetryHook(provider.get_tracer('test'))])
+        a_manager.get_alerts()
+        span, = exporter.get_finished_spans()
+        self.assertEqual(span.name, 'alertmanager.get_alerts')
+        self.assertEqual(span.attributes['http.response.status_code'], 200)
@@ -0,0 +1,82 @@
+import unittest
+import json
+
+from alertmanager import AlertManager
+from alertmanager import Alert
+from alertmanager import CompactAlert
+from alertmanager import LazyAlertList
+
+from tests.helpers import FakeSession
+
+
+def alert(name, severity):
+    return {'labels': {'alertname': name, 'severity': severity}}
+
+
+ALERTS = [alert('a', 'warning'), alert('b', 'critical'), alert('c', 'info')]
+RAW = json.dumps(ALERTS, separators=(',', ':')).encode('utf-8')
+
+
+class TestLazyAlertList(unittest.TestCase):
+
+    def setUp(self):
+        self.alerts = LazyAlertList(RAW)
+
+    def test_not_decoded_until_used(self):
+        self.assertIsNone(self.alerts._items)
+        self.assertEqual(len(self.alerts), 3)
+        self.assertIsNotNone(self.alerts._items)
+
+    def test_wraps_on_access(self):
+        self.assertEqual(self.alerts._wrapped, {})
+        first = self.alerts[0]
+        self.assertIsInstance(first, Alert)
+        self.assertIs(self.alerts[0], first)
+        self.assertEqual(list(self.alerts._wrapped), [0])
+        self.assertEqual(self.alerts[-1].labels.alertname, 'c')
+
+    def test_slice(self):
+        sliced = self.alerts[1:]
+        self.assertIsInstance(sliced, LazyAlertList)
+        self.assertEqual([a.labels.alertname for a in sliced], ['b', 'c'])
+
+    def test_label_values(self):
+        self.assertEqual(self.alerts.label_values('severity'),
+                         ['warning', 'critical', 'info'])
+        self.assertEqual(self.alerts.label_values('team', '-'),
+                         ['-', '-', '-'])
+
+    def test_filter_labels(self):
+        result = self.alerts.filter_labels(severity='critical')
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0].labels.alertname, 'b')
+
+    def test_has_label_without_decoding(self):
+        self.assertFalse(self.alerts.has_label('severity', 'page'))
+        self.assertIsNone(self.alerts._items)
+        self.assertTrue(self.alerts.has_label('severity', 'critical'))
+
+    def test_has_label_pretty_printed(self):
+        alerts = LazyAlertList(json.dumps(ALERTS, indent=4).encode('utf-8'))
+        self.assertTrue(alerts.has_label('severity', 'critical'))
+        self.assertFalse(alerts.has_label('severity', 'page'))
+
+    def test_has_label_requires_exact_label(self):
+        raw = json.dumps([{'labels': {'a': 'b'},
+                           'annotations': {'severity': 'critical'}}])
+        alerts = LazyAlertList(raw.encode('utf-8'))
+        self.assertFalse(alerts.has_label('severity', 'critical'))
+
+    def test_equality(self):
+        self.assertEqual(self.alerts, [Alert(a) for a in ALERTS])
+
+
+class TestGetAlertsLazy(unittest.TestCase):
+
+    def test_get_alerts_lazy(self):
+        a_manager = AlertManager('http://am', req_obj=FakeSession({
+            ('GET', '/api/v2/alerts'): ALERTS}))
+        result = a_manager.get_alerts(lazy=True, compact=True)
+        self.assertIsInstance(result, LazyAlertList)
+        self.assertIsInstance(result[1], CompactAlert)
+        self.assertEqual(result[1].labels['severity'], 'critical')
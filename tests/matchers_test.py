@@ -0,0 +1,136 @@
+import unittest
+
+from alertmanager import Alert
+from alertmanager import CompactAlert
+from alertmanager import Silence
+from alertmanager.matchers import Matcher, compile_matchers, compile_regex
+from alertmanager.matchers import filter_alerts, parse_matchers
+
+ALERTS = [
+    {'labels': {'alertname': 'DiskFull', 'severity': 'critical',
+                'team': 'storage'}},
+    {'labels': {'alertname': 'DiskSlow', 'severity': 'warning',
+                'team': 'storage'}},
+    {'labels': {'alertname': 'CPUHigh', 'severity': 'critical'}},
+]
+
+
+def names(alerts):
+    return [a['labels']['alertname'] for a in alerts]
+
+
+class TestParseMatchers(unittest.TestCase):
+
+    def test_parse_operators(self):
+        for text, op in (('a="b"', '='), ('a!="b"', '!='),
+                         ('a=~"b"', '=~'), ('a!~"b"', '!~')):
+            matcher = Matcher.parse(text)
+            self.assertEqual((matcher.name, matcher.op, matcher.value),
+                             ('a', op, 'b'))
+
+    def test_parse_unquoted_and_escaped(self):
+        self.assertEqual(Matcher.parse('team = storage').value, 'storage')
+        self.assertEqual(Matcher.parse(r'a="say \"hi\", ok"').value,
+                         'say "hi", ok')
+        self.assertEqual(Matcher.parse(r'a="back\\slash\nnew"').value,
+                         'back\\slash\nnew')
+
+    def test_parse_regex_escapes(self):
+        matcher = Matcher.parse(r'instance=~"host\.example"')
+        self.assertEqual(matcher.value, r'host\.example')
+        self.assertTrue(matcher.matches({'instance': 'host.example'}))
+        self.assertFalse(matcher.matches({'instance': 'hostXexample'}))
+        matcher = Matcher.parse(r'job=~"node\d+"')
+        self.assertEqual(matcher.value, r'node\d+')
+        self.assertTrue(matcher.matches({'job': 'node42'}))
+
+    def test_str_round_trips(self):
+        for value in (r'host\.example', 'say "hi"', 'a\\b\nc'):
+            matcher = Matcher('a', '=~', value)
+            self.assertEqual(Matcher.parse(str(matcher)), matcher)
+
+    def test_parse_list(self):
+        matchers = parse_matchers(
+            '{alertname=~"Disk.*", severity!="info", summary="a, b"}')
+        self.assertEqual([str(m) for m in matchers],
+                         ['alertname=~"Disk.*"', 'severity!="info"',
+                          'summary="a, b"'])
+
+    def test_parse_invalid(self):
+        for text in ('a', 'a=="b"', '{a="b" c="d"}', 'a=~"("'):
+            with self.assertRaises(ValueError, msg=text):
+                parse_matchers(text)
+
+    def test_from_silence_matcher(self):
+        matcher = Matcher.from_silence_matcher(
+            {'name': 'a', 'value': 'b.*', 'isRegex': True, 'isEqual': False})
+        self.assertEqual(matcher.op, '!~')
+
+    def test_from_silence_object_matcher(self):
+        # Silence is a default_box, missing keys must fall back to defaults
+        silence = Silence({'matchers': [{'name': 'a', 'value': 'b'}]})
+        matcher = Matcher.from_silence_matcher(silence['matchers'][0])
+        self.assertEqual(matcher.op, '=')
+
+    def test_compile_orders_regex_last(self):
+        matchers = compile_matchers(['a=~"x"', 'b="y"'])
+        self.assertEqual([m.op for m in matchers], ['=', '=~'])
+
+
+class TestMatching(unittest.TestCase):
+
+    def test_regex_is_anchored(self):
+        self.assertFalse(Matcher('a', '=~', 'Disk').matches(
+            {'a': 'DiskFull'}))
+        self.assertTrue(Matcher('a', '=~', 'Disk.*').matches(
+            {'a': 'DiskFull'}))
+
+    def test_missing_label_is_empty(self):
+        self.assertTrue(Matcher('team', '=', '').matches({}))
+        self.assertTrue(Matcher('team', '!~', 'storage').matches({}))
+
+    def test_non_str_label_is_empty(self):
+        labels = {'code': 500}
+        self.assertFalse(Matcher('code', '=', '404').matches(labels))
+        self.assertFalse(Matcher('code', '=', '500').matches(labels))
+        self.assertTrue(Matcher('code', '!=', '404').matches(labels))
+        self.assertEqual(
+            list(filter_alerts([{'labels': labels}], 'code="404"')), [])
+
+    def test_accessed_label_is_empty(self):
+        alert = Alert(ALERTS[2])
+        alert.labels.team
+        self.assertEqual(names(filter_alerts([alert], 'team="storage"')), [])
+        self.assertEqual(names(filter_alerts([alert], 'team!="storage"')),
+                         ['CPUHigh'])
+
+    def test_regex_cache(self):
+        compile_regex.cache_clear()
+        Matcher('a', '=~', 'x.*')
+        Matcher('b', '!~', 'x.*')
+        self.assertEqual(compile_regex.cache_info().hits, 1)
+
+    def test_filter_alerts(self):
+        self.assertEqual(
+            names(filter_alerts(ALERTS, 'alertname=~"Disk.*"')),
+            ['DiskFull', 'DiskSlow'])
+        self.assertEqual(
+            names(filter_alerts(ALERTS, {'severity': 'critical'})),
+            ['DiskFull', 'CPUHigh'])
+        self.assertEqual(
+            names(filter_alerts(ALERTS, 'severity="critical",team=""')),
+            ['CPUHigh'])
+
+    def test_filter_non_str_value(self):
+        alerts = [{'labels': {'alertname': 'Error', 'code': '500'}},
+                  {'labels': {'alertname': 'NotFound', 'code': '404'}}]
+        self.assertEqual(names(filter_alerts(alerts, {'code': 500})),
+                         ['Error'])
+        self.assertEqual(Matcher('code', '!=', 404).value, '404')
+
+    def test_filter_alert_objects(self):
+        for cls in (Alert, CompactAlert):
+            alerts = [cls(a) for a in ALERTS]
+            result = list(filter_alerts(alerts, 'team!="storage"'))
+            self.assertEqual(names(result), ['CPUHigh'])
+            self.assertIsInstance(result[0], cls)
@@ -0,0 +1,108 @@
+import threading
+import unittest
+import time
+
+from requests import ConnectionError
+
+from alertmanager import AlertManager
+from alertmanager import MultiAlertManager
+
+from tests.helpers import FakeSession, make_response
+
+
+def alert(fingerprint, name):
+    return {'fingerprint': fingerprint, 'labels': {'alertname': name}}
+
+
+class TestMultiAlertManager(unittest.TestCase):
+
+    def setUp(self):
+        self.first = AlertManager('http://am1', req_obj=FakeSession({
+            ('GET', '/api/v2/alerts'): [alert('a', 'one'), alert('b', 'two')],
+            ('GET', '/api/v2/silences'): [{'id': 's1'}],
+        }))
+        self.second = AlertManager('http://am2', req_obj=FakeSession({
+            ('GET', '/api/v2/alerts'): [alert('b', 'two'), alert('c', 'x')],
+            ('GET', '/api/v2/silences'): [{'id': 's1'}, {'id': 's2'}],
+        }))
+        self.multi = MultiAlertManager([self.first, self.second])
+
+    def tearDown(self):
+        self.multi.close()
+
+    def test_get_alerts_deduplicates_by_fingerprint(self):
+        result = self.multi.get_alerts()
+        self.assertEqual([a.fingerprint for a in result], ['a', 'b', 'c'])
+        self.assertFalse(result.partial)
+
+    def test_get_silences_deduplicates_by_id(self):
+        result = self.multi.get_silences()
+        self.assertEqual([s.id for s in result], ['s1', 's2'])
+
+    def test_filters_are_passed_to_every_host(self):
+        self.multi.get_alerts(filter={'alertname': 'two'})
+        for manager in (self.first, self.second):
+            params = manager.request_session.calls[0][2]['params']
+            self.assertEqual(params['filter'], ['alertname="two"'])
+
+    def test_partial_results_on_failure(self):
+        self.second.request_session.routes[('GET', '/api/v2/alerts')] = \
+            ConnectionError('down')
+        result = self.multi.get_alerts()
+        self.assertEqual([a.fingerprint for a in result], ['a', 'b'])
+        self.assertIsInstance(result.errors['http://am2:9093'],
+                              ConnectionError)
+
+    def test_timeout_is_the_slowest_host(self):
+        self.first.request_session.delay = 0.2
+        self.second.request_session.delay = 0.2
+        start = time.time()
+        self.multi.get_alerts()
+        self.assertLess(time.time() - start, 0.35)
+
+    def test_timeout_reports_slow_host(self):
+        self.second.request_session.delay = 0.5
+        self.multi.timeout = 0.1
+        result = self.multi.get_alerts()
+        self.assertEqual([a.fingerprint for a in result], ['a', 'b'])
+        self.assertIsInstance(result.errors['http://am2:9093'], TimeoutError)
+
+    def test_hung_host_does_not_block_later_calls(self):
+        release = threading.Event()
+
+        def blocking(**kwargs):
+            release.wait(5)
+            return make_response(200, [])
+        hung = self.second.request_session
+        hung.routes[('GET', '/api/v2/alerts')] = blocking
+        self.multi.timeout = 0.1
+        try:
+            for _ in range(3):
+                start = time.time()
+                result = self.multi.get_alerts()
+                self.assertLess(time.time() - start, 0.3)
+                self.assertEqual([a.fingerprint for a in result], ['a', 'b'])
+                self.assertIsInstance(result.errors['http://am2:9093'],
+                                      TimeoutError)
+            # Only the first call reached the hung host
+            self.assertEqual(len(hung.calls), 1)
+        finally:
+            release.set()
+        time.sleep(0.05)
+        self.assertFalse(self.multi.get_alerts().partial)
+        self.assertEqual(len(hung.calls), 2)
+
+    def test_timeout_is_the_request_timeout(self):
+        multi = MultiAlertManager(['http://am1', self.first], timeout=2)
+        self.assertEqual(multi.managers[0].timeout, 2)
+        self.assertIsNone(multi.managers[1].timeout)
+
+    def test_get_alert_groups_merges_groups(self):
+        group = {'receiver': {'name': 'team'}, 'labels': {'job': 'x'}}
+        self.first.request_session.routes[('GET', '/api/v2/alerts/groups')] = [
+            dict(group, alerts=[alert('a', 'one')])]
+        self.second.request_session.routes[('GET', '/api/v2/alerts/groups')] = [
+            dict(group, alerts=[alert('a', 'one'), alert('c', 'x')])]
+        result = self.multi.get_alert_groups()
+        self.assertEqual(len(result), 1)
+        self.assertEqual([a.fingerprint for a in result[0].alerts], ['a', 'c'])
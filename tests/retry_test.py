@@ -0,0 +1,190 @@
+import unittest
+import time
+
+import requests
+from requests import HTTPError
+
+from alertmanager import AlertManager, Alert
+from alertmanager import (RetryPolicy, RetryBudget, CircuitBreaker,
+                          CircuitOpenError)
+
+from tests.data import TEST_ADD_MATCHER_DATA
+from tests.helpers import FakeSession, make_response
+
+
+def sequence(*outcomes):
+    """Return a route handler answering with each outcome in turn."""
+    outcomes = list(outcomes)
+
+    def handler(**kwargs):
+        outcome = outcomes.pop(0) if len(outcomes) > 1 else outcomes[0]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return make_response(outcome, {})
+    return handler
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.policy = RetryPolicy(backoff=0, budget=False)
+
+    def manager(self, routes, **kwargs):
+        self.session = FakeSession(routes)
+        kwargs.setdefault('retry', self.policy)
+        return AlertManager('http://am', req_obj=self.session, **kwargs)
+
+    def test_retries_transient_status(self):
+        a_manager = self.manager(
+            {('GET', '/api/v2/status'): sequence(503, 502, 200)})
+        a_manager.get_status()
+        self.assertEqual(len(self.session.calls), 3)
+
+    def test_gives_up_after_max_attempts(self):
+        a_manager = self.manager(
+            {('GET', '/api/v2/status'): sequence(503)})
+        with self.assertRaises(HTTPError):
+            a_manager.get_status()
+        self.assertEqual(len(self.session.calls), 3)
+
+    def test_client_errors_not_retried(self):
+        a_manager = self.manager(
+            {('GET', '/api/v2/status'): sequence(400)})
+        with self.assertRaises(HTTPError):
+            a_manager.get_status()
+        self.assertEqual(len(self.session.calls), 1)
+
+    def test_connection_errors_retried(self):
+        a_manager = self.manager({('GET', '/api/v2/status'): sequence(
+            requests.ConnectionError('reset'), 200)})
+        a_manager.get_status()
+        self.assertEqual(len(self.session.calls), 2)
+
+    def test_posting_alerts_retried(self):
+        a_manager = self.manager(
+            {('POST', '/api/v2/alerts'): sequence(503, 200)})
+        a_manager.post_alerts(Alert.from_dict({'labels': {'a': 'b'}}))
+        self.assertEqual(len(self.session.calls), 2)
+
+    def test_posting_silences_not_retried(self):
+        a_manager = self.manager(
+            {('POST', '/api/v2/silences'): sequence(
+                503, requests.ReadTimeout('slow'), 200)})
+        with self.assertRaises(HTTPError):
+            a_manager.post_silence(TEST_ADD_MATCHER_DATA)
+        with self.assertRaises(requests.ReadTimeout):
+            a_manager.post_silence(TEST_ADD_MATCHER_DATA)
+        self.assertEqual(len(self.session.calls), 2)
+
+    def test_connect_timeout_always_retried(self):
+        a_manager = self.manager({('POST', '/api/v2/silences'): sequence(
+            requests.ConnectTimeout('down'), 200)})
+        a_manager.post_silence(TEST_ADD_MATCHER_DATA)
+        self.assertEqual(len(self.session.calls), 2)
+
+    def test_delay(self):
+        policy = RetryPolicy(backoff=0.5, max_backoff=3, jitter=False)
+        self.assertEqual([policy.delay(n) for n in (1, 2, 3, 4)],
+                         [0.5, 1, 2, 3])
+        response = make_response(503, {}, headers={'Retry-After': '2'})
+        self.assertEqual(policy.delay(1, response), 2)
+        response = make_response(503, {}, headers={'Retry-After': '120'})
+        self.assertEqual(policy.delay(1, response), 3)
+        policy.jitter = True
+        self.assertTrue(all(0 <= policy.delay(3) <= 2 for _ in range(50)))
+
+    def test_budget(self):
+        self.policy.budget = RetryBudget(ratio=0, min_retries=1)
+        a_manager = self.manager(
+            {('GET', '/api/v2/status'): sequence(503)})
+        for _ in range(2):
+            with self.assertRaises(HTTPError):
+                a_manager.get_status()
+        # 2 first attempts and the single retry the budget allows
+        self.assertEqual(len(self.session.calls), 3)
+
+    def test_budget_grows_with_traffic(self):
+        budget = RetryBudget(ratio=0.5, min_retries=0)
+        self.assertFalse(budget.try_spend())
+        for _ in range(4):
+            budget.record_request()
+        self.assertEqual(sum(budget.try_spend() for _ in range(5)), 2)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        self.handler = sequence(requests.ConnectionError('refused'))
+        self.session = FakeSession(
+            {('GET', '/api/v2/status'): lambda **kw: self.handler(**kw)})
+        self.a_manager = AlertManager('http://am', req_obj=self.session,
+                                      breaker=self.breaker)
+
+    def test_opens_and_fails_fast(self):
+        for _ in range(2):
+            with self.assertRaises(requests.ConnectionError):
+                self.a_manager.get_status()
+        self.assertEqual(self.breaker.state, 'open')
+        with self.assertRaises(CircuitOpenError):
+            self.a_manager.get_status()
+        self.assertEqual(len(self.session.calls), 2)
+
+    def test_half_open_trial(self):
+        for _ in range(2):
+            with self.assertRaises(requests.ConnectionError):
+                self.a_manager.get_status()
+        time.sleep(0.06)
+        with self.assertRaises(requests.ConnectionError):
+            self.a_manager.get_status()
+        self.assertEqual(self.breaker.state, 'open')
+        time.sleep(0.06)
+        self.handler = sequence(200)
+        self.a_manager.get_status()
+        self.assertEqual(self.breaker.state, 'closed')
+        self.assertEqual(self.breaker.failures, 0)
+
+    def test_half_open_trial_unexpected_error(self):
+        for _ in range(2):
+            with self.assertRaises(requests.ConnectionError):
+                self.a_manager.get_status()
+        time.sleep(0.06)
+        self.handler = sequence(ValueError('bad response'))
+        with self.assertRaises(ValueError):
+            self.a_manager.get_status()
+        self.assertEqual(self.breaker.state, 'open')
+        time.sleep(0.06)
+        self.handler = sequence(200)
+        self.a_manager.get_status()
+        self.assertEqual(self.breaker.state, 'closed')
+
+    def test_server_errors_count_as_failures(self):
+        self.handler = sequence(500)
+        for _ in range(2):
+            with self.assertRaises(HTTPError):
+                self.a_manager.get_status()
+        self.assertEqual(self.breaker.state, 'open')
+
+    def test_retry_stops_at_open_circuit(self):
+        self.a_manager.retry = RetryPolicy(max_attempts=5, backoff=0,
+                                           budget=False)
+        with self.assertRaises(CircuitOpenError):
+            self.a_manager.get_status()
+        self.assertEqual(len(self.session.calls), 2)
+
+    def test_bulk_post_fails_fast(self):
+        self.session.routes[('POST', '/api/v2/alerts')] = \
+            requests.ConnectionError('refused')
+        alerts = [{'labels': {'n': str(n)}} for n in range(10)]
+        results = self.a_manager.post_alerts_bulk(alerts, batch_size=1,
+                                                  max_workers=1)
+        self.assertTrue(all(not result.ok for result in results))
+        self.assertIsInstance(results[-1].error, CircuitOpenError)
+        self.assertEqual(len(self.session.calls), 2)
+
+    def test_shared_per_host(self):
+        first = AlertManager('http://am-x', breaker=True)
+        second = AlertManager('http://am-x', breaker=True)
+        other = AlertManager('http://am-y', breaker=True)
+        self.assertIs(first.breaker, second.breaker)
+        self.assertIsNot(first.breaker, other.breaker)
@@ -0,0 +1,53 @@
+import unittest
+
+from alertmanager import Silence
+from alertmanager import CompactSilence
+from alertmanager import AlertIndex
+from alertmanager.silencing import evaluate_silences, silenced_by
+
+
+def alert(fingerprint, **labels):
+    return {'fingerprint': fingerprint, 'labels': labels}
+
+
+ALERTS = [
+    alert('1', alertname='DiskFull', severity='critical', team='storage'),
+    alert('2', alertname='DiskSlow', severity='warning', team='storage'),
+    alert('3', alertname='CPUHigh', severity='critical'),
+]
+
+
+def fingerprints(alerts):
+    return sorted(a['fingerprint'] for a in alerts)
+
+
+class TestEvaluateSilences(unittest.TestCase):
+
+    def setUp(self):
+        self.draft = Silence()
+        self.draft.add_matcher('alertname', 'Disk.*', isRegex=True)
+        self.draft.add_matcher('severity', 'critical')
+        self.posted = CompactSilence({
+            'id': 'abc',
+            'matchers': [{'name': 'team', 'value': 'storage',
+                          'isRegex': False, 'isEqual': False}]})
+        self.empty = {'id': 'empty', 'matchers': []}
+
+    def test_evaluate_silences(self):
+        result = evaluate_silences([self.draft, self.posted, self.empty],
+                                   ALERTS)
+        self.assertEqual(set(result), {0, 'abc', 'empty'})
+        self.assertEqual(fingerprints(result[0]), ['1'])
+        self.assertEqual(fingerprints(result['abc']), ['3'])
+        self.assertEqual(result['empty'], [])
+
+    def test_accepts_index(self):
+        index = AlertIndex(ALERTS)
+        result = evaluate_silences([self.draft], index)
+        self.assertEqual(fingerprints(result[0]), ['1'])
+
+    def test_silenced_by(self):
+        other = Silence()
+        other.add_matcher('severity', 'critical')
+        result = silenced_by([self.draft, other, self.posted], ALERTS)
+        self.assertEqual(result, {'1': [0, 1], '3': [1, 'abc']})
@@ -0,0 +1,176 @@
+import json
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+from alertmanager import Alert, CompactAlert, LazyAlertList, Silence, codec
+from alertmanager.snapshot import (EXTENSION, HEADER, Snapshot,
+                                   iter_snapshots, read_header,
+                                   snapshot_path, write_snapshot)
+
+from tests.data import TEST_ALERT_POST_DATA
+
+MINUTE = 60 * 10 ** 9
+T0 = 1577880000 * 10 ** 9
+
+
+def make_alert(i):
+    return {
+        'labels': {'alertname': 'Alert{}'.format(i % 3),
+                   'instance': 'host{}'.format(i)},
+        'annotations': {'summary': 'number {}'.format(i)},
+        'startsAt': '2020-01-01T12:00:0{}.12345678{}Z'.format(i % 10, i % 10),
+        'endsAt': '2020-01-01T13:00:00Z',
+        'updatedAt': '2020-01-01T12:00:00+01:00',
+        'generatorURL': 'http://prometheus/graph',
+        'status': {'state': 'active', 'silencedBy': ['s'] * (i % 2),
+                   'inhibitedBy': []},
+        'receivers': [{'name': 'team'}],
+        'fingerprint': '{:016x}'.format(i),
+    }
+
+
+ALERTS = [make_alert(i) for i in range(50)]
+
+SILENCES = [{
+    'id': 'abc',
+    'matchers': [{'name': 'alertname', 'value': 'A.*', 'isRegex': True,
+                  'isEqual': False}],
+    'startsAt': '2020-01-01T12:00:00Z',
+    'endsAt': 'never',
+    'createdBy': 'ops',
+    'comment': 'maintenance ☃',
+    'status': {'state': 'active'},
+}]
+
+
+class SnapshotTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'test' + EXTENSION)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+
+class TestSnapshot(SnapshotTestCase):
+
+    def test_round_trip(self):
+        write_snapshot(self.path, ALERTS, taken_at=T0)
+        with Snapshot(self.path) as snapshot:
+            self.assertEqual(len(snapshot), 50)
+            self.assertEqual(snapshot.kind, 'alerts')
+            self.assertEqual(snapshot.taken_at, T0)
+            self.assertEqual(list(snapshot), ALERTS)
+            self.assertEqual(json.dumps(list(snapshot)), json.dumps(ALERTS))
+
+    def test_random_access(self):
+        write_snapshot(self.path, ALERTS)
+        with Snapshot(self.path) as snapshot:
+            self.assertEqual(snapshot[17], ALERTS[17])
+            self.assertEqual(snapshot[-1], ALERTS[-1])
+            self.assertEqual(snapshot[10:13], ALERTS[10:13])
+            with self.assertRaises(IndexError):
+                snapshot[50]
+            # Only the strings of the records read were decoded
+            self.assertIn(None, snapshot.strings._values)
+
+    def test_inputs(self):
+        for alerts in ([Alert.from_dict(alert) for alert in ALERTS],
+                       [CompactAlert.from_dict(alert) for alert in ALERTS],
+                       LazyAlertList(codec.dumps(ALERTS))):
+            write_snapshot(self.path, alerts)
+            with Snapshot(self.path) as snapshot:
+                self.assertEqual(list(snapshot), ALERTS)
+
+    def test_alert_class(self):
+        write_snapshot(self.path, [TEST_ALERT_POST_DATA])
+        with Snapshot(self.path, alert_class=Alert) as snapshot:
+            alert = snapshot[0]
+        self.assertIsInstance(alert, Alert)
+        self.assertEqual(alert, TEST_ALERT_POST_DATA)
+
+    def test_silences(self):
+        write_snapshot(self.path, [Silence(s) for s in SILENCES],
+                       kind='silences')
+        with Snapshot(self.path) as snapshot:
+            self.assertEqual(snapshot.kind, 'silences')
+            self.assertEqual(list(snapshot), SILENCES)
+
+    def test_values(self):
+        records = [{'n': 1, 'big': 2 ** 70, 'f': 0.5, 'none': None,
+                    'nested': [[1, 'a'], {'b': False}], '': ''}, {}]
+        write_snapshot(self.path, records, kind='groups')
+        with Snapshot(self.path) as snapshot:
+            self.assertEqual(list(snapshot), records)
+        with self.assertRaises(ValueError):
+            write_snapshot(self.path, [{'a': object()}])
+        with self.assertRaises(ValueError):
+            write_snapshot(self.path, [], kind='alert')
+
+    def test_timestamps(self):
+        write_snapshot(self.path, ALERTS)
+        with Snapshot(self.path) as snapshot:
+            # Nine startsAt and one endsAt rebuild exactly, the others are
+            # kept as strings: a trailing zero and an offset
+            self.assertEqual(len(snapshot.timestamps), 10)
+            strings = snapshot.strings.decode_all()
+            self.assertIn('2020-01-01T12:00:00.123456780Z', strings)
+            self.assertIn('2020-01-01T12:00:00+01:00', strings)
+            self.assertEqual(min(snapshot.timestamps.decode_all()),
+                             T0 + 10 ** 9 + 123456781)
+
+    def test_smaller_than_json(self):
+        write_snapshot(self.path, ALERTS)
+        self.assertLess(os.path.getsize(self.path) * 2,
+                        len(json.dumps(ALERTS)))
+
+    def test_empty(self):
+        write_snapshot(self.path, [])
+        with Snapshot(self.path) as snapshot:
+            self.assertEqual(len(snapshot), 0)
+            self.assertEqual(list(snapshot), [])
+
+    def test_not_a_snapshot(self):
+        with open(self.path, 'wb') as handle:
+            handle.write(b'[]' * HEADER.size)
+        with self.assertRaises(ValueError):
+            Snapshot(self.path)
+        write_snapshot(self.path, ALERTS)
+        with open(self.path, 'r+b') as handle:
+            handle.seek(6)
+            handle.write(struct.pack('<H', 99))
+        with self.assertRaises(ValueError):
+            read_header(self.path)
+
+
+class TestArchive(SnapshotTestCase):
+
+    def test_directory(self):
+        path = write_snapshot(self.directory, ALERTS, taken_at=T0)
+        self.assertEqual(path, snapshot_path(self.directory, 'alerts', T0))
+        self.assertEqual(os.path.basename(path),
+                         'alerts-20200101T120000.000Z' + EXTENSION)
+        self.assertEqual(os.listdir(self.directory), [os.path.basename(path)])
+        self.assertEqual(read_header(path),
+                         {'kind': 'alerts', 'taken_at': T0, 'count': 50})
+
+    def test_iter_snapshots(self):
+        for minute in (2, 0, 1, 3):
+            write_snapshot(self.directory, ALERTS[:minute + 1],
+                           taken_at=T0 + minute * MINUTE)
+        write_snapshot(self.directory, SILENCES, kind='silences',
+                       taken_at=T0)
+        counts = [len(snapshot) for snapshot
+                  in iter_snapshots(self.directory, kind='alerts')]
+        self.assertEqual(counts, [1, 2, 3, 4])
+        selected = list(iter_snapshots(self.directory, start=T0 + MINUTE,
+                                       end=T0 + 2 * MINUTE))
+        self.assertEqual([s.taken_at for s in selected],
+                         [T0 + MINUTE, T0 + 2 * MINUTE])
+        pattern = os.path.join(self.directory, 'silences-*')
+        snapshot, = iter_snapshots(pattern, alert_class=Silence)
+        self.assertEqual(snapshot.kind, 'silences')
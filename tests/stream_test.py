@@ -0,0 +1,106 @@
+import unittest
+import json
+
+from alertmanager import AlertManager
+from alertmanager import Alert
+from alertmanager import CompactSilence
+from alertmanager.stream import ArrayDecoder, iter_json_array
+
+from tests.helpers import FakeSession, make_response
+
+TRICKY = [
+    {'labels': {'alertname': 'a'}, 'annotations': {'text': 'brace } ] {'}},
+    {'labels': {'alertname': 'b'}, 'annotations': {'text': 'quote \\" \\\\'}},
+    {'receivers': [{'name': 'x'}, {'name': 'y'}], 'nested': [[1], [2, [3]]]},
+    {'labels': {'alertname': 'café ☃'}},
+]
+
+
+def chunked(data, size):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+class TestIterJsonArray(unittest.TestCase):
+
+    def test_every_chunk_size(self):
+        for indent in (None, 2):
+            raw = json.dumps(TRICKY, indent=indent,
+                             ensure_ascii=False).encode('utf-8')
+            for size in range(1, 40):
+                self.assertEqual(list(iter_json_array(chunked(raw, size))),
+                                 TRICKY, (indent, size))
+
+    def test_empty_array(self):
+        self.assertEqual(list(iter_json_array([b' [', b' ] '])), [])
+
+    def test_items_yielded_before_end(self):
+        raw = json.dumps(TRICKY).encode('utf-8')
+        consumed = list()
+
+        def chunks():
+            for chunk in chunked(raw, 8):
+                consumed.append(chunk)
+                yield chunk
+
+        first = next(iter_json_array(chunks()))
+        self.assertEqual(first, TRICKY[0])
+        self.assertLess(sum(len(c) for c in consumed), len(raw))
+
+    def test_buffer_stays_small(self):
+        decoder = ArrayDecoder()
+        decoder.feed(b'[')
+        for _ in range(1000):
+            decoder.feed(b'{"labels": {"a": "b"}}, ')
+        self.assertLess(len(decoder._buf), 32)
+
+    def test_truncated(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_array([b'[{"a": 1}, {"b"']))
+
+    def test_not_an_array(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_array([b'{"a": 1}']))
+
+    def test_missing_comma(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_array([b'[{"a": 1} {"b": 2}]']))
+
+    def test_numbers_across_chunks(self):
+        self.assertEqual(list(iter_json_array([b'[12', b'34, 5', b'6]'])),
+                         [1234, 56])
+
+    def test_trailing_data(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_array([b'[{"a": 1}] [']))
+
+
+class TestIterAlerts(unittest.TestCase):
+
+    def setUp(self):
+        self.session = FakeSession({
+            ('GET', '/api/v2/alerts'): TRICKY[:2],
+            ('GET', '/api/v2/silences'): [{'id': 's1'}],
+        })
+        self.a_manager = AlertManager('http://am', req_obj=self.session)
+
+    def test_iter_alerts(self):
+        alerts = list(self.a_manager.iter_alerts(filter={'alertname': 'a'},
+                                                 chunk_size=7))
+        self.assertEqual(alerts, TRICKY[:2])
+        self.assertIsInstance(alerts[0], Alert)
+        kwargs = self.session.calls[0][2]
+        self.assertTrue(kwargs['stream'])
+        self.assertEqual(kwargs['params']['filter'], ['alertname="a"'])
+
+    def test_iter_silences_compact(self):
+        silences = list(self.a_manager.iter_silences(compact=True))
+        self.assertIsInstance(silences[0], CompactSilence)
+        self.assertEqual(silences[0].id, 's1')
+
+    def test_iter_alerts_error(self):
+        self.session.routes[('GET', '/api/v2/alerts')] = \
+            lambda **kwargs: make_response(500, b'boom')
+        with self.assertRaises(Exception) as cm:
+            list(self.a_manager.iter_alerts())
+        self.assertIn('500', str(cm.exception))
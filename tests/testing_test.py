@@ -0,0 +1,143 @@
+import time
+import unittest
+
+import requests
+from requests import HTTPError
+
+from alertmanager import RetryPolicy
+from alertmanager.testing import FakeAlertManager, fingerprint, make_alert
+
+from tests.data import TEST_SILENCE_POST_DATA
+
+
+class TestFakeAlertManager(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeAlertManager(alerts=60).start()
+        self.a_manager = self.fake.client()
+
+    def tearDown(self):
+        self.a_manager.request_session.close()
+        self.fake.stop()
+
+    def silence(self, **matchers):
+        silence = dict(TEST_SILENCE_POST_DATA)
+        silence['matchers'] = [{'name': name, 'value': value,
+                                'isRegex': False}
+                               for name, value in matchers.items()]
+        return self.a_manager.post_silence(silence)['silenceID']
+
+    def test_synthetic_dataset(self):
+        alerts = self.a_manager.get_alerts(compact=True)
+        self.assertEqual(len(alerts), 60)
+        alert = alerts[0]
+        self.assertEqual(alert['fingerprint'],
+                         fingerprint(make_alert(0)['labels']))
+        self.assertEqual(alert['status']['state'], 'active')
+        self.assertEqual(alert['receivers'], [{'name': 'default'}])
+        self.assertLess(alert.starts_at, alert.ends_at)
+
+    def test_post_alerts(self):
+        self.fake.clear()
+        self.a_manager.post_alerts({'labels': {'alertname': 'a'}},
+                                   {'labels': {'alertname': 'b'}})
+        first = self.a_manager.get_alerts(compact=True)
+        self.a_manager.post_alerts({'labels': {'alertname': 'a'},
+                                    'annotations': {'new': 'yes'}})
+        second = self.a_manager.get_alerts(compact=True)
+        self.assertEqual(len(second), 2)
+        updated = [a for a in second if a['labels']['alertname'] == 'a'][0]
+        self.assertEqual(updated['annotations'], {'new': 'yes'})
+        # Still firing, so it keeps its start time
+        self.assertEqual(updated['startsAt'], first[0]['startsAt'])
+
+    def test_resolved_alerts_hidden(self):
+        self.fake.clear()
+        self.a_manager.post_alerts({'labels': {'alertname': 'a'},
+                                    'endsAt': '2000-01-01T00:00:00Z'})
+        self.assertEqual(len(self.a_manager.get_alerts()), 0)
+        self.assertEqual(len(self.fake.alerts), 1)
+
+    def test_gzip_posts(self):
+        self.fake.clear()
+        a_manager = self.fake.client(compress_threshold=0)
+        a_manager.post_alerts_bulk(make_alert(i) for i in range(100))
+        self.assertEqual(len(self.a_manager.get_alerts()), 100)
+
+    def test_filters(self):
+        alerts = self.a_manager.get_alerts(filter={'team': 'team3'})
+        self.assertEqual(len(alerts), 3)
+        self.assertTrue(all(a['labels']['team'] == 'team3' for a in alerts))
+
+    def test_silenced(self):
+        silence_id = self.silence(team='team3')
+        alerts = self.a_manager.get_alerts(compact=True)
+        muted = [a for a in alerts if a['status']['state'] == 'suppressed']
+        self.assertEqual(len(muted), 3)
+        self.assertEqual(muted[0]['status']['silencedBy'], [silence_id])
+        unmuted = self.a_manager.get_alerts(silenced='false')
+        self.assertEqual(len(unmuted), 57)
+
+    def test_silence_lifecycle(self):
+        silence_id = self.silence(alertname='SyntheticAlert1')
+        silence = self.a_manager.request_session.get(
+            '{}/api/v2/silence/{}'.format(self.fake.url, silence_id)).json()
+        self.assertEqual(silence['status']['state'], 'active')
+        self.assertEqual(silence['createdBy'], 'pytest')
+        self.a_manager.delete_silence(silence_id)
+        silences = self.a_manager.get_silences()
+        self.assertEqual(silences[0]['status']['state'], 'expired')
+        with self.assertRaises(HTTPError):
+            self.a_manager.delete_silence('unknown')
+
+    def test_silence_filters(self):
+        self.silence(team='team3')
+        self.silence(team='team4')
+        silences = self.a_manager.get_silences(filter={'team': 'team4'})
+        self.assertEqual(len(silences), 1)
+
+    def test_invalid_silence(self):
+        silence = dict(TEST_SILENCE_POST_DATA, matchers=[])
+        response = requests.post(self.fake.url + '/api/v2/silences',
+                                 json=silence)
+        self.assertEqual(response.status_code, 400)
+
+    def test_groups(self):
+        groups = self.a_manager.get_alert_groups()
+        self.assertEqual(len(groups), 50)
+        self.assertEqual(sum(len(g['alerts']) for g in groups), 60)
+        self.assertEqual(groups[0]['receiver']['name'], 'default')
+
+    def test_status_and_receivers(self):
+        status = self.a_manager.get_status()
+        self.assertEqual(status.cluster.status, 'ready')
+        receivers = self.a_manager.request_session.get(
+            self.fake.url + '/api/v2/receivers').json()
+        self.assertEqual(receivers, [{'name': 'default'}])
+
+    def test_latency(self):
+        self.fake.latency = 0.05
+        start = time.monotonic()
+        self.a_manager.get_status()
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+
+    def test_injected_errors(self):
+        self.fake.fail_next(2, status=503, route='/api/v2/status')
+        with self.assertRaises(HTTPError):
+            self.a_manager.get_status()
+        self.a_manager.retry = RetryPolicy(backoff=0, budget=False)
+        self.a_manager.get_status()
+        self.assertEqual(self.fake.requests['/api/v2/status'], 3)
+        self.a_manager.get_alerts()
+
+    def test_error_rate(self):
+        self.fake.error_rate = 1.0
+        self.fake.error_status = 500
+        with self.assertRaises(HTTPError):
+            self.a_manager.get_alerts()
+
+    def test_compressed_responses(self):
+        self.fake.compress_responses = True
+        response = requests.get(self.fake.url + '/api/v2/alerts')
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(len(response.json()), 60)
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta, timezone
+import unittest
+
+from alertmanager import (Alert, CompactAlert, LazyAlertList, codec,
+                          firing_longer_than, sort_by_time, started_between)
+from alertmanager.timeline import epochs
+
+NOW = datetime(2020, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+
+def make_alert(name, started, ends='2020-01-01T13:00:00Z'):
+    return {'labels': {'alertname': name}, 'startsAt': started,
+            'endsAt': ends}
+
+
+ALERTS = [
+    make_alert('recent', '2020-01-01T11:50:00Z'),
+    make_alert('old', '2020-01-01T09:00:00.123456789Z'),
+    make_alert('ended', '2020-01-01T08:00:00Z', '2020-01-01T11:00:00Z'),
+    make_alert('unstarted', None),
+    make_alert('offset', '2020-01-01T11:00:00+01:00', None),
+]
+
+
+def names(alerts):
+    return [alert['labels']['alertname'] for alert in alerts]
+
+
+class TestAlertTimestamps(unittest.TestCase):
+
+    def test_parsed_once(self):
+        alert = Alert.from_dict(ALERTS[1])
+        self.assertEqual(alert.starts_at, datetime(
+            2020, 1, 1, 9, 0, 0, 123456, tzinfo=timezone.utc))
+        self.assertIs(alert.starts_at, alert.starts_at)
+        self.assertEqual(alert.epoch(), alert.starts_at.timestamp())
+        self.assertIsNone(alert.updated_at)
+        self.assertIsNone(alert.epoch('updatedAt'))
+
+    def test_reassigned(self):
+        alert = Alert.from_dict(ALERTS[0])
+        self.assertEqual(alert.starts_at.minute, 50)
+        alert.startsAt = '2021-01-01T00:00:00Z'
+        self.assertEqual(alert.starts_at.year, 2021)
+
+    def test_cache_not_in_payload(self):
+        alert = Alert.from_dict(ALERTS[0])
+        alert.starts_at
+        self.assertEqual(alert.to_dict(), ALERTS[0])
+        self.assertEqual(codec.loads(codec.dumps(alert)), ALERTS[0])
+
+    def test_compact_epoch(self):
+        alert = CompactAlert.from_dict(ALERTS[0])
+        self.assertEqual(alert.epoch(), Alert.from_dict(ALERTS[0]).epoch())
+
+
+class TestTimeline(unittest.TestCase):
+
+    def containers(self):
+        yield ALERTS
+        yield [Alert.from_dict(alert) for alert in ALERTS]
+        yield [CompactAlert.from_dict(alert) for alert in ALERTS]
+        yield LazyAlertList(codec.dumps(ALERTS))
+
+    def test_epochs(self):
+        values = epochs(ALERTS)
+        self.assertEqual(values[0], NOW.timestamp() - 600)
+        self.assertIsNone(values[3])
+        self.assertEqual(values[4], NOW.timestamp() - 7200)
+        for alerts in self.containers():
+            self.assertEqual(epochs(alerts, 'endsAt'),
+                             epochs(ALERTS, 'endsAt'))
+
+    def test_sort_by_time(self):
+        for alerts in self.containers():
+            self.assertEqual(names(sort_by_time(alerts)),
+                             ['ended', 'old', 'offset', 'recent', 'unstarted'])
+            self.assertEqual(names(sort_by_time(alerts, reverse=True)),
+                             ['recent', 'offset', 'old', 'ended', 'unstarted'])
+
+    def test_firing_longer_than(self):
+        for alerts in self.containers():
+            self.assertEqual(
+                names(firing_longer_than(alerts, timedelta(hours=1), NOW)),
+                ['old', 'offset'])
+            self.assertEqual(names(firing_longer_than(alerts, 60, NOW)),
+                             ['recent', 'old', 'offset'])
+
+    def test_started_between(self):
+        for alerts in self.containers():
+            self.assertEqual(
+                names(started_between(alerts, NOW - timedelta(hours=1))),
+                ['recent'])
+            self.assertEqual(
+                names(started_between(alerts, end=NOW.timestamp() - 3600)),
+                ['old', 'ended', 'offset'])
+
+    def test_lazy_stays_lazy(self):
+        alerts = LazyAlertList(codec.dumps(ALERTS))
+        result = firing_longer_than(alerts, 60, NOW)
+        self.assertIsInstance(result, LazyAlertList)
+        self.assertEqual(alerts._wrapped, {})
+        self.assertIsInstance(result[0], Alert)
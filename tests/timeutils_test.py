@@ -0,0 +1,141 @@
+from datetime import datetime, timedelta, timezone
+import os
+import threading
+import time
+import unittest
+
+from alertmanager import CompactSilence, Silence
+from alertmanager.timeutils import (format_rfc3339, frozen_now,
+                                    parse_rfc3339, to_rfc3339, utc_now)
+
+NOW = datetime(2020, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+
+class TestParse(unittest.TestCase):
+
+    def test_offsets_normalized(self):
+        self.assertEqual(parse_rfc3339('2020-01-01T13:00:00.123456789+01:00'),
+                         NOW.replace(microsecond=123456))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            parse_rfc3339('yesterday')
+
+
+class TestFormat(unittest.TestCase):
+
+    def test_utc(self):
+        self.assertEqual(format_rfc3339(NOW), '2020-01-01T12:00:00.000000Z')
+
+    @unittest.skipUnless(hasattr(time, 'tzset'), 'needs time.tzset')
+    def test_naive_is_local(self):
+        previous = os.environ.get('TZ')
+        os.environ['TZ'] = 'UTC-02'
+        time.tzset()
+        try:
+            self.assertEqual(format_rfc3339(datetime(2020, 1, 1, 12)),
+                             '2020-01-01T10:00:00.000000Z')
+        finally:
+            if previous is None:
+                del os.environ['TZ']
+            else:
+                os.environ['TZ'] = previous
+            time.tzset()
+
+    def test_offset_converted(self):
+        moment = datetime(2020, 1, 1, 13, 30, 0, 5,
+                          tzinfo=timezone(timedelta(hours=1)))
+        self.assertEqual(format_rfc3339(moment), '2020-01-01T12:30:00.000005Z')
+
+    def test_round_trip(self):
+        self.assertEqual(parse_rfc3339(format_rfc3339(NOW)), NOW)
+
+
+class TestToRFC3339(unittest.TestCase):
+
+    def convert(self, value):
+        with frozen_now(NOW):
+            return to_rfc3339(value)
+
+    def test_relative(self):
+        cases = {
+            'in 5 minutes': '2020-01-01T12:05:00.000000Z',
+            'in 1 minute': '2020-01-01T12:01:00.000000Z',
+            'IN 2 Hours': '2020-01-01T14:00:00.000000Z',
+            'in an hour': '2020-01-01T13:00:00.000000Z',
+            'in 1.5 hours': '2020-01-01T13:30:00.000000Z',
+            'in 30s': '2020-01-01T12:00:30.000000Z',
+            'in 3 days': '2020-01-04T12:00:00.000000Z',
+            'in 1 week': '2020-01-08T12:00:00.000000Z',
+            '10 minutes ago': '2020-01-01T11:50:00.000000Z',
+            ' now ': '2020-01-01T12:00:00.000000Z',
+        }
+        for value, expected in cases.items():
+            self.assertEqual(self.convert(value), expected, value)
+
+    def test_values(self):
+        self.assertEqual(self.convert(NOW), '2020-01-01T12:00:00.000000Z')
+        self.assertEqual(self.convert(timedelta(minutes=1)),
+                         '2020-01-01T12:01:00.000000Z')
+        self.assertEqual(self.convert(NOW.timestamp()),
+                         '2020-01-01T12:00:00.000000Z')
+        self.assertEqual(self.convert(int(NOW.timestamp()) + 1),
+                         '2020-01-01T12:00:01.000000Z')
+        self.assertEqual(self.convert('2020-01-01T13:00:00+01:00'),
+                         '2020-01-01T12:00:00.000000Z')
+
+    def test_unsupported(self):
+        for value in (None, True, ['in 1 hour'], 1e20, -1e20,
+                      float('nan')):
+            with self.assertRaises(ValueError):
+                to_rfc3339(value)
+        with self.assertRaises(ValueError):
+            to_rfc3339('not a time at all')
+
+    def test_maya_fallback(self):
+        tomorrow = parse_rfc3339(to_rfc3339('tomorrow'))
+        delta = tomorrow - datetime.now(timezone.utc)
+        self.assertAlmostEqual(delta.total_seconds(), 86400, delta=60)
+
+    def test_unfrozen(self):
+        before = datetime.now(timezone.utc)
+        moment = parse_rfc3339(to_rfc3339('in 1 minute'))
+        self.assertLessEqual(before + timedelta(minutes=1), moment)
+        self.assertLess(moment, before + timedelta(minutes=2))
+
+
+class TestFrozenNow(unittest.TestCase):
+
+    def test_frozen(self):
+        with frozen_now() as now:
+            self.assertIs(utc_now(), now)
+            first = to_rfc3339('in 1 hour')
+            self.assertEqual(to_rfc3339('in 1 hour'), first)
+        self.assertIsNot(utc_now(), now)
+
+    def test_nested(self):
+        with frozen_now(NOW):
+            with frozen_now(NOW + timedelta(days=1)):
+                self.assertEqual(to_rfc3339('now'),
+                                 '2020-01-02T12:00:00.000000Z')
+            self.assertEqual(to_rfc3339('now'), '2020-01-01T12:00:00.000000Z')
+
+    def test_thread_local(self):
+        seen = list()
+        with frozen_now(NOW):
+            thread = threading.Thread(target=lambda: seen.append(utc_now()))
+            thread.start()
+            thread.join()
+        self.assertNotEqual(seen[0], NOW)
+
+
+class TestSetEndtime(unittest.TestCase):
+
+    def test_objects(self):
+        for cls in (Silence, CompactSilence):
+            silence = cls()
+            with frozen_now(NOW):
+                silence.set_endtime('in 5 minutes')
+            self.assertEqual(silence['endsAt'], '2020-01-01T12:05:00.000000Z')
+            silence.set_endtime(NOW)
+            self.assertEqual(silence['endsAt'], '2020-01-01T12:00:00.000000Z')
@@ -0,0 +1,73 @@
+import socket
+import unittest
+
+from requests.adapters import HTTPAdapter
+
+from alertmanager import AlertManager
+from alertmanager.transport import (KeepAliveAdapter, keepalive_options,
+                                    make_session, shared_session)
+
+from tests.helpers import FakeSession
+
+
+class TestTransport(unittest.TestCase):
+
+    def test_keepalive_options(self):
+        options = keepalive_options(30)
+        self.assertIn((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1), options)
+        if hasattr(socket, 'TCP_KEEPIDLE'):
+            self.assertIn((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 30),
+                          options)
+            self.assertIn((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 10),
+                          options)
+
+    def test_make_session_pool_size(self):
+        session = make_session(pool_connections=2, pool_maxsize=32)
+        adapter = session.get_adapter('http://am:9093')
+        self.assertIsInstance(adapter, HTTPAdapter)
+        self.assertNotIsInstance(adapter, KeepAliveAdapter)
+        self.assertEqual(adapter._pool_maxsize, 32)
+        self.assertEqual(adapter.poolmanager.connection_pool_kw['maxsize'],
+                         32)
+
+    def test_make_session_keepalive(self):
+        session = make_session(keepalive=45)
+        adapter = session.get_adapter('https://am:9093')
+        self.assertIsInstance(adapter, KeepAliveAdapter)
+        socket_options = adapter.poolmanager.connection_pool_kw[
+            'socket_options']
+        self.assertIn((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+                      socket_options)
+        # Nagle stays disabled like urllib3's default
+        self.assertIn((socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+                      socket_options)
+
+    def test_shared_session(self):
+        self.assertIs(shared_session(pool_maxsize=20),
+                      shared_session(pool_maxsize=20))
+        self.assertIsNot(shared_session(pool_maxsize=20),
+                         shared_session(pool_maxsize=21))
+
+    def test_manager_default_session(self):
+        a_manager = AlertManager('http://am', pool_maxsize=16)
+        adapter = a_manager.request_session.get_adapter('http://am:9093')
+        self.assertEqual(adapter._pool_maxsize, 16)
+
+    def test_managers_share_session(self):
+        first = AlertManager('http://am1', shared=True, pool_maxsize=8)
+        second = AlertManager('http://am1', shared=True, pool_maxsize=8)
+        third = AlertManager('http://am1', pool_maxsize=8)
+        self.assertIs(first.request_session, second.request_session)
+        self.assertIsNot(first.request_session, third.request_session)
+
+    def test_timeout(self):
+        session = FakeSession({('GET', '/api/v2/status'): {}})
+        a_manager = AlertManager('http://am', req_obj=session,
+                                 timeout=(3.05, 27))
+        a_manager.get_status()
+        self.assertEqual(session.calls[-1][2]['timeout'], (3.05, 27))
+
+    def test_no_timeout_by_default(self):
+        session = FakeSession({('GET', '/api/v2/status'): {}})
+        AlertManager('http://am', req_obj=session).get_status()
+        self.assertNotIn('timeout', session.calls[-1][2])
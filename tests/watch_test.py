@@ -0,0 +1,104 @@
+import unittest
+import threading
+
+from requests import ConnectionError
+
+from alertmanager import AlertManager
+from alertmanager import AlertWatcher
+from alertmanager import MultiAlertManager
+
+from tests.helpers import FakeSession
+
+
+def alert(fingerprint, summary='x', **labels):
+    return {'fingerprint': fingerprint, 'labels': labels,
+            'annotations': {'summary': summary},
+            'status': {'state': 'active'},
+            'endsAt': '2020-01-01T00:00:00Z'}
+
+
+class TestAlertWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.session = FakeSession()
+        self.set_alerts([alert('1', alertname='a'), alert('2', alertname='b')])
+        self.a_manager = AlertManager('http://am', req_obj=self.session)
+        self.watcher = AlertWatcher(self.a_manager, interval=0.01)
+
+    def set_alerts(self, alerts):
+        self.session.routes[('GET', '/api/v2/alerts')] = alerts
+
+    def kinds(self, events):
+        return sorted((e.kind, e.key) for e in events)
+
+    def test_initial_poll(self):
+        self.assertEqual(self.kinds(self.watcher.poll()),
+                         [('added', '1'), ('added', '2')])
+        self.assertEqual(self.watcher.poll(), [])
+
+    def test_no_initial_events(self):
+        watcher = AlertWatcher(self.a_manager, emit_initial=False)
+        self.assertEqual(watcher.poll(), [])
+
+    def test_changes(self):
+        self.watcher.poll()
+        changed = alert('2', summary='new', alertname='b')
+        changed['endsAt'] = '2030-01-01T00:00:00Z'
+        self.set_alerts([changed, alert('3', alertname='c')])
+        events = self.watcher.poll()
+        self.assertEqual(self.kinds(events),
+                         [('added', '3'), ('changed', '2'), ('resolved', '1')])
+        change = [e for e in events if e.kind == 'changed'][0]
+        self.assertEqual(change.diff,
+                         {'annotations': {'summary': ('x', 'new')}})
+        self.assertEqual(change.previous.annotations.summary, 'x')
+
+    def test_partial_snapshot_resolves_nothing(self):
+        other = FakeSession({('GET', '/api/v2/alerts'): [
+            alert('3', alertname='c')]})
+        multi = MultiAlertManager(
+            [self.a_manager, AlertManager('http://am2', req_obj=other)])
+        self.addCleanup(multi.close)
+        watcher = AlertWatcher(multi)
+        watcher.poll()
+        other.routes[('GET', '/api/v2/alerts')] = ConnectionError('down')
+        self.set_alerts([alert('1', summary='new', alertname='a'),
+                         alert('2', alertname='b')])
+        self.assertEqual(self.kinds(watcher.poll()), [('changed', '1')])
+        other.routes[('GET', '/api/v2/alerts')] = []
+        self.assertEqual(self.kinds(watcher.poll()), [('resolved', '3')])
+
+    def test_filters_passed_to_get_alerts(self):
+        watcher = AlertWatcher(self.a_manager, filter={'alertname': 'a'})
+        watcher.poll()
+        params = self.session.calls[-1][2]['params']
+        self.assertEqual(params['filter'], ['alertname="a"'])
+
+    def test_iterate_survives_errors(self):
+        self.watcher.poll()
+        self.set_alerts(ConnectionError('down'))
+        events = iter(self.watcher)
+        self.set_alerts_later([alert('1', alertname='a')])
+        event = next(events)
+        self.assertEqual((event.kind, event.key), ('resolved', '2'))
+        self.watcher.stop()
+
+    def set_alerts_later(self, alerts):
+        timer = threading.Timer(0.05, self.set_alerts, [alerts])
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+    def test_run_with_callbacks(self):
+        seen = list()
+        done = threading.Event()
+
+        def callback(event):
+            seen.append(event)
+            if len(seen) == 2:
+                done.set()
+
+        self.watcher.add_callback(callback)
+        self.watcher.start()
+        self.assertTrue(done.wait(5))
+        self.watcher.stop(timeout=5)
+        self.assertEqual(self.kinds(seen), [('added', '1'), ('added', '2')])